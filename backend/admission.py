@@ -0,0 +1,176 @@
+# backend/admission.py
+"""
+Controle de admissão das rotas pesadas.
+
+Cada rota limitada tem um número máximo de requisições em execução e uma
+fila de espera curta e limitada, atendida em ordem de chegada. Quando a
+fila está cheia a requisição é recusada na hora (429); quando espera mais
+que o tempo máximo, é recusada com 503. As duas respostas trazem
+`Retry-After`, estimado pelo tempo médio de serviço da rota, para que os
+clientes espaçem as novas tentativas em vez de repetir imediatamente.
+
+Limites por rota via ambiente (NOME em maiúsculas, ex.: PREDICT):
+    ADMISSION_<NOME>_CONCURRENCY, ADMISSION_<NOME>_QUEUE, ADMISSION_<NOME>_WAIT_MS
+e ADMISSION_ENABLED=0 desliga o controle.
+"""
+import math
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from flask import g
+
+# (concorrência, fila, espera máxima em ms)
+DEFAULT_LIMITS = {
+    'predict': (4, 8, 250),
+    'analises': (8, 16, 500),
+    'search': (4, 8, 500),
+    'history': (8, 16, 500),
+    'sync': (4, 8, 1000),
+    'bulk': (1, 4, 2000),
+}
+EWMA_ALPHA = 0.2
+
+ENABLED = os.getenv("ADMISSION_ENABLED", "1") not in ("0", "false", "False")
+
+
+class Overloaded(Exception):
+    """
+    Requisição recusada pelo controle de admissão.
+    """
+
+    def __init__(self, route: str, status: int, reason: str, retry_after: int):
+        super().__init__(f"{route}: {reason}")
+        self.route = route
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('event', 'granted')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionLimiter:
+    """
+    Semáforo com fila FIFO limitada e contadores para o /metrics/admission.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue: int, wait_ms: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = queue
+        self.max_wait = wait_ms / 1000
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self.active = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.peak_queue = 0
+        self.service_time = 0.05
+
+    def _retry_after(self) -> int:
+        backlog = len(self._queue) + self.active
+        return max(1, math.ceil(backlog * self.service_time / self.concurrency))
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self.active < self.concurrency and not self._queue:
+                self.active += 1
+                self.admitted += 1
+                return
+            if len(self._queue) >= self.max_queue:
+                self.shed_queue_full += 1
+                raise Overloaded(self.name, 429, 'queue_full', self._retry_after())
+            waiter = _Waiter()
+            self._queue.append(waiter)
+            self.peak_queue = max(self.peak_queue, len(self._queue))
+
+        waiter.event.wait(self.max_wait)
+        with self._lock:
+            if waiter.granted:
+                self.admitted += 1
+                return
+            self._queue.remove(waiter)
+            self.shed_timeout += 1
+            raise Overloaded(self.name, 503, 'queue_timeout', self._retry_after())
+
+    def release(self, elapsed: float) -> None:
+        with self._lock:
+            self.service_time += EWMA_ALPHA * (elapsed - self.service_time)
+            if self._queue:
+                # A vaga passa direto para o primeiro da fila (active não muda)
+                waiter = self._queue.popleft()
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self.active -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'concurrency': self.concurrency,
+                'max_queue': self.max_queue,
+                'max_wait_ms': int(self.max_wait * 1000),
+                'active': self.active,
+                'queue_depth': len(self._queue),
+                'peak_queue_depth': self.peak_queue,
+                'admitted': self.admitted,
+                'shed_queue_full': self.shed_queue_full,
+                'shed_timeout': self.shed_timeout,
+                'service_time_ms': round(self.service_time * 1000, 3),
+            }
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+LIMITERS = {
+    name: AdmissionLimiter(
+        name,
+        _env_int(f"ADMISSION_{name.upper()}_CONCURRENCY", concurrency),
+        _env_int(f"ADMISSION_{name.upper()}_QUEUE", queue),
+        _env_int(f"ADMISSION_{name.upper()}_WAIT_MS", wait_ms),
+    )
+    for name, (concurrency, queue, wait_ms) in DEFAULT_LIMITS.items()
+}
+
+
+def limited(name: str):
+    """
+    Decorator de rota: só executa a view depois de admitida pelo limitador `name`.
+    """
+
+    limiter = LIMITERS[name]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Rotas que delegam para outra rota limitada (ex.: GET /predict) não ocupam duas vagas
+            if not ENABLED or g.get('admitted'):
+                return view(*args, **kwargs)
+            limiter.acquire()
+            g.admitted = name
+            start = time.perf_counter()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                limiter.release(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def metrics() -> dict:
+    return {
+        'enabled': ENABLED,
+        'routes': {name: limiter.snapshot() for name, limiter in LIMITERS.items()},
+    }
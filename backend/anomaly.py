@@ -0,0 +1,260 @@
+# backend/anomaly.py
+"""
+Detecção de anomalias de comportamento do rebanho.
+
+Cada vaca tem, para as métricas dos colares (as mesmas colunas de
+`cow_monitoring_data.csv`), uma média e uma variância exponencialmente
+ponderadas. O estado do rebanho inteiro fica em arrays numpy (uma linha
+por vaca, uma coluna por métrica), e um lote de leituras atualiza todas as
+vacas do lote em um único passo vetorizado:
+
+    z         = (x - média) / desvio          (contra a linha de base anterior)
+    diff      = x - média
+    média    += alpha * diff
+    variância = (1 - alpha) * (variância + alpha * diff²)
+
+Depois de `warmup` leituras, |z| acima do limiar marca a vaca naquela
+métrica; o alerta é emitido só na transição (a vaca que continua fora da
+faixa não gera um alerta por leitura). Leituras repetidas da mesma vaca no
+lote são aplicadas em rodadas, na ordem em que chegaram.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+METRICS = ('avgactivity', 'avgrumination', 'avghoursstanding', 'avgtotalmotion')
+ANOMALY_ALPHA = float(os.getenv("ANOMALY_ALPHA", "0.1"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0"))
+ANOMALY_WARMUP = int(os.getenv("ANOMALY_WARMUP", "10"))
+ANOMALY_STATE_PATH = os.getenv("ANOMALY_STATE_PATH")
+ANOMALY_SAVE_SECONDS = int(os.getenv("ANOMALY_SAVE_SECONDS", "60"))
+# Piso do desvio, em fração da média, para vacas com leituras quase constantes
+MIN_STD_FRACTION = 0.02
+
+
+class HerdState:
+    """
+    Estado EWMA de todas as vacas em arrays que crescem por duplicação.
+    """
+
+    def __init__(self, metrics=METRICS, alpha=ANOMALY_ALPHA, threshold=ANOMALY_Z_THRESHOLD,
+                 warmup=ANOMALY_WARMUP, capacity=1024):
+        self.metrics = tuple(metrics)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.index = {}
+        self.keys = []
+        n_metrics = len(self.metrics)
+        self.mean = np.zeros((capacity, n_metrics))
+        self.var = np.zeros((capacity, n_metrics))
+        self.count = np.zeros((capacity, n_metrics), dtype=np.int64)
+        self.alerting = np.zeros((capacity, n_metrics), dtype=bool)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _crescer(self, needed: int) -> None:
+        capacity = self.mean.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('mean', 'var', 'count', 'alerting'):
+            old = getattr(self, name)
+            new = np.zeros((capacity, old.shape[1]), dtype=old.dtype)
+            new[:old.shape[0]] = old
+            setattr(self, name, new)
+
+    def _linhas(self, keys) -> np.ndarray:
+        index = self.index
+        found = list(map(index.get, keys))
+        # Só as vacas novas passam pelo laço em Python
+        if None in found:
+            for position, row in enumerate(found):
+                if row is None:
+                    key = keys[position]
+                    row = index.get(key)
+                    if row is None:
+                        row = index[key] = len(self.keys)
+                        self.keys.append(key)
+                    found[position] = row
+            self._crescer(len(self.keys))
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+    def _passo(self, rows: np.ndarray, values: np.ndarray):
+        """Atualiza vacas distintas de uma vez; devolve z e as novas transições para alerta."""
+
+        mean, var, count = self.mean[rows], self.var[rows], self.count[rows]
+        alerting = self.alerting[rows]
+        present = ~np.isnan(values)
+        complete = bool(present.all())
+        x = values if complete else np.where(present, values, mean)
+
+        std = np.maximum(np.sqrt(var), MIN_STD_FRACTION * np.abs(mean) + 1e-9)
+        diff = x - mean
+        z = diff / std
+        flagged = (count >= self.warmup) & (np.abs(z) > self.threshold)
+        if not complete:
+            z[~present] = 0.0
+            flagged &= present
+        crossed = flagged & ~alerting
+
+        new_mean = mean + self.alpha * diff
+        new_var = (1 - self.alpha) * (var + self.alpha * diff * diff)
+        first = count == 0
+        if first.any():
+            new_mean[first] = x[first]
+            new_var[first] = 0.0
+        if complete:
+            self.alerting[rows] = flagged
+            self.mean[rows] = new_mean
+            self.var[rows] = new_var
+            self.count[rows] = count + 1
+        else:
+            # Métrica ausente na leitura: estado e alerta ficam como estavam
+            self.alerting[rows] = np.where(present, flagged, alerting)
+            self.mean[rows] = np.where(present, new_mean, mean)
+            self.var[rows] = np.where(present, new_var, var)
+            self.count[rows] = count + present
+        return z, crossed, mean, std
+
+    def update(self, keys, values: np.ndarray):
+        """
+        Aplica um lote de leituras (`values`: linhas x métricas, NaN = ausente).
+        Devolve a lista de transições: (posição no lote, métrica, z, média e desvio anteriores).
+        """
+
+        with self._lock:
+            return self._aplicar(self._linhas(keys), np.asarray(values, dtype=np.float64))
+
+    def update_rows(self, rows: np.ndarray, values: np.ndarray):
+        """Como `update`, para linhas já resolvidas por `rows_for` (evita o dicionário de chaves)."""
+
+        with self._lock:
+            return self._aplicar(np.asarray(rows, dtype=np.int64), np.asarray(values, dtype=np.float64))
+
+    def rows_for(self, keys) -> np.ndarray:
+        with self._lock:
+            return self._linhas(keys)
+
+    def _aplicar(self, rows: np.ndarray, values: np.ndarray):
+        order = np.argsort(rows, kind='stable')
+        sorted_rows = rows[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_rows)) + 1]
+        # rank = quantas leituras da mesma vaca vieram antes no lote
+        rank = np.empty(len(rows), dtype=np.int64)
+        rank[order] = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+
+        events = []
+        for round_index in range(int(rank.max()) + 1 if len(rows) else 0):
+            positions = np.flatnonzero(rank == round_index)
+            z, crossed, mean, std = self._passo(rows[positions], values[positions])
+            for local, metric in zip(*np.nonzero(crossed)):
+                events.append((
+                    int(positions[local]), self.metrics[metric],
+                    float(z[local, metric]), float(mean[local, metric]), float(std[local, metric]),
+                ))
+        return events
+
+    def cow_state(self, key):
+        row = self.index.get(key)
+        if row is None:
+            return None
+        return {
+            metric: {
+                'mean': float(self.mean[row, column]),
+                'std': float(np.sqrt(self.var[row, column])),
+                'readings': int(self.count[row, column]),
+                'alerting': bool(self.alerting[row, column]),
+            }
+            for column, metric in enumerate(self.metrics)
+        }
+
+    def save(self, path) -> None:
+        with self._lock:
+            size = len(self.keys)
+            np.savez_compressed(
+                path,
+                keys=np.array(["\x1f".join(key) for key in self.keys], dtype=str),
+                mean=self.mean[:size], var=self.var[:size],
+                count=self.count[:size], alerting=self.alerting[:size],
+            )
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        data = np.load(path)
+        state = cls(capacity=max(1024, len(data['keys'])), **kwargs)
+        state.keys = [tuple(str(key).split("\x1f")) for key in data['keys']]
+        state.index = {key: row for row, key in enumerate(state.keys)}
+        size = len(state.keys)
+        for name in ('mean', 'var', 'count', 'alerting'):
+            getattr(state, name)[:size] = data[name]
+        return state
+
+
+def _parse_timestamp(position: int, value):
+    if value in (None, ''):
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"Leitura {position}: timestamp deve estar em ISO 8601") from None
+    # As colunas DateTime guardam UTC sem fuso
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_readings(readings, metrics=METRICS):
+    """
+    Converte a lista de leituras do app em (cow_ids, matriz de valores, timestamps).
+    """
+
+    cow_ids, timestamps = [], []
+    values = np.full((len(readings), len(metrics)), np.nan)
+    for position, reading in enumerate(readings):
+        if not isinstance(reading, dict):
+            raise ValueError(f"Leitura {position} deve ser um objeto JSON")
+        cow_id = reading.get('cowId') or reading.get('cow_id') or reading.get('cow')
+        if cow_id in (None, ''):
+            raise ValueError(f"Leitura {position} sem cowId")
+        cow_ids.append(str(cow_id))
+        timestamps.append(_parse_timestamp(position, reading.get('timestamp')))
+        for column, metric in enumerate(metrics):
+            value = reading.get(metric)
+            if value not in (None, ''):
+                try:
+                    values[position, column] = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Leitura {position}: {metric} deve ser numérico") from None
+    return cow_ids, values, timestamps
+
+
+def carregar_estado() -> HerdState:
+    if ANOMALY_STATE_PATH and os.path.exists(ANOMALY_STATE_PATH):
+        return HerdState.load(ANOMALY_STATE_PATH)
+    return HerdState()
+
+
+herd = carregar_estado()
+_last_save = time.monotonic()
+
+
+def salvar_periodicamente() -> None:
+    """
+    Grava o estado em ANOMALY_STATE_PATH no máximo a cada ANOMALY_SAVE_SECONDS
+    (sem o arquivo, um reinício recomeça o aquecimento das linhas de base).
+    """
+
+    global _last_save
+    if not ANOMALY_STATE_PATH or time.monotonic() - _last_save < ANOMALY_SAVE_SECONDS:
+        return
+    _last_save = time.monotonic()
+    tmp_path = f"{ANOMALY_STATE_PATH}.tmp.npz"
+    herd.save(tmp_path)
+    os.replace(tmp_path, ANOMALY_STATE_PATH)
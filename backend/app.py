@@ -1,19 +1,42 @@
+import math
 import os
+import re
+import shutil
 import joblib
 import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from decimal import Decimal
 
-from db import AnalysisRecord, get_session, init_db
+import admission
+import anomaly
+import bulk
+import events
+import image_store
+import profiling
+import rollups
+import search
+import sweep
+import sync
+import training_jobs
+from db import DEFAULT_FARM_ID, FEATURE_COLUMNS, AnalysisRecord, HealthAlert, get_session, gravar_tombstones, init_db
+from early_exit import EarlyExitForest
+from explain import ForestExplainer
 
 app = Flask(__name__)
+app.request_class = image_store.StreamingUploadRequest
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('UPLOAD_MAX_MB', '20')) * 1024 * 1024
 CORS(app)
 
-MODEL_PATH = os.path.join('models', 'pregnancy_pipeline.joblib')
+MODEL_PATH = os.path.join(training_jobs.MODELS_DIR, 'pregnancy_pipeline.joblib')
+IMAGE_CACHE_SECONDS = 60 * 60 * 24 * 365
+FARM_ID_RE = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+READINGS_MAX_BATCH = int(os.getenv('READINGS_MAX_BATCH', '50000'))
 
 init_db()
+search.init_index()
 
 
 def log_status(stage: str, message: str, icon: str = "🔹") -> None:
@@ -55,50 +78,69 @@ def _to_serializable(value):
     return value
 
 
+def _payload_completo(record: AnalysisRecord) -> dict:
+    """Payload como o app enviou: os extras do JSON mais as features das colunas."""
+    payload = _to_serializable(record.payload) if isinstance(record.payload, dict) else {}
+    for feature in FEATURE_COLUMNS:
+        value = getattr(record, feature)
+        if value is not None:
+            payload[feature] = value
+    return payload
+
+
 def serialize_analysis(record: AnalysisRecord) -> dict:
-    return {
+    serialized = {
         'id': record.id,
+        'farm_id': record.farm_id,
         'cow_id': record.cow_id,
         'prediction': int(record.prediction) if record.prediction is not None else None,
         'prediction_label': record.prediction_label,
         'probability': float(record.probability) if record.probability is not None else None,
-        'payload': _to_serializable(record.payload) if record.payload else {},
+        'payload': _payload_completo(record),
         'status': record.status,
         'notes': record.notes,
         'created_at': record.created_at.isoformat() if record.created_at else None,
         'updated_at': record.updated_at.isoformat() if record.updated_at else None,
     }
+    image_id = serialized['payload'].get('imageId') if isinstance(serialized['payload'], dict) else None
+    if isinstance(image_id, str) and image_store.valid_image_id(image_id):
+        serialized['image'] = image_store.image_urls(image_id)
+    return serialized
 
 
-def persist_analysis(input_payload: dict, result_payload: dict, status="completed", notes=None):
-    session = get_session()
+def build_analysis_record(input_payload: dict, result_payload: dict, status="completed", notes=None):
     cow_identifier = (
         input_payload.get('cowId')
         or input_payload.get('cow_id')
         or input_payload.get('cow')
         or "SEM_ID"
     )
+    sanitized = sanitize_payload(input_payload)
+    if isinstance(sanitized, dict):
+        image_path = sanitized.get('imagePath')
+        image_base64 = sanitized.get('imageBase64')
+        if image_path:
+            log_status("DB", f"ImagePath preservado: {image_path}", "📸")
+        if image_base64:
+            base64_size = len(image_base64) if isinstance(image_base64, str) else 0
+            log_status("DB", f"ImageBase64 preservado: {base64_size} caracteres", "📸")
+    return AnalysisRecord(
+        cow_id=str(cow_identifier),
+        prediction=int(result_payload.get('prediction', 0)),
+        prediction_label=result_payload.get('prenhez', 'N/A'),
+        probability=float(result_payload.get('confidence', 0.0)),
+        payload=sanitized,
+        status=status,
+        notes=notes,
+    )
+
+
+def persist_analysis(input_payload: dict, result_payload: dict, status="completed", notes=None):
+    session = get_session(g.farm_id)
 
     try:
         log_status("DB", "Conectando para salvar análise...", "🔄")
-        sanitized = sanitize_payload(input_payload)
-        if isinstance(sanitized, dict):
-            image_path = sanitized.get('imagePath')
-            image_base64 = sanitized.get('imageBase64')
-            if image_path:
-                log_status("DB", f"ImagePath preservado: {image_path}", "📸")
-            if image_base64:
-                base64_size = len(image_base64) if isinstance(image_base64, str) else 0
-                log_status("DB", f"ImageBase64 preservado: {base64_size} caracteres", "📸")
-        record = AnalysisRecord(
-            cow_id=str(cow_identifier),
-            prediction=int(result_payload.get('prediction', 0)),
-            prediction_label=result_payload.get('prenhez', 'N/A'),
-            probability=float(result_payload.get('confidence', 0.0)),
-            payload=sanitized,
-            status=status,
-            notes=notes,
-        )
+        record = build_analysis_record(input_payload, result_payload, status=status, notes=notes)
         session.add(record)
         session.commit()
         session.refresh(record)
@@ -120,9 +162,9 @@ def persist_analysis(input_payload: dict, result_payload: dict, status="complete
         session.close()
 
 
-def carregar_modelo():
+def carregar_modelo(path=MODEL_PATH):
     try:
-        model_bundle = joblib.load(MODEL_PATH)
+        model_bundle = joblib.load(path)
         pipeline = model_bundle["pipeline"]
         features = model_bundle["features"]
         metadata = model_bundle.get("metadata", {})
@@ -130,14 +172,70 @@ def carregar_modelo():
         print(f"   - Features: {features}")
         print(f"   - Tipo: {metadata.get('model_type', 'N/A')}")
         print(f"   - Número de features: {len(features)}")
-        return pipeline, features, metadata
     except Exception as e:
         print(f"❌ Erro ao carregar modelo: {str(e)}")
-        return None, [], {}
+        return None, [], {}, None, None
+
+    try:
+        explainer = ForestExplainer(pipeline, features)
+        print(f"   - Explicações: {explainer.n_trees} árvores pré-computadas")
+    except Exception as e:
+        print(f"⚠️ Explicações indisponíveis para este modelo: {e}")
+        explainer = None
+
+    try:
+        early_exit = EarlyExitForest(pipeline, features)
+        print(f"   - Parada antecipada: {early_exit.n_trees} árvores, verificação a partir da {early_exit.first_check}ª")
+    except Exception as e:
+        print(f"⚠️ Parada antecipada indisponível para este modelo: {e}")
+        early_exit = None
+    return pipeline, features, metadata, explainer, early_exit
 
 
-pipeline, model_features, model_metadata = carregar_modelo()
+pipeline, model_features, model_metadata, model_explainer, model_early_exit = carregar_modelo()
 modelo_carregado = pipeline is not None
+training_jobs.marcar_interrompidos()
+
+
+def _flag(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'sim', 'yes')
+
+
+@app.before_request
+def resolver_fazenda():
+    farm_id = request.headers.get('X-Farm-Id') or request.args.get('farm_id') or DEFAULT_FARM_ID
+    if not FARM_ID_RE.fullmatch(farm_id):
+        return jsonify({'error': 'farm_id inválido'}), 400
+    g.farm_id = farm_id
+
+
+@app.before_request
+def iniciar_profiling():
+    profiling.antes_da_requisicao(request, g)
+
+
+@app.after_request
+def finalizar_profiling(response):
+    profiling.depois_da_requisicao(request, response, g)
+    return response
+
+
+@app.errorhandler(admission.Overloaded)
+def recusar_sobrecarga(exc):
+    log_status("ADMISSION", f"{exc.route}: requisição recusada ({exc.reason})", "🚦")
+    response = jsonify({'error': 'Servidor sobrecarregado, tente novamente', 'reason': exc.reason})
+    response.status_code = exc.status
+    response.headers['Retry-After'] = str(exc.retry_after)
+    return response
+
+
+@app.teardown_request
+def descartar_uploads_pendentes(exc):
+    image_store.descartar_temporarios(request)
+    # Requisição que terminou em exceção não passa pelo after_request
+    profiling.depois_da_requisicao(request, None, g)
 
 
 @app.route('/health', methods=['GET'])
@@ -150,7 +248,123 @@ def health_check():
     })
 
 
+def _exigir_admin():
+    if not profiling.ADMIN_TOKEN:
+        return jsonify({'error': 'Não encontrado'}), 404
+    if not profiling.autorizado(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Acesso negado'}), 403
+    return None
+
+
+@app.route('/admin/profile', methods=['POST'])
+def admin_start_profile():
+    denied = _exigir_admin()
+    if denied:
+        return denied
+    options = request.get_json(silent=True) or {}
+    try:
+        session = profiling.iniciar(
+            mode=options.get('mode', 'deterministic'),
+            requests=options.get('requests', 10),
+            sample_rate=options.get('sample_rate', 1.0),
+            route=options.get('route'),
+            interval_ms=options.get('interval_ms', 1.0),
+        )
+    except (TypeError, ValueError) as exc:
+        return jsonify({'error': str(exc)}), 400
+    log_status("PROFILE", f"Sessão {session.id} iniciada ({session.mode}, {session.target} requisições)", "🔬")
+    return jsonify(session.relatorio(include_requests=False)), 201
+
+
+@app.route('/admin/profile/<session_id>', methods=['GET', 'DELETE'])
+def admin_profile(session_id: str):
+    denied = _exigir_admin()
+    if denied:
+        return denied
+    if request.method == 'DELETE':
+        session = profiling.parar(session_id)
+    else:
+        session = profiling.obter(session_id)
+    if session is None:
+        return jsonify({'error': 'Sessão de profiling não encontrada'}), 404
+
+    if request.args.get('format') == 'collapsed':
+        return app.response_class(session.relatorio()['collapsed'], mimetype='text/plain')
+    return jsonify(session.relatorio(
+        top=request.args.get('top', 30, type=int),
+        include_requests=_flag(request.args.get('requests', 'true')),
+    ))
+
+
+@app.route('/models/train', methods=['POST'])
+def start_training():
+    denied = _exigir_admin()
+    if denied:
+        return denied
+    try:
+        options = training_jobs.validar_opcoes(request.get_json(silent=True))
+        job = training_jobs.enfileirar(options)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    except OverflowError as exc:
+        return jsonify({'error': str(exc)}), 429
+    log_status("TRAIN", f"Job {job['id']} na fila ({options['mode']}, {options['cores']} núcleo(s))", "🏋️")
+    response = jsonify(job)
+    response.status_code = 202
+    response.headers['Location'] = f"/models/train/{job['id']}"
+    return response
+
+
+@app.route('/models/train/<job_id>', methods=['GET'])
+def training_status(job_id: str):
+    denied = _exigir_admin()
+    if denied:
+        return denied
+    job = training_jobs.ler(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job)
+
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    denied = _exigir_admin()
+    if denied:
+        return denied
+    active = model_metadata.get('version')
+    return jsonify({'active': active, 'versions': training_jobs.listar_versoes(active)})
+
+
+@app.route('/models/<version>/activate', methods=['POST'])
+def activate_model(version: str):
+    global pipeline, model_features, model_metadata, model_explainer, model_early_exit, modelo_carregado
+    denied = _exigir_admin()
+    if denied:
+        return denied
+    path = training_jobs.caminho_versao(version)
+    if not training_jobs.VERSION_RE.fullmatch(version) or not os.path.isfile(path):
+        return jsonify({'error': 'Versão não encontrada'}), 404
+
+    # Carrega antes de trocar o arquivo: uma versão quebrada não derruba o modelo servido
+    loaded = carregar_modelo(path)
+    if loaded[0] is None:
+        return jsonify({'error': 'Bundle inválido'}), 422
+    tmp_path = f"{MODEL_PATH}.tmp"
+    shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
+    pipeline, model_features, model_metadata, model_explainer, model_early_exit = loaded
+    modelo_carregado = True
+    log_status("TRAIN", f"Versão {version} ativada", "🚀")
+    return jsonify({'active': version, 'model_metadata': model_metadata})
+
+
+@app.route('/metrics/admission', methods=['GET'])
+def admission_metrics():
+    return jsonify(admission.metrics())
+
+
 @app.route('/predict', methods=['GET', 'POST', 'DELETE'])
+@admission.limited('predict')
 def predict():
     if request.method == 'GET':
         return list_analyses()
@@ -165,6 +379,23 @@ def predict():
         if not data:
             return jsonify({'error': 'Dados JSON necessários'}), 400
 
+        explain = _flag(request.args.get('explain', data.pop('explain', False)))
+        if explain and model_explainer is None:
+            return jsonify({'error': 'Explicações indisponíveis para o modelo carregado'}), 400
+
+        # Orçamento de latência implica o modo de parada antecipada
+        budget_ms = request.args.get('latency_budget_ms', data.pop('latency_budget_ms', None))
+        early_exit = _flag(request.args.get('early_exit', data.pop('early_exit', False))) or budget_ms is not None
+        if budget_ms is not None:
+            try:
+                budget_ms = float(budget_ms)
+            except (TypeError, ValueError):
+                budget_ms = -1.0
+            if not budget_ms > 0:
+                return jsonify({'error': 'latency_budget_ms deve ser um número positivo'}), 400
+        if early_exit and model_early_exit is None:
+            return jsonify({'error': 'Parada antecipada indisponível para o modelo carregado'}), 400
+
         log_status("PREDICT", f"Payload recebido: {data}", "📥")
 
         missing_features = [f for f in model_features if f not in data]
@@ -180,13 +411,17 @@ def predict():
         df_input = pd.DataFrame(input_data)
 
         log_status("PREDICT", "Rodando pipeline do modelo", "⚙️")
-        prediction = int(pipeline.predict(df_input)[0])
-
-        try:
-            proba = pipeline.predict_proba(df_input)[0][1]
-        except Exception as e:
-            print(f"⚠️ Não foi possível calcular confiabilidade: {e}")
-            proba = 0.5
+        scoring = None
+        if early_exit:
+            scoring = model_early_exit.score(df_input, budget_ms)[0]
+            prediction = int(scoring.pop('prediction'))
+            proba = scoring.pop('probability')
+        else:
+            # Uma passada só: o rótulo sai das mesmas probabilidades (argmax, como no predict)
+            proba_row = pipeline.predict_proba(df_input)[0]
+            classes = list(pipeline.classes_)
+            prediction = int(classes[int(proba_row.argmax())])
+            proba = proba_row[classes.index(1)] if 1 in classes else proba_row[-1]
 
         resultado = "SIM" if prediction == 1 else "NÃO"
 
@@ -197,6 +432,8 @@ def predict():
             'confidence_percent': round(float(proba) * 100, 2),
             'status': 'success'
         }
+        if scoring is not None:
+            response['scoring'] = {'mode': 'early_exit', 'latency_budget_ms': budget_ms, **scoring}
 
         log_status(
             "PREDICT",
@@ -204,6 +441,9 @@ def predict():
             "📊",
         )
 
+        if explain:
+            response['explanation'] = model_explainer.explain(df_input)[0]
+
         try:
             record = persist_analysis(data, response)
             response['analysis_id'] = record.id
@@ -219,6 +459,82 @@ def predict():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/predict/sweep', methods=['POST'])
+@admission.limited('predict')
+def predict_sweep():
+    if not modelo_carregado:
+        return jsonify({'error': 'Modelo não carregado'}), 500
+
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Dados JSON necessários'}), 400
+    try:
+        result = sweep.varrer(pipeline, model_early_exit, model_features, body)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    log_status(
+        "SWEEP",
+        f"{result['points']} pontos em {result['elapsed_ms']} ms "
+        f"({', '.join(axis['feature'] for axis in result['axes'])})",
+        "📈",
+    )
+    return jsonify(result)
+
+
+@app.route('/upload-image', methods=['POST'])
+def upload_image():
+    storage = request.files.get('image')
+    if storage is None or not storage.filename:
+        return jsonify({'error': "Arquivo 'image' necessário (multipart/form-data)"}), 400
+
+    try:
+        info = image_store.salvar_upload(storage)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    except OSError as exc:
+        log_status("UPLOAD", f"Erro ao gravar imagem: {exc}", "❌")
+        return jsonify({'error': 'Erro ao gravar imagem'}), 500
+
+    log_status("UPLOAD", f"Imagem {info['image_id']} recebida ({info['size_bytes']} bytes)", "📸")
+    return jsonify({
+        **info,
+        'imageId': info['image_id'],
+        'status': 'processing',
+        **image_store.image_urls(info['image_id']),
+    })
+
+
+@app.route('/images/<image_id>', methods=['GET'])
+def image_info(image_id: str):
+    if not image_store.valid_image_id(image_id):
+        return jsonify({'error': 'Imagem não encontrada'}), 404
+    status = image_store.image_status(image_id)
+    if status == 'missing':
+        return jsonify({'error': 'Imagem não encontrada'}), 404
+    return jsonify({'image_id': image_id, 'status': status, **image_store.image_urls(image_id)})
+
+
+@app.route('/images/<image_id>/<variant>', methods=['GET'])
+def serve_image(image_id: str, variant: str):
+    if not image_store.valid_image_id(image_id):
+        return jsonify({'error': 'Imagem não encontrada'}), 404
+
+    path = image_store.variant_path(image_id, variant)
+    if path is None:
+        if variant in image_store.VARIANTS and image_store.image_status(image_id) == 'processing':
+            response = jsonify({'image_id': image_id, 'status': 'processing'})
+            response.status_code = 202
+            response.headers['Retry-After'] = '1'
+            return response
+        return jsonify({'error': 'Imagem não encontrada'}), 404
+
+    # conditional=True habilita Range, ETag e If-Modified-Since; os ids nunca são reaproveitados
+    response = send_file(path, conditional=True, max_age=IMAGE_CACHE_SECONDS)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 @app.route('/features', methods=['GET'])
 def get_features():
     return jsonify({
@@ -228,8 +544,9 @@ def get_features():
 
 
 @app.route('/analises', methods=['GET'])
+@admission.limited('analises')
 def list_analyses():
-    session = get_session()
+    session = get_session(g.farm_id)
     cow_id = request.args.get('cow_id')
     status = request.args.get('status')
     limit = min(request.args.get('limit', type=int) or 500, 500)
@@ -307,9 +624,30 @@ def create_analysis():
         return jsonify({'error': 'Erro ao salvar análise manual'}), 500
 
 
+@app.route('/analises/search', methods=['GET'])
+@admission.limited('search')
+def search_analyses():
+    session = get_session(g.farm_id)
+    try:
+        records, has_more = search.buscar(session, request.args, farm_id=g.farm_id)
+        log_status("SEARCH", f"{len(records)} análises encontradas ({dict(request.args)})", "🔎")
+        return jsonify({
+            'data': [serialize_analysis(record) for record in records],
+            'count': len(records),
+            'has_more': has_more,
+        })
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    except SQLAlchemyError as exc:
+        log_status("SEARCH", f"Erro na busca: {exc}", "❌")
+        return jsonify({'error': 'Erro na busca'}), 500
+    finally:
+        session.close()
+
+
 @app.route('/analises/<int:analysis_id>', methods=['GET'])
 def retrieve_analysis(analysis_id: int):
-    session = get_session()
+    session = get_session(g.farm_id)
     try:
         record = session.get(AnalysisRecord, analysis_id)
         if not record:
@@ -320,6 +658,38 @@ def retrieve_analysis(analysis_id: int):
         session.close()
 
 
+@app.route('/analises/<int:analysis_id>/explain', methods=['GET'])
+def explain_analysis(analysis_id: int):
+    if model_explainer is None:
+        return jsonify({'error': 'Explicações indisponíveis para o modelo carregado'}), 400
+
+    session = get_session(g.farm_id)
+    try:
+        record = session.get(AnalysisRecord, analysis_id)
+        if not record:
+            return jsonify({'error': 'Análise não encontrada'}), 404
+        # Features nas colunas tipadas; coluna NULL conta como feature faltando
+        payload = _payload_completo(record)
+        missing_features = [f for f in model_features if f not in payload]
+        if missing_features:
+            return jsonify({
+                'error': 'Features faltando na análise salva',
+                'missing': missing_features,
+            }), 400
+
+        df_input = pd.DataFrame({feature: [float(payload[feature])] for feature in model_features})
+        explanation = model_explainer.explain(df_input)[0]
+        log_status("EXPLAIN", f"Análise #{analysis_id} explicada", "🧠")
+        return jsonify({
+            'analysis_id': record.id,
+            'prediction_label': record.prediction_label,
+            'stored_probability': float(record.probability) if record.probability is not None else None,
+            'explanation': explanation,
+        })
+    finally:
+        session.close()
+
+
 @app.route('/predict/<int:analysis_id>', methods=['GET', 'PUT', 'DELETE'])
 def legacy_predict_detail(analysis_id: int):
     if request.method == 'GET':
@@ -334,7 +704,7 @@ def legacy_predict_detail(analysis_id: int):
 @app.route('/analises/<int:analysis_id>', methods=['PUT'])
 def update_analysis(analysis_id: int):
     payload = request.get_json() or {}
-    session = get_session()
+    session = get_session(g.farm_id)
     try:
         record = session.get(AnalysisRecord, analysis_id)
         if not record:
@@ -363,12 +733,15 @@ def update_analysis(analysis_id: int):
 
 @app.route('/analises/<int:analysis_id>', methods=['DELETE'])
 def delete_analysis(analysis_id: int):
-    session = get_session()
+    session = get_session(g.farm_id)
     try:
         record = session.get(AnalysisRecord, analysis_id)
         if not record:
             return jsonify({'error': 'Análise não encontrada'}), 404
         session.delete(record)
+        gravar_tombstones(session.connection(), [
+            {'analysis_id': record.id, 'cow_id': record.cow_id, 'farm_id': record.farm_id},
+        ])
         session.commit()
         log_status("CRUD", f"Análise #{analysis_id} removida", "🗑️")
         return jsonify({'status': 'deleted', 'analysis_id': analysis_id})
@@ -382,11 +755,19 @@ def delete_analysis(analysis_id: int):
 
 @app.route('/analises', methods=['DELETE'])
 def delete_all_analyses():
-    session = get_session()
+    session = get_session(g.farm_id)
     try:
+        gravar_tombstones(
+            session.connection(),
+            select(AnalysisRecord.id, AnalysisRecord.cow_id, AnalysisRecord.farm_id)
+            .where(AnalysisRecord.farm_id == g.farm_id),
+        )
         deleted = session.query(AnalysisRecord).delete()
+        rollups.limpar_fazenda(session, g.farm_id)
+        search.limpar_fazenda(session, g.farm_id)
+        events.registrar(session, [events.novo_evento('cleared', None, g.farm_id, None)])
         session.commit()
-        log_status("CRUD", f"{deleted} análises removidas em massa", "🗑️")
+        log_status("CRUD", f"{deleted} análises removidas em massa (fazenda {g.farm_id})", "🗑️")
         return jsonify({'deleted': deleted})
     except SQLAlchemyError as exc:
         session.rollback()
@@ -396,9 +777,282 @@ def delete_all_analyses():
         session.close()
 
 
+def _executar_em_massa(action: str):
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Corpo JSON inválido'}), 400
+    session = get_session(g.farm_id)
+    try:
+        ids = bulk.resolver_alvos(session, body)
+        if action == 'update':
+            changes = bulk.validar_alteracoes(body.get('changes'))
+            report, error = bulk.atualizar(session, ids, changes)
+        else:
+            report, error = bulk.remover(session, ids)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    except SQLAlchemyError as exc:
+        session.rollback()
+        log_status("BULK", f"Erro ao selecionar análises: {exc}", "❌")
+        return jsonify({'error': 'Erro ao selecionar análises'}), 500
+    finally:
+        session.close()
+
+    if error is not None:
+        log_status("BULK", f"{action} interrompido: {error}", "❌")
+        return jsonify({**report, 'error': 'Operação interrompida; veja os resultados por id'}), 500
+    log_status("BULK", f"{action} em massa: {report['summary']} ({report['chunks']} chunks)", "📦")
+    return jsonify(report)
+
+
+@app.route('/analises/bulk-update', methods=['POST'])
+@admission.limited('bulk')
+def bulk_update_analyses():
+    return _executar_em_massa('update')
+
+
+@app.route('/analises/bulk-delete', methods=['POST'])
+@admission.limited('bulk')
+def bulk_delete_analyses():
+    return _executar_em_massa('delete')
+
+
+@app.route('/analises/stream', methods=['GET'])
+def stream_analyses():
+    """
+    Server-Sent Events com as análises criadas, alteradas e removidas da
+    fazenda (opcionalmente de uma vaca), retomando do Last-Event-ID.
+    """
+
+    if not events.hub.assinar():
+        return jsonify({'error': 'Limite de assinantes atingido; use /analises/changes'}), 503
+    # O gerador roda depois da view: fazenda, vaca e cursor são lidos agora
+    farm_id = g.farm_id
+    cow_id = request.args.get('cow_id') or None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    response = Response(
+        stream_with_context(events.stream(farm_id, cow_id, last_event_id)),
+        mimetype='text/event-stream',
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(events.hub.cancelar)
+    log_status("EVENTS", f"Assinante conectado (fazenda {farm_id}, vaca {cow_id or 'todas'})", "📡")
+    return response
+
+
+@app.route('/analises/changes', methods=['GET'])
+def long_poll_analyses():
+    """Long-poll com os mesmos eventos do stream, para clientes sem SSE."""
+
+    timeout = request.args.get('timeout', events.LONG_POLL_MAX_SECONDS, type=float)
+    if not math.isfinite(timeout):
+        return jsonify({'error': 'timeout deve ser um número finito'}), 400
+    return jsonify(events.long_poll(
+        g.farm_id,
+        request.args.get('cow_id') or None,
+        request.args.get('after') or request.headers.get('Last-Event-ID'),
+        timeout,
+    ))
+
+
+@app.route('/metrics/events', methods=['GET'])
+def events_metrics():
+    return jsonify(events.hub.snapshot())
+
+
+def _record_from_sync_item(item: dict) -> AnalysisRecord:
+    required_fields = ['prediction', 'prediction_label', 'probability', 'payload']
+    missing = [field for field in required_fields if field not in item]
+    if missing:
+        raise ValueError(f'Campos faltando: {missing}')
+    if not isinstance(item['payload'], dict):
+        raise ValueError('payload deve ser um objeto JSON')
+    result_payload = {
+        'prediction': item['prediction'],
+        'prenhez': item['prediction_label'],
+        'confidence': item['probability'],
+    }
+    return build_analysis_record(
+        item['payload'],
+        result_payload,
+        status=item.get('status', 'manual'),
+        notes=item.get('notes'),
+    )
+
+
+@app.route('/sync', methods=['GET', 'POST'])
+@admission.limited('sync')
+def sync_analyses():
+    body = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+    token = body.get('since') or request.args.get('since')
+    items = body.get('analyses') or []
+    limit = min(request.args.get('limit', type=int) or sync.SYNC_PAGE_LIMIT, sync.SYNC_PAGE_LIMIT)
+
+    if not isinstance(items, list):
+        return jsonify({'error': "'analyses' deve ser uma lista"}), 400
+    if len(items) > sync.SYNC_PUSH_LIMIT:
+        return jsonify({'error': f'Máximo de {sync.SYNC_PUSH_LIMIT} análises por push'}), 400
+    try:
+        state = sync.decode_token(token)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    session = get_session(g.farm_id)
+    try:
+        pushed = sync.push_analyses(session, items, _record_from_sync_item) if items else []
+        changes, tombstones, new_state, has_more, server_time = sync.pull_changes(session, state, limit)
+        created = sum(1 for outcome in pushed if outcome['status'] == 'created')
+        log_status(
+            "SYNC",
+            f"push: {created}/{len(pushed)} criadas | pull: {len(changes)} alteradas, {len(tombstones)} removidas",
+            "🔄",
+        )
+        return jsonify({
+            'pushed': pushed,
+            'changes': [serialize_analysis(record) for record in changes],
+            'deleted': [
+                {
+                    'id': tombstone.analysis_id,
+                    'cow_id': tombstone.cow_id,
+                    'deleted_at': tombstone.deleted_at.isoformat(),
+                }
+                for tombstone in tombstones
+            ],
+            'next_token': sync.encode_token(new_state),
+            'has_more': has_more,
+            'server_time': server_time.isoformat(),
+        })
+    except sync.ResyncRequired:
+        return jsonify({'error': 'Token expirado, sincronização completa necessária', 'resync': True}), 410
+    except SQLAlchemyError as exc:
+        session.rollback()
+        log_status("SYNC", f"Erro na sincronização: {exc}", "❌")
+        return jsonify({'error': 'Erro na sincronização'}), 500
+    finally:
+        session.close()
+
+
+@app.route('/dashboard', methods=['GET'])
+def herd_dashboard():
+    session = get_session(g.farm_id)
+    try:
+        summary = rollups.dashboard(
+            session,
+            bucket=request.args.get('bucket', 'day'),
+            start=request.args.get('from'),
+            end=request.args.get('to'),
+        )
+        log_status("DASHBOARD", f"{len(summary['series'])} janelas ({summary['bucket']}) retornadas", "📈")
+        return jsonify(summary)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    except SQLAlchemyError as exc:
+        log_status("DASHBOARD", f"Erro ao montar dashboard: {exc}", "❌")
+        return jsonify({'error': 'Erro ao montar dashboard'}), 500
+    finally:
+        session.close()
+
+
+def serialize_alert(alert: HealthAlert) -> dict:
+    return {
+        'id': alert.id,
+        'farm_id': alert.farm_id,
+        'cow_id': alert.cow_id,
+        'metric': alert.metric,
+        'direction': alert.direction,
+        'value': alert.value,
+        'baseline': alert.baseline,
+        'baseline_std': alert.baseline_std,
+        'z_score': alert.z_score,
+        'reading_at': alert.reading_at.isoformat() if alert.reading_at else None,
+        'created_at': alert.created_at.isoformat() if alert.created_at else None,
+    }
+
+
+@app.route('/readings', methods=['POST'])
+def ingest_readings():
+    body = request.get_json(silent=True)
+    readings = body.get('readings') if isinstance(body, dict) else body
+    if not isinstance(readings, list) or not readings:
+        return jsonify({'error': "Envie uma lista de leituras (ou {'readings': [...]})"}), 400
+    if len(readings) > READINGS_MAX_BATCH:
+        return jsonify({'error': f'Máximo de {READINGS_MAX_BATCH} leituras por lote'}), 400
+
+    try:
+        cow_ids, values, reading_times = anomaly.parse_readings(readings)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    desvios = anomaly.herd.update([(g.farm_id, cow_id) for cow_id in cow_ids], values)
+    anomaly.salvar_periodicamente()
+    if not desvios:
+        return jsonify({'processed': len(readings), 'alerts': []})
+
+    session = get_session(g.farm_id)
+    try:
+        alerts = []
+        for position, metric, z_score, baseline, baseline_std in desvios:
+            column = anomaly.METRICS.index(metric)
+            alerts.append(HealthAlert(
+                cow_id=cow_ids[position],
+                metric=metric,
+                direction='high' if z_score > 0 else 'low',
+                value=float(values[position, column]),
+                baseline=baseline,
+                baseline_std=baseline_std,
+                z_score=z_score,
+                reading_at=reading_times[position],
+            ))
+        session.add_all(alerts)
+        session.commit()
+        log_status("ANOMALY", f"{len(readings)} leituras, {len(alerts)} alertas novos", "🚨")
+        return jsonify({'processed': len(readings), 'alerts': [serialize_alert(alert) for alert in alerts]})
+    except SQLAlchemyError as exc:
+        session.rollback()
+        log_status("ANOMALY", f"Erro ao salvar alertas: {exc}", "❌")
+        return jsonify({'error': 'Erro ao salvar alertas'}), 500
+    finally:
+        session.close()
+
+
+@app.route('/alerts', methods=['GET'])
+def list_alerts():
+    session = get_session(g.farm_id)
+    limit = min(request.args.get('limit', type=int) or 100, 500)
+    before_id = request.args.get('before_id', type=int)
+    try:
+        query = session.query(HealthAlert)
+        if request.args.get('cow_id'):
+            query = query.filter(HealthAlert.cow_id == request.args['cow_id'])
+        if request.args.get('metric'):
+            query = query.filter(HealthAlert.metric == request.args['metric'])
+        if before_id:
+            query = query.filter(HealthAlert.id < before_id)
+        alerts = query.order_by(HealthAlert.id.desc()).limit(limit + 1).all()
+        return jsonify({
+            'data': [serialize_alert(alert) for alert in alerts[:limit]],
+            'has_more': len(alerts) > limit,
+        })
+    except SQLAlchemyError as exc:
+        log_status("ANOMALY", f"Erro ao listar alertas: {exc}", "❌")
+        return jsonify({'error': 'Erro ao listar alertas'}), 500
+    finally:
+        session.close()
+
+
+@app.route('/cows/<cow_id>/behavior', methods=['GET'])
+def cow_behavior(cow_id: str):
+    state = anomaly.herd.cow_state((g.farm_id, str(cow_id)))
+    if state is None:
+        return jsonify({'error': 'Sem leituras para esta vaca'}), 404
+    return jsonify({'cow_id': cow_id, 'metrics': state})
+
+
 @app.route('/cows/<cow_id>/history', methods=['GET'])
+@admission.limited('history')
 def cow_history(cow_id: str):
-    session = get_session()
+    session = get_session(g.farm_id)
     limit = min(request.args.get('limit', type=int) or 500, 500)
     offset = request.args.get('offset', type=int) or 0
     
@@ -0,0 +1,184 @@
+# backend/benchmarks/anomaly_benchmark.py
+"""
+Custo do detector de anomalias por leitura.
+
+Monta um rebanho de `--cows` vacas já aquecido e mede o tempo por leitura
+do HerdState.update (passo vetorizado) para lotes de tamanhos diferentes,
+contra a mesma atualização EWMA feita vaca a vaca em Python puro. Com
+`--endpoint`, mede também o POST /readings de ponta a ponta (parse do
+JSON, atualização e gravação dos alertas).
+
+Uso (a partir de backend/):
+    python -m benchmarks.anomaly_benchmark --cows 50000
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import anomaly
+
+# Média e desvio típicos de cada métrica (mesma ordem de anomaly.METRICS)
+BASE = np.array([300.0, 450.0, 12.0, 800.0])
+SPREAD = np.array([30.0, 40.0, 1.5, 80.0])
+
+
+def gerar_leituras(rng, n_cows: int, size: int, spike_rate: float = 0.001):
+    cows = rng.integers(0, n_cows, size)
+    values = BASE + SPREAD * rng.standard_normal((size, len(BASE)))
+    spikes = rng.random(size) < spike_rate
+    values[spikes] += 8 * SPREAD
+    return cows, values
+
+
+def rebanho_aquecido(rng, n_cows: int, rounds: int) -> anomaly.HerdState:
+    state = anomaly.HerdState()
+    keys = [('bench', str(cow)) for cow in range(n_cows)]
+    for _ in range(rounds):
+        state.update(keys, BASE + SPREAD * rng.standard_normal((n_cows, len(BASE))))
+    return state
+
+
+class LacoPython:
+    """A mesma regra do HerdState, uma vaca e uma métrica por vez."""
+
+    def __init__(self, state: anomaly.HerdState):
+        self.alpha, self.threshold, self.warmup = state.alpha, state.threshold, state.warmup
+        size = len(state)
+        self.state = {
+            key: [
+                [float(state.mean[row, c]), float(state.var[row, c]), int(state.count[row, c]), False]
+                for c in range(len(state.metrics))
+            ]
+            for row, key in enumerate(state.keys[:size])
+        }
+
+    def update(self, keys, values):
+        events = []
+        for position, key in enumerate(keys):
+            for column, cell in enumerate(self.state[key]):
+                x = values[position][column]
+                mean, var, count, alerting = cell
+                std = max(math.sqrt(var), anomaly.MIN_STD_FRACTION * abs(mean) + 1e-9)
+                z = (x - mean) / std
+                flagged = count >= self.warmup and abs(z) > self.threshold
+                if flagged and not alerting:
+                    events.append((position, column, z))
+                diff = x - mean
+                cell[0] = mean + self.alpha * diff
+                cell[1] = (1 - self.alpha) * (var + self.alpha * diff * diff)
+                cell[2] = count + 1
+                cell[3] = flagged
+        return events
+
+
+def ns_por_leitura(update, keys, values, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        # Chaves recriadas a cada rodada: o hash das strings não fica em cache, como numa requisição
+        fresh = [tuple(map(str, key)) for key in keys] if isinstance(keys, list) else keys
+        start = time.perf_counter()
+        update(fresh, values)
+        best = min(best, time.perf_counter() - start)
+    return round(best / len(keys) * 1e9, 1)
+
+
+def medir_endpoint(n_cows: int, batch: int, requests: int, seed: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix='bench_anomaly_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        from app import app as flask_app
+
+        rng = np.random.default_rng(seed)
+        anomaly.herd = anomaly.HerdState()
+        client = flask_app.test_client()
+        timings, alerts = [], 0
+        for index in range(requests):
+            cows, values = gerar_leituras(rng, n_cows, batch, spike_rate=0.001 if index > 20 else 0.0)
+            body = [
+                {'cowId': str(cow), **dict(zip(anomaly.METRICS, map(float, row)))}
+                for cow, row in zip(cows, values)
+            ]
+            start = time.perf_counter()
+            response = client.post('/readings', json=body)
+            timings.append(time.perf_counter() - start)
+            alerts += len(response.get_json()['alerts'])
+    return {
+        'batch': batch,
+        'requests': requests,
+        'p50_ms': round(float(np.percentile(timings, 50)) * 1000, 2),
+        'p99_ms': round(float(np.percentile(timings, 99)) * 1000, 2),
+        'readings_per_s': round(batch * requests / sum(timings)),
+        'alerts': alerts,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Custo por leitura do detector de anomalias")
+    parser.add_argument('--cows', type=int, default=50_000)
+    parser.add_argument('--batches', default='1000,10000,50000,200000')
+    parser.add_argument('--warmup-rounds', type=int, default=12)
+    parser.add_argument('--loop-batch', type=int, default=10_000, help="Lote usado no laço Python")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--endpoint', action='store_true', help="Mede também o POST /readings")
+    parser.add_argument('--endpoint-batch', type=int, default=5000)
+    parser.add_argument('--endpoint-requests', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+
+    start = time.perf_counter()
+    state = rebanho_aquecido(rng, args.cows, args.warmup_rounds)
+    print(f"🐄 {args.cows} vacas aquecidas em {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    loop = LacoPython(state)
+
+    vectorized, step_only = {}, {}
+    for size in (int(value) for value in args.batches.split(',')):
+        cows, values = gerar_leituras(rng, args.cows, size)
+        keys = [('bench', str(cow)) for cow in cows]
+        vectorized[size] = ns_por_leitura(state.update, keys, values, args.repeat)
+        # Sem a busca das chaves (cow_id -> linha), que é Python por leitura
+        step_only[size] = ns_por_leitura(state.update_rows, state.rows_for(keys), values, args.repeat)
+
+    cows, values = gerar_leituras(rng, args.cows, args.loop_batch)
+    keys = [('bench', str(cow)) for cow in cows]
+    loop_ns = ns_por_leitura(loop.update, keys, values.tolist(), max(1, args.repeat // 2))
+
+    report = {
+        'cows': args.cows,
+        'metrics': len(anomaly.METRICS),
+        'vectorized_ns_per_reading': vectorized,
+        'vectorized_step_only_ns_per_reading': step_only,
+        'python_loop_ns_per_reading': {args.loop_batch: loop_ns},
+        'speedup_at_loop_batch': round(loop_ns / vectorized[args.loop_batch], 1)
+        if args.loop_batch in vectorized else None,
+    }
+    if args.endpoint:
+        report['endpoint'] = medir_endpoint(args.cows, args.endpoint_batch, args.endpoint_requests, args.seed)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,339 @@
+# backend/benchmarks/api_benchmark.py
+"""
+Benchmark reprodutível de carga e latência da API.
+
+Roda totalmente offline: aponta o db.py para um SQLite temporário (via
+DATABASE_URL), popula o histórico com análises sintéticas no schema de
+`model_features` e dispara as rotas pelo test client do Flask em níveis
+fixos de concorrência. O resultado sai em JSON (throughput e latências
+p50/p95/p99 por cenário) e pode ser comparado com um baseline salvo.
+
+Uso (a partir de backend/):
+    python -m benchmarks.api_benchmark --output bench.json
+    python -m benchmarks.api_benchmark --baseline bench_baseline.json
+"""
+import argparse
+import base64
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Faixas cobrindo as distribuições de NÃO e SIM usadas em train_model.py
+FEATURE_RANGES = {
+    'age': (1, 5),
+    'weight': (100.0, 220.0),
+    'previous_pregnancies': (1, 4),
+    'body_condition': (20.0, 65.0),
+    'days_since_insemination': (1, 90),
+    'milk_production': (45.0, 115.0),
+    'body_temperature': (4.0, 12.0),
+}
+INTEGER_FEATURES = {'age', 'previous_pregnancies', 'days_since_insemination'}
+STATUSES = ['completed', 'manual', 'confirmed']
+IMAGE_BYTES = 48 * 1024
+
+
+def gerar_features(rng: random.Random, features) -> dict:
+    """Gera um vetor de features dentro das faixas do treino."""
+
+    values = {}
+    for feature in features:
+        low, high = FEATURE_RANGES.get(feature, (0.0, 1.0))
+        if feature in INTEGER_FEATURES:
+            values[feature] = rng.randint(int(low), int(high))
+        else:
+            values[feature] = round(rng.uniform(low, high), 3)
+    return values
+
+
+def gerar_imagem_base64(rng: random.Random, size: int = IMAGE_BYTES) -> str:
+    return base64.b64encode(rng.randbytes(size)).decode('ascii')
+
+
+def gerar_payload(rng: random.Random, features, n_cows: int, with_image: bool = False) -> dict:
+    """Monta um payload de /predict como o app Flutter envia."""
+
+    payload = gerar_features(rng, features)
+    payload['cowId'] = f"BENCH-{rng.randrange(n_cows):05d}"
+    payload['source'] = 'benchmark'
+    if with_image:
+        payload['imagePath'] = f"/storage/bench/{rng.getrandbits(32):08x}.jpg"
+        payload['imageBase64'] = gerar_imagem_base64(rng)
+    return payload
+
+
+def popular_banco(rows: int, features, n_cows: int, seed: int):
+    """Insere `rows` análises sintéticas e devolve os ids e cow_ids criados."""
+
+    from db import AnalysisRecord, get_session
+
+    rng = random.Random(seed)
+    session = get_session()
+    inicio = datetime(2025, 1, 1)
+    try:
+        batch = []
+        for index in range(rows):
+            payload = gerar_payload(rng, features, n_cows, with_image=(index % 20 == 0))
+            prediction = rng.randint(0, 1)
+            batch.append(AnalysisRecord(
+                cow_id=payload['cowId'],
+                prediction=prediction,
+                prediction_label='SIM' if prediction == 1 else 'NÃO',
+                probability=round(rng.uniform(0.5, 1.0), 4),
+                payload=payload,
+                status=rng.choice(STATUSES),
+                notes=None,
+                created_at=inicio + timedelta(minutes=index),
+            ))
+            if len(batch) >= 1000:
+                session.add_all(batch)
+                session.commit()
+                batch = []
+        if batch:
+            session.add_all(batch)
+            session.commit()
+        ids = [row[0] for row in session.query(AnalysisRecord.id).all()]
+    finally:
+        session.close()
+    cow_ids = [f"BENCH-{index:05d}" for index in range(n_cows)]
+    return ids, cow_ids
+
+
+# ======================================================
+# CENÁRIOS
+# ======================================================
+def _predict(with_image, explain=False):
+    def run(client, ctx, rng):
+        payload = gerar_payload(rng, ctx['features'], ctx['n_cows'], with_image=with_image)
+        query = {'explain': 'true'} if explain else None
+        return client.post('/predict', json=payload, query_string=query)
+    return run
+
+
+def _listar(limit, filtro=None):
+    def run(client, ctx, rng):
+        params = {'limit': limit, 'offset': rng.choice([0, 0, limit])}
+        if filtro == 'cow_id':
+            params['cow_id'] = rng.choice(ctx['cow_ids'])
+        elif filtro == 'status':
+            params['status'] = rng.choice(STATUSES)
+        return client.get('/analises', query_string=params)
+    return run
+
+
+def _detalhe(client, ctx, rng):
+    return client.get(f"/analises/{rng.choice(ctx['ids'])}")
+
+
+def _explicar(client, ctx, rng):
+    return client.get(f"/analises/{rng.choice(ctx['ids'])}/explain")
+
+
+def _historico(client, ctx, rng):
+    return client.get(f"/cows/{rng.choice(ctx['cow_ids'])}/history", query_string={'limit': 50})
+
+
+SCENARIOS = {
+    'predict': _predict(with_image=False),
+    'predict_image': _predict(with_image=True),
+    'predict_explain': _predict(with_image=False, explain=True),
+    'analises_limit10': _listar(10),
+    'analises_limit100': _listar(100),
+    'analises_limit500': _listar(500),
+    'analises_cow_id': _listar(50, filtro='cow_id'),
+    'analises_status': _listar(50, filtro='status'),
+    'analise_detalhe': _detalhe,
+    'analise_explain': _explicar,
+    'cow_history': _historico,
+}
+
+
+# ======================================================
+# EXECUÇÃO E MÉTRICAS
+# ======================================================
+def resumir(latencies, errors: int, wall: float) -> dict:
+    lat_ms = np.asarray(latencies) * 1000.0
+    return {
+        'requests': int(lat_ms.size),
+        'errors': int(errors),
+        'wall_seconds': round(wall, 4),
+        'throughput_rps': round(lat_ms.size / wall, 2) if wall > 0 else None,
+        'latency_ms': {
+            'mean': round(float(lat_ms.mean()), 3),
+            'p50': round(float(np.percentile(lat_ms, 50)), 3),
+            'p95': round(float(np.percentile(lat_ms, 95)), 3),
+            'p99': round(float(np.percentile(lat_ms, 99)), 3),
+            'max': round(float(lat_ms.max()), 3),
+        },
+    }
+
+
+def executar_cenario(flask_app, scenario, ctx, concurrency: int, n_requests: int,
+                     seed: int, warmup: int = 5) -> dict:
+    """Dispara `n_requests` divididas entre `concurrency` workers e resume as latências."""
+
+    warm_client = flask_app.test_client()
+    warm_rng = random.Random(seed - 1)
+    for _ in range(warmup):
+        scenario(warm_client, ctx, warm_rng)
+
+    quotas = [n_requests // concurrency] * concurrency
+    for index in range(n_requests % concurrency):
+        quotas[index] += 1
+
+    def worker(worker_index: int):
+        client = flask_app.test_client()
+        rng = random.Random(seed * 1000 + worker_index)
+        samples = []
+        for _ in range(quotas[worker_index]):
+            start = time.perf_counter()
+            response = scenario(client, ctx, rng)
+            samples.append((time.perf_counter() - start, response.status_code))
+        return samples
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        partials = list(executor.map(worker, range(concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    samples = [sample for partial in partials for sample in partial]
+    latencies = [elapsed for elapsed, _ in samples]
+    errors = sum(1 for _, status in samples if status >= 400)
+    return resumir(latencies, errors, wall)
+
+
+def comparar_com_baseline(results: dict, baseline: dict, tolerance: float):
+    """Lista as regressões de p95/p99 ou throughput acima da tolerância."""
+
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get('results', {}).get(key)
+        if not previous:
+            continue
+        for metric in ('p95', 'p99'):
+            base_value = previous['latency_ms'][metric]
+            value = current['latency_ms'][metric]
+            if base_value and value > base_value * (1 + tolerance):
+                regressions.append(f"{key}: {metric} {value:.2f}ms > baseline {base_value:.2f}ms")
+        base_rps = previous.get('throughput_rps')
+        rps = current.get('throughput_rps')
+        if base_rps and rps is not None and rps < base_rps * (1 - tolerance):
+            regressions.append(f"{key}: throughput {rps:.1f} rps < baseline {base_rps:.1f} rps")
+        if current['errors'] > previous.get('errors', 0):
+            regressions.append(f"{key}: {current['errors']} erros (baseline {previous.get('errors', 0)})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de carga e latência da API")
+    parser.add_argument('--db-url', help="Banco alvo (padrão: SQLite temporário)")
+    parser.add_argument('--seed-rows', type=int, default=5000, help="Análises pré-populadas")
+    parser.add_argument('--cows', type=int, default=200, help="Quantidade de vacas distintas")
+    parser.add_argument('--requests', type=int, default=200, help="Requisições por cenário/concorrência")
+    parser.add_argument('--concurrency', default='1,4,16', help="Níveis de concorrência (ex.: 1,4,16)")
+    parser.add_argument('--scenarios', help=f"Subconjunto de cenários: {','.join(SCENARIOS)}")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument('--baseline', help="JSON de baseline para detectar regressões")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Regressão tolerada em relação ao baseline (0.25 = 25%%)")
+    parser.add_argument('--verbose', action='store_true', help="Mostra os logs da API")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    workdir = None
+    if not args.db_url:
+        workdir = tempfile.mkdtemp(prefix='bench_api_')
+        args.db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['DATABASE_URL'] = args.db_url
+
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+    levels = [int(level) for level in args.concurrency.split(',') if level]
+    names = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"❌ Cenários desconhecidos: {unknown}", file=sys.stderr)
+        return 2
+
+    quiet = open(os.devnull, 'w') if not args.verbose else None
+    with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+        from app import app as flask_app, model_features
+
+        if not model_features:
+            print("❌ Modelo não carregado; benchmark abortado", file=sys.stderr)
+            return 2
+
+        print(f"🌱 Populando {args.seed_rows} análises em {args.db_url}", file=sys.stderr)
+        ids, cow_ids = popular_banco(args.seed_rows, model_features, args.cows, args.seed)
+        ctx = {'features': model_features, 'ids': ids, 'cow_ids': cow_ids, 'n_cows': args.cows}
+
+        results = {}
+        for name in names:
+            for level in levels:
+                key = f"{name}@c{level}"
+                results[key] = executar_cenario(
+                    flask_app, SCENARIOS[name], ctx, level, args.requests, args.seed,
+                )
+                summary = results[key]
+                print(
+                    f"📊 {key}: {summary['throughput_rps']} rps | "
+                    f"p50={summary['latency_ms']['p50']}ms p95={summary['latency_ms']['p95']}ms "
+                    f"p99={summary['latency_ms']['p99']}ms | erros={summary['errors']}",
+                    file=sys.stderr,
+                )
+    if quiet:
+        quiet.close()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'seed_rows': args.seed_rows,
+            'requests_per_run': args.requests,
+            'concurrency': levels,
+        },
+        'results': results,
+    }
+    serialized = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(serialized)
+        print(f"✅ Resultado salvo em: {args.output}", file=sys.stderr)
+    else:
+        print(serialized)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = comparar_com_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Regressões em relação ao baseline:", file=sys.stderr)
+            for line in regressions:
+                print(f"   - {line}", file=sys.stderr)
+            return 1
+        print("✅ Sem regressões em relação ao baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
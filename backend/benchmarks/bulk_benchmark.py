@@ -0,0 +1,129 @@
+# backend/benchmarks/bulk_benchmark.py
+"""
+Alteração e remoção em massa contra o laço por linha.
+
+Popula um SQLite temporário com `--rows` análises (gerador sintético) e,
+para `--batch` ids de cada vez, compara:
+
+- status: PUT /analises/<id> um a um x POST /analises/bulk-update;
+- remoção: DELETE /analises/<id> um a um x POST /analises/bulk-delete.
+
+Ao final, confere que os agregados do dashboard mantidos durante os testes
+são iguais aos reconstruídos do zero pelo backfill.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bulk_benchmark --rows 60000 --batch 10000
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+FARM_ID = 'fazenda-000'
+HEADERS = {'X-Farm-Id': FARM_ID}
+
+
+def agregados(engine):
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        return (
+            connection.execute(text(
+                "SELECT farm_id, bucket_size, bucket_start, prediction_label, status, count, "
+                "ROUND(probability_sum, 6) FROM analysis_rollups WHERE count != 0 ORDER BY 1, 2, 3, 4, 5"
+            )).all(),
+            connection.execute(text(
+                "SELECT farm_id, bucket_size, bucket_start, bin, count FROM confidence_rollups "
+                "WHERE count != 0 ORDER BY 1, 2, 3, 4"
+            )).all(),
+        )
+
+
+def _medir(run, rows: int) -> dict:
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'seconds': round(seconds, 3), 'rows_per_second': round(rows / seconds)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Operações em massa x laço por linha")
+    parser.add_argument('--rows', type=int, default=60_000)
+    parser.add_argument('--batch', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='bench_bulk_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        from sqlalchemy import select
+
+        import bulk
+        from app import app as flask_app
+        from db import AnalysisRecord, engine
+        from scripts.backfill_rollups import backfill
+        from scripts.generate_synthetic_herd import popular_banco
+
+        popular_banco(args.rows, seed=args.seed, farms=1, n_jobs=1, verbose=False)
+        with engine.connect() as connection:
+            ids = list(connection.scalars(select(AnalysisRecord.id).order_by(AnalysisRecord.id)))
+        if len(ids) < 4 * args.batch:
+            print("❌ --rows precisa ser ao menos 4x --batch", file=sys.stderr)
+            return 2
+        groups = [ids[index * args.batch:(index + 1) * args.batch] for index in range(4)]
+        client = flask_app.test_client()
+        bulk.BULK_PAUSE_MS = 0
+
+        def loop_update():
+            for analysis_id in groups[0]:
+                client.put(f'/analises/{analysis_id}', json={'status': 'reviewed'}, headers=HEADERS)
+
+        def bulk_update():
+            response = client.post(
+                '/analises/bulk-update', json={'ids': groups[1], 'changes': {'status': 'reviewed'}}, headers=HEADERS,
+            )
+            assert response.status_code == 200, response.get_json()
+
+        def loop_delete():
+            for analysis_id in groups[2]:
+                client.delete(f'/analises/{analysis_id}', headers=HEADERS)
+
+        def bulk_delete():
+            response = client.post('/analises/bulk-delete', json={'ids': groups[3]}, headers=HEADERS)
+            assert response.status_code == 200, response.get_json()
+
+        report = {'rows': args.rows, 'batch': args.batch, 'chunk_size': bulk.BULK_CHUNK_SIZE}
+        for name, run in (('update_per_row', loop_update), ('update_bulk', bulk_update),
+                          ('delete_per_row', loop_delete), ('delete_bulk', bulk_delete)):
+            print(f"⏱️  {name}", file=sys.stderr)
+            report[name] = _medir(run, args.batch)
+        report['update_speedup'] = round(report['update_per_row']['seconds'] / report['update_bulk']['seconds'], 1)
+        report['delete_speedup'] = round(report['delete_per_row']['seconds'] / report['delete_bulk']['seconds'], 1)
+
+        maintained = agregados(engine)
+        backfill(verbose=False)
+        report['rollups_consistent'] = maintained == agregados(engine)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
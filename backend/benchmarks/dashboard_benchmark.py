@@ -0,0 +1,172 @@
+# backend/benchmarks/dashboard_benchmark.py
+"""
+Tempo de resposta do GET /dashboard conforme `cow_analyses` cresce.
+
+Popula um SQLite temporário em degraus (`--steps 10000,100000,1000000`),
+com as análises espalhadas por dois anos, aplicando os agregados de cada
+lote com o mesmo código do backfill. A cada degrau mede p50/p95 do
+/dashboard (janelas diárias de 30 dias e mensais de 2 anos) e, para
+comparação, de uma agregação equivalente feita varrendo `cow_analyses`.
+
+Uso (a partir de backend/):
+    python -m benchmarks.dashboard_benchmark
+    python -m benchmarks.dashboard_benchmark --steps 10000,1000000,10000000
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import STATUSES
+
+PERIOD_START = datetime(2024, 1, 1)
+PERIOD_SECONDS = 2 * 365 * 24 * 3600
+
+
+def popular(first: int, last: int, seed: int, chunk: int = 50000):
+    """Insere as análises [first, last) e aplica seus agregados, lote a lote."""
+
+    from sqlalchemy import insert
+
+    from db import AnalysisRecord, engine, month_key
+    from rollups import aplicar
+    from scripts.backfill_rollups import agregar_chunk
+
+    rng = random.Random(seed + first)
+    for start in range(first, last, chunk):
+        batch = []
+        for _ in range(start, min(start + chunk, last)):
+            stamp = PERIOD_START + timedelta(seconds=rng.randrange(PERIOD_SECONDS))
+            probability = round(rng.random(), 4)
+            prediction = int(probability >= 0.5)
+            batch.append({
+                'farm_id': 'default',
+                'month_key': month_key(stamp),
+                'cow_id': f"BENCH-{rng.randrange(5000):05d}",
+                'prediction': prediction,
+                'prediction_label': 'SIM' if prediction == 1 else 'NÃO',
+                'probability': probability,
+                'payload': {},
+                'status': rng.choice(STATUSES),
+                'created_at': stamp,
+                'updated_at': stamp,
+            })
+        with engine.begin() as connection:
+            connection.execute(insert(AnalysisRecord), batch)
+            aplicar(connection, *agregar_chunk(pd.DataFrame(batch)))
+
+
+def varredura(session):
+    """O que o dashboard teria que fazer sem os agregados."""
+
+    from sqlalchemy import func
+
+    from db import AnalysisRecord
+
+    return (
+        session.query(AnalysisRecord.prediction_label, AnalysisRecord.status,
+                      func.count(), func.avg(AnalysisRecord.probability))
+        .group_by(AnalysisRecord.prediction_label, AnalysisRecord.status)
+        .all()
+    )
+
+
+def _percentis(values):
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)) * 1000, 3),
+        'p95_ms': round(float(np.percentile(values, 95)) * 1000, 3),
+    }
+
+
+def medir(client, requests: int, scan_requests: int):
+    from db import get_session
+
+    urls = {
+        'dashboard_day_30d': '/dashboard?bucket=day&from=2025-12-01T00:00:00&to=2025-12-31T00:00:00',
+        'dashboard_month_2y': '/dashboard?bucket=month&from=2024-01-01T00:00:00&to=2025-12-31T00:00:00',
+    }
+    results = {}
+    for name, url in urls.items():
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} devolveu {response.status_code}")
+        results[name] = _percentis(timings)
+
+    session = get_session()
+    try:
+        timings = []
+        for _ in range(scan_requests):
+            start = time.perf_counter()
+            varredura(session)
+            timings.append(time.perf_counter() - start)
+        results['full_scan_group_by'] = _percentis(timings)
+    finally:
+        session.close()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Latência do /dashboard x tamanho de cow_analyses")
+    parser.add_argument('--steps', default="10000,100000,1000000", help="Total de análises por degrau")
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--scan-requests', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-url', default=None)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.db_url:
+        workdir = tempfile.mkdtemp(prefix='bench_dashboard_')
+        args.db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['DATABASE_URL'] = args.db_url
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+
+    steps = sorted(int(step) for step in args.steps.split(',') if step)
+    results = []
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        from app import app as flask_app
+
+        client = flask_app.test_client()
+        populated = 0
+        for rows in steps:
+            print(f"🌱 Análises {populated} → {rows}", file=sys.stderr)
+            start = time.perf_counter()
+            popular(populated, rows, args.seed)
+            seed_seconds = time.perf_counter() - start
+            populated = rows
+            results.append({
+                'rows': rows,
+                'seed_seconds': round(seed_seconds, 2),
+                **medir(client, args.requests, args.scan_requests),
+            })
+
+    report = {'requests_per_step': args.requests, 'steps': results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
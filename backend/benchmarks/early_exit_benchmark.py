@@ -0,0 +1,194 @@
+# backend/benchmarks/early_exit_benchmark.py
+"""
+Relatório offline da parada antecipada da floresta (early_exit.py).
+
+Pré-processa o cow_monitoring_data.csv como no treino e, para cada ordem
+de avaliação, compara a parada antecipada com a floresta completa:
+
+- árvores avaliadas (média e percentis) e motivo da parada;
+- concordância do rótulo com o `pipeline.predict` (deve ser 100% sem
+  orçamento) e diferença entre a probabilidade estimada e a completa;
+- tempo da travessia por linha, parando e avaliando todas as árvores.
+
+As ordens são a da floresta (a servida pelo /predict) e a por concordância
+(árvores que mais concordam com o rótulo da floresta primeiro), calculada em
+`--order-fraction` das linhas; as duas são avaliadas só no restante.
+
+Também mede, linha a linha como no /predict, a latência ponta a ponta do
+caminho antigo (predict + predict_proba), de um predict_proba só e da
+parada antecipada, e o efeito de orçamentos curtos na travessia
+(`--budgets-ms`, sem contar o pré-processamento).
+
+Uso (a partir de backend/):
+    python -m benchmarks.early_exit_benchmark --budgets-ms 0.005,0.01,0.02
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from early_exit import EarlyExitForest
+
+
+def carregar_monitoramento(path, features):
+    from scripts.pregnancy_classifier import CowPregnancyClassifierPadrao
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        df_processed, _ = CowPregnancyClassifierPadrao(show_plots=False).preprocess_data(pd.read_csv(path))
+    return df_processed[features].reset_index(drop=True)
+
+
+def ordem_por_concordancia(pipeline, X):
+    """Árvores que mais concordam com o rótulo da floresta inteira em X primeiro"""
+    forest = pipeline[-1]
+    Xt = np.ascontiguousarray(pipeline[:-1].transform(X), dtype=np.float32)
+    full = np.argmax(forest.predict_proba(Xt), axis=1)
+    agreement = np.array([
+        np.mean(np.argmax(estimator.predict_proba(Xt), axis=1) == full) for estimator in forest.estimators_
+    ])
+    return np.argsort(-agreement, kind='stable')
+
+
+def _travessia(forest, rows, **kwargs):
+    start = time.perf_counter()
+    results = [forest.score_row(x, **kwargs) for x in rows]
+    return results, (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def avaliar_ordem(forest, X, full_labels, full_proba, repeats):
+    rows = forest.transform(X)
+    results, early_us = min((_travessia(forest, rows) for _ in range(repeats)), key=lambda item: item[1])
+    _, complete_us = min(
+        (_travessia(forest, rows, stop_when_certain=False) for _ in range(repeats)), key=lambda item: item[1],
+    )
+    trees = np.array([result['trees_evaluated'] for result in results])
+    labels = np.array([result['prediction'] for result in results])
+    proba = np.array([result['probability'] for result in results])
+    return {
+        'n_trees': forest.n_trees,
+        'first_check': forest.first_check,
+        'trees_mean': round(float(trees.mean()), 2),
+        'trees_percentiles': {f"p{q}": int(np.percentile(trees, q)) for q in (50, 90, 99)},
+        'trees_max': int(trees.max()),
+        'stopped_by': pd.Series([result['stopped_by'] for result in results]).value_counts().to_dict(),
+        'agreement': float(np.mean(labels == full_labels)),
+        'mean_abs_proba_diff': round(float(np.mean(np.abs(proba - full_proba))), 4),
+        'max_abs_proba_diff': round(float(np.max(np.abs(proba - full_proba))), 4),
+        'walk_us_per_row': round(early_us, 2),
+        'complete_walk_us_per_row': round(complete_us, 2),
+        'walk_speedup': round(complete_us / early_us, 2),
+        'trees_speedup': round(forest.n_trees / float(trees.mean()), 2),
+    }
+
+
+def avaliar_orcamentos(forest, X, full_labels, budgets_ms):
+    rows = forest.transform(X)
+    report = {}
+    for budget in budgets_ms:
+        results = []
+        for x in rows:
+            results.append(forest.score_row(x, deadline=time.perf_counter() + budget / 1000))
+        labels = np.array([result['prediction'] for result in results])
+        report[str(budget)] = {
+            'trees_mean': round(float(np.mean([result['trees_evaluated'] for result in results])), 2),
+            'stopped_by_budget': round(float(np.mean([result['stopped_by'] == 'budget' for result in results])), 4),
+            'label_can_flip': round(float(np.mean([result['label_can_flip'] for result in results])), 4),
+            'agreement': round(float(np.mean(labels == full_labels)), 4),
+        }
+    return report
+
+
+def latencia_ponta_a_ponta(pipeline, forest, X, rows, seed):
+    rng = np.random.default_rng(seed)
+    sample = [X.iloc[[index]] for index in rng.choice(len(X), size=min(rows, len(X)), replace=False)]
+
+    def mediana(run):
+        elapsed = []
+        for df_input in sample:
+            start = time.perf_counter()
+            run(df_input)
+            elapsed.append(time.perf_counter() - start)
+        return round(float(np.median(elapsed)) * 1000, 3)
+
+    def antigo(df_input):
+        pipeline.predict(df_input)
+        pipeline.predict_proba(df_input)
+
+    report = {
+        'predict_and_proba_p50_ms': mediana(antigo),
+        'proba_once_p50_ms': mediana(pipeline.predict_proba),
+        'early_exit_p50_ms': mediana(forest.score),
+    }
+    report['speedup_vs_predict_and_proba'] = round(
+        report['predict_and_proba_p50_ms'] / report['early_exit_p50_ms'], 1
+    )
+    report['speedup_vs_proba_once'] = round(report['proba_once_p50_ms'] / report['early_exit_p50_ms'], 1)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Árvores avaliadas, speedup e concordância da parada antecipada")
+    parser.add_argument('--model-path', default=os.path.join(BACKEND_DIR, 'models', 'pregnancy_pipeline.joblib'))
+    parser.add_argument('--data', default=os.path.join(BACKEND_DIR, 'cow_monitoring_data.csv'))
+    parser.add_argument('--order-fraction', type=float, default=0.5,
+                        help="Fração das linhas usada para calcular a ordem por concordância")
+    parser.add_argument('--budgets-ms', default='0.005,0.01,0.02')
+    parser.add_argument('--latency-rows', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    warnings.filterwarnings('ignore', category=UserWarning)
+    bundle = joblib.load(args.model_path)
+    pipeline, features = bundle['pipeline'], bundle['features']
+    X = carregar_monitoramento(args.data, features)
+
+    shuffled = X.sample(frac=1.0, random_state=args.seed)
+    split = int(len(shuffled) * args.order_fraction)
+    X_order, X_eval = shuffled.iloc[:split], shuffled.iloc[split:]
+
+    full_labels = pipeline.predict(X_eval)
+    full_proba = pipeline.predict_proba(X_eval)[:, list(pipeline.classes_).index(1)]
+    served = EarlyExitForest(pipeline, features)
+    agreement = EarlyExitForest(pipeline, features, order=ordem_por_concordancia(pipeline, X_order))
+
+    print(f"⏱️  {len(X_eval)} linhas avaliadas", file=sys.stderr)
+    report = {
+        'dataset_rows': len(X),
+        'eval_rows': len(X_eval),
+        'orders': {
+            'forest': avaliar_ordem(served, X_eval, full_labels, full_proba, args.repeats),
+            'agreement': avaliar_ordem(agreement, X_eval, full_labels, full_proba, args.repeats),
+        },
+        'budgets': avaliar_orcamentos(
+            served, X_eval, full_labels, [float(value) for value in args.budgets_ms.split(',') if value],
+        ),
+        'end_to_end': latencia_ponta_a_ponta(pipeline, served, X_eval, args.latency_rows, args.seed),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    if any(order['agreement'] < 1.0 for order in report['orders'].values()):
+        print("❌ Parada antecipada discordou da floresta completa", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,304 @@
+# backend/benchmarks/events_benchmark.py
+"""
+Stream de alterações (SSE) contra polling periódico do /analises.
+
+Sobe o app em um servidor werkzeug com threads, sobre um SQLite temporário
+populado pelo gerador sintético, e mede dois cenários com o mesmo número
+de clientes e a mesma carga de escrita (`--write-rate` análises novas por
+segundo, via /sync dentro do processo):
+
+- sse: `--clients` conexões abertas em GET /analises/stream;
+- poll: `--clients` clientes chamando GET /analises?limit=N a cada
+  `--poll-interval` segundos, espalhados no intervalo.
+
+Todos os clientes rodam em uma única thread com selectors. Para cada
+cenário o relatório traz CPU do servidor (CPU do processo menos a da
+thread dos clientes e a da thread de escrita), consultas ao banco feitas
+fora da thread de escrita e o atraso entre o início da escrita e cada
+cliente ver a análise nova (no poll, a primeira resposta que a contém).
+
+Uso (a partir de backend/):
+    python -m benchmarks.events_benchmark --clients 1000 --duration 60
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import selectors
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+FARM_ID = 'fazenda-000'
+CONNECT_BATCH = 100
+
+
+class Clientes:
+    """Clientes HTTP não bloqueantes de um cenário, todos na thread que chama `rodar`."""
+
+    def __init__(self, port: int, written: dict):
+        self.port = port
+        self.written = written
+        self.selector = selectors.DefaultSelector()
+        self.latencies = []
+        self.seen = set()
+        self.responses = 0
+        self.errors = 0
+        self.open = 0
+
+    def _abrir(self, path: str, kind: str, client: int):
+        sock = socket.socket()
+        sock.setblocking(False)
+        sock.connect_ex(('127.0.0.1', self.port))
+        request = f"GET {path} HTTP/1.1\r\nHost: bench\r\nX-Farm-Id: {FARM_ID}\r\n\r\n".encode()
+        state = {'kind': kind, 'client': client, 'out': request, 'buffer': b''}
+        self.selector.register(sock, selectors.EVENT_WRITE, state)
+        self.open += 1
+
+    def _fechar(self, sock):
+        self.selector.unregister(sock)
+        sock.close()
+        self.open -= 1
+
+    def _visto(self, client, cow_id, now):
+        if cow_id in self.written and (client, cow_id) not in self.seen:
+            self.seen.add((client, cow_id))
+            self.latencies.append(now - self.written[cow_id])
+
+    def _sse(self, state, now):
+        *lines, state['buffer'] = state['buffer'].split(b'\n')
+        for line in lines:
+            if line.startswith(b'data: '):
+                item = json.loads(line[6:])
+                if item['type'] == 'created':
+                    self._visto(state['client'], item['cow_id'], now)
+
+    def _poll(self, state, now):
+        _, _, body = state['buffer'].partition(b'\r\n\r\n')
+        self.responses += 1
+        try:
+            for item in json.loads(body)['data']:
+                self._visto(state['client'], item['cow_id'], now)
+        except (ValueError, KeyError):
+            self.errors += 1
+
+    def _evento(self, key, mask, now):
+        sock, state = key.fileobj, key.data
+        if mask & selectors.EVENT_WRITE:
+            try:
+                sent = sock.send(state['out'])
+            except OSError:
+                self.errors += 1
+                self._fechar(sock)
+                return
+            state['out'] = state['out'][sent:]
+            if not state['out']:
+                self.selector.modify(sock, selectors.EVENT_READ, state)
+            return
+        try:
+            data = sock.recv(65536)
+        except OSError:
+            data = b''
+        if data:
+            state['buffer'] += data
+            if state['kind'] == 'sse':
+                self._sse(state, now)
+            return
+        if state['kind'] == 'poll':
+            self._poll(state, now)
+        else:
+            self.errors += 1
+        self._fechar(sock)
+
+    def _processar(self, timeout):
+        for key, mask in self.selector.select(timeout):
+            self._evento(key, mask, time.perf_counter())
+
+    def conectar_sse(self, clients: int):
+        for start in range(0, clients, CONNECT_BATCH):
+            for client in range(start, min(start + CONNECT_BATCH, clients)):
+                self._abrir('/analises/stream', 'sse', client)
+            deadline = time.perf_counter() + 0.5
+            while time.perf_counter() < deadline:
+                self._processar(0.05)
+
+    def rodar(self, duration: float, clients: int = 0, interval: float = 10.0, limit: int = 50):
+        """Processa os sockets por `duration` s; com `clients`, dispara os polls agendados."""
+
+        start = time.perf_counter()
+        offsets = np.arange(clients) * interval / max(clients, 1)
+        next_poll = start + offsets
+        offered = 0
+        while time.perf_counter() - start < duration:
+            now = time.perf_counter()
+            if clients:
+                due = np.flatnonzero(next_poll <= now)
+                for client in due:
+                    self._abrir(f'/analises?limit={limit}', 'poll', int(client))
+                    next_poll[client] += interval
+                offered += len(due)
+            self._processar(0.01)
+        return offered
+
+    def fechar_tudo(self):
+        for key in list(self.selector.get_map().values()):
+            self._fechar(key.fileobj)
+
+
+def _percentil(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 1) if values else None
+
+
+def cenario(kind, args, port, counter, writer_factory):
+    written = {}
+    clients = Clientes(port, written)
+    if kind == 'sse':
+        clients.conectar_sse(args.clients)
+        clients.rodar(1.0)
+    counter.reset()
+    writer = writer_factory(written)
+    cpu_start, wall_start, client_cpu_start = time.process_time(), time.perf_counter(), time.thread_time()
+
+    writer.start()
+    offered = clients.rodar(
+        args.duration, args.clients if kind == 'poll' else 0, args.poll_interval, args.poll_limit,
+    )
+    writer.stop.set()
+    writer.join()
+
+    wall = time.perf_counter() - wall_start
+    client_cpu = time.thread_time() - client_cpu_start
+    server_cpu = time.process_time() - cpu_start - client_cpu - writer.cpu
+    report = {
+        'clients': args.clients,
+        'duration_s': round(wall, 1),
+        'writes': len(written),
+        'server_cpu_s': round(server_cpu, 2),
+        'server_cpu_percent': round(100 * server_cpu / wall, 1),
+        'db_queries': counter.queries,
+        'db_queries_per_second': round(counter.queries / wall, 1),
+        'client_cpu_s': round(client_cpu, 2),
+        'notifications': len(clients.latencies),
+        'notify_latency_p50_ms': _percentil(clients.latencies, 50),
+        'notify_latency_p99_ms': _percentil(clients.latencies, 99),
+        'errors': clients.errors,
+    }
+    if kind == 'sse':
+        report['open_streams'] = clients.open
+    else:
+        report['polls_offered'] = offered
+        report['polls_completed'] = clients.responses
+    clients.fechar_tudo()
+    return report
+
+
+class ContadorConsultas:
+    """Conta os comandos SQL, ignorando os da thread de escrita."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.queries = 0
+        self.ignored = None
+        event.listen(engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, *_args):
+        if threading.get_ident() != self.ignored:
+            self.queries += 1
+
+    def reset(self):
+        self.queries = 0
+
+
+class Escritor(threading.Thread):
+    def __init__(self, client, rate, written, counter, prefix):
+        super().__init__(daemon=True)
+        self.client, self.rate, self.written, self.counter, self.prefix = client, rate, written, counter, prefix
+        self.stop = threading.Event()
+        self.cpu = 0.0
+
+    def run(self):
+        self.counter.ignored = threading.get_ident()
+        cpu_start = time.thread_time()
+        index = 0
+        while not self.stop.wait(1 / self.rate):
+            # Vaca única por escrita: o evento pode chegar antes da resposta do /sync
+            cow_id = f'BENCH-{self.prefix}-{index}'
+            self.written[cow_id] = time.perf_counter()
+            self.client.post('/sync', json={'analyses': [{
+                'client_key': cow_id,
+                'prediction': 1, 'prediction_label': 'Prenha', 'probability': 0.9,
+                'payload': {'cow_id': cow_id},
+            }]}, headers={'X-Farm-Id': FARM_ID})
+            index += 1
+        self.cpu = time.thread_time() - cpu_start
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream SSE x polling do /analises")
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=60.0)
+    parser.add_argument('--poll-interval', type=float, default=10.0)
+    parser.add_argument('--poll-limit', type=int, default=50)
+    parser.add_argument('--write-rate', type=float, default=1.0, help="análises novas por segundo")
+    parser.add_argument('--rows', type=int, default=20_000, help="análises pré-existentes")
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='bench_events_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # O stream usa uma thread por assinante; o limite padrão é menor que o teste
+    os.environ.setdefault('EVENTS_MAX_SUBSCRIBERS', str(args.clients + 10))
+    os.chdir(BACKEND_DIR)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        from werkzeug.serving import make_server
+
+        from app import app as flask_app
+        from db import engine
+        from scripts.generate_synthetic_herd import popular_banco
+
+        popular_banco(args.rows, farms=1, n_jobs=1, verbose=False)
+        server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+        server.socket.listen(1024)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        counter = ContadorConsultas(engine)
+        writer_client = flask_app.test_client()
+
+        report = {'poll_interval_s': args.poll_interval, 'poll_limit': args.poll_limit, 'write_rate': args.write_rate}
+        # Poll primeiro: as threads de stream só percebem conexões fechadas na
+        # próxima escrita, e acordá-las não deve pesar no cenário de poll
+        for kind in ('poll', 'sse'):
+            print(f"⏱️  {kind}: {args.clients} clientes por {args.duration:.0f}s", file=sys.stderr)
+            report[kind] = cenario(
+                kind, args, server.server_port, counter,
+                lambda written, kind=kind: Escritor(writer_client, args.write_rate, written, counter, kind),
+            )
+            time.sleep(1.0)
+        server.shutdown()
+
+    sse, poll = report['sse'], report['poll']
+    report['cpu_ratio_poll_over_sse'] = round(poll['server_cpu_s'] / max(sse['server_cpu_s'], 1e-3), 1)
+    report['queries_saved'] = poll['db_queries'] - sse['db_queries']
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# backend/benchmarks/explain_benchmark.py
+"""
+Custo e consistência das explicações por predição.
+
+Mede, linha a linha como no /predict, a latência do caminho atual
+(predict + predict_proba) com e sem a explicação, e confere que
+base_value + soma(contribuições) reproduz o predict_proba do pipeline.
+
+Uso (a partir de backend/):
+    python -m benchmarks.explain_benchmark --rows 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import gerar_features
+from explain import ForestExplainer
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Overhead e consistência do explain=true")
+    parser.add_argument('--model-path', default=os.path.join(BACKEND_DIR, 'models', 'pregnancy_pipeline.joblib'))
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    bundle = joblib.load(args.model_path)
+    pipeline, features = bundle['pipeline'], bundle['features']
+
+    start = time.perf_counter()
+    explainer = ForestExplainer(pipeline, features)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(args.seed)
+    rows = [pd.DataFrame([gerar_features(rng, features)], columns=features) for _ in range(args.rows)]
+
+    plain, explained, errors = [], [], []
+    for df_input in rows:
+        start = time.perf_counter()
+        pipeline.predict(df_input)
+        proba = pipeline.predict_proba(df_input)[0][1]
+        plain.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        pipeline.predict(df_input)
+        pipeline.predict_proba(df_input)
+        explanation = explainer.explain(df_input)[0]
+        explained.append(time.perf_counter() - start)
+        errors.append(abs(explanation['probability'] - proba))
+
+    plain_ms = np.median(plain) * 1000
+    explained_ms = np.median(explained) * 1000
+    report = {
+        'rows': args.rows,
+        'n_trees': explainer.n_trees,
+        'table_nodes': int(explainer.table.shape[0]),
+        'build_ms': round(build_ms, 3),
+        'predict_p50_ms': round(float(plain_ms), 3),
+        'predict_explain_p50_ms': round(float(explained_ms), 3),
+        'overhead_ms': round(float(explained_ms - plain_ms), 3),
+        'overhead_ratio': round(float(explained_ms / plain_ms), 3),
+        'max_abs_sum_error': float(max(errors)),
+    }
+    print(json.dumps(report, indent=2))
+    if report['max_abs_sum_error'] > 1e-9:
+        print("❌ Contribuições não somam a probabilidade prevista", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
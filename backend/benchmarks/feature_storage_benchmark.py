@@ -0,0 +1,147 @@
+# backend/benchmarks/feature_storage_benchmark.py
+"""
+Features no payload JSON x features só nas colunas tipadas.
+
+Popula um SQLite temporário com `--rows` análises (gerador sintético) no
+formato anterior à separação (payload com as 7 features além dos extras
+do app; as colunas da busca já preenchidas com cópias delas) e mede:
+
+- tamanho de `cow_analyses` (dbstat, depois de VACUUM);
+- extração completa das features para retreino: antes lendo e
+  interpretando o JSON linha a linha (como o retrain_from_feedback fazia),
+  depois lendo as colunas tipadas;
+- o backfill em chunks (tempo total e a transação mais longa).
+
+Ao final, confere que as duas extrações devolvem a mesma matriz.
+
+Uso (a partir de backend/):
+    python -m benchmarks.feature_storage_benchmark --rows 200000
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def tamanho_tabela(engine) -> dict:
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        connection.execute(text("VACUUM"))
+        rows = connection.execute(text(
+            "SELECT s.name, SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+            "WHERE m.tbl_name = 'cow_analyses' GROUP BY s.name"
+        )).all()
+        payload_bytes = connection.execute(text("SELECT SUM(LENGTH(payload)) FROM cow_analyses")).scalar()
+    sizes = dict(rows)
+    return {
+        'table_bytes': int(sizes.pop('cow_analyses')),
+        'index_bytes': int(sum(sizes.values())),
+        'payload_bytes': int(payload_bytes),
+    }
+
+
+def extrair_json(engine, features):
+    """Caminho antigo: payload inteiro de cada linha, interpretado no Python."""
+    from sqlalchemy import select
+
+    from db import AnalysisRecord
+
+    with engine.connect() as connection:
+        payloads = connection.scalars(select(AnalysisRecord.payload).order_by(AnalysisRecord.id))
+        return np.array([[float(payload[feature]) for feature in features] for payload in payloads])
+
+
+def extrair_colunas(engine, features):
+    from sqlalchemy import select
+
+    from db import AnalysisRecord
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(*(getattr(AnalysisRecord, feature) for feature in features)).order_by(AnalysisRecord.id)
+        ).all()
+    # np.array direto sobre objetos Row é ~40x mais lento que sobre tuplas
+    return np.array([tuple(row) for row in rows], dtype=float)
+
+
+def _medir(run, repeats: int):
+    best, result = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, round(best, 3)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Features em JSON x colunas tipadas")
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='bench_features_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        from sqlalchemy import func, update
+
+        from db import FEATURE_COLUMNS, AnalysisRecord, engine
+        from scripts.backfill_feature_columns import backfill
+        from scripts.generate_synthetic_herd import popular_banco
+
+        features = list(FEATURE_COLUMNS)
+        popular_banco(args.rows, seed=args.seed, farms=1, n_jobs=1, verbose=False)
+        # Formato anterior à separação: as features também dentro do JSON
+        table = AnalysisRecord.__table__
+        with engine.begin() as connection:
+            connection.execute(update(table).values(payload=func.json_object(
+                'cowId', table.c.cow_id, *(item for feature in features for item in (feature, table.c[feature])),
+            )))
+
+        print("⏱️  antes", file=sys.stderr)
+        before = tamanho_tabela(engine)
+        X_json, before['extract_seconds'] = _medir(lambda: extrair_json(engine, features), args.repeats)
+
+        print("⏱️  backfill", file=sys.stderr)
+        migration = backfill(chunk_size=args.chunk_size, pause_ms=0, verbose=False)
+
+        print("⏱️  depois", file=sys.stderr)
+        after = tamanho_tabela(engine)
+        X_columns, after['extract_seconds'] = _medir(lambda: extrair_colunas(engine, features), args.repeats)
+
+    report = {
+        'rows': args.rows,
+        'before': before,
+        'after': after,
+        'backfill': migration,
+        'table_size_ratio': round(after['table_bytes'] / before['table_bytes'], 3),
+        'payload_size_ratio': round(after['payload_bytes'] / before['payload_bytes'], 3),
+        'extract_speedup': round(before['extract_seconds'] / after['extract_seconds'], 1),
+        'same_features': bool(np.array_equal(X_json, X_columns)),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
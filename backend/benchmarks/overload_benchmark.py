@@ -0,0 +1,152 @@
+# backend/benchmarks/overload_benchmark.py
+"""
+Teste de sobrecarga do /predict com e sem controle de admissão.
+
+Primeiro mede a vazão sustentada do /predict (carga fechada, na
+concorrência do limitador). Depois gera carga aberta — chegadas em ritmo
+fixo, sem esperar as respostas — a `--overload` vezes essa vazão, uma vez
+com o controle de admissão ligado e outra desligado, e compara a latência
+das requisições atendidas (p50/p95/p99), a vazão útil e as recusas
+(429/503).
+
+Uso (a partir de backend/):
+    python -m benchmarks.overload_benchmark --overload 5 --duration 10
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import gerar_payload
+
+
+def _requisicao(client, payload):
+    start = time.perf_counter()
+    response = client.post('/predict', json=payload)
+    return response.status_code, time.perf_counter() - start
+
+
+def capacidade(app, features, concurrency: int, requests: int, seed: int) -> float:
+    rng = random.Random(seed)
+    payloads = [gerar_payload(rng, features, 500) for _ in range(requests)]
+    local = threading.local()
+
+    def run(payload):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return _requisicao(local.client, payload)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, payloads))
+    return requests / (time.perf_counter() - start)
+
+
+def carga_aberta(app, features, rate: float, duration: float, seed: int, workers: int):
+    rng = random.Random(seed)
+    total = int(rate * duration)
+    payloads = [gerar_payload(rng, features, 500) for _ in range(total)]
+    local = threading.local()
+
+    def run(payload):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return _requisicao(local.client, payload)
+
+    futures = []
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, payload in enumerate(payloads):
+            delay = start + index * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(run, payload))
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    admitted = [elapsed for status, elapsed in results if status == 200]
+    shed = [elapsed for status, elapsed in results if status in (429, 503)]
+    summary = {
+        'offered_rps': round(rate, 2),
+        'requests': total,
+        'statuses': dict(statuses),
+        'goodput_rps': round(len(admitted) / wall, 2),
+    }
+    if admitted:
+        summary['admitted_latency_ms'] = {
+            f"p{q}": round(float(np.percentile(admitted, q)) * 1000, 2) for q in (50, 95, 99)
+        }
+    if shed:
+        summary['shed_latency_ms'] = {
+            f"p{q}": round(float(np.percentile(shed, q)) * 1000, 2) for q in (50, 99)
+        }
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sobrecarga do /predict com e sem admissão")
+    parser.add_argument('--overload', type=float, default=5.0, help="Múltiplo da vazão sustentada")
+    parser.add_argument('--duration', type=float, default=10.0, help="Segundos de carga aberta")
+    parser.add_argument('--calibration-requests', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=512, help="Threads do gerador de carga")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='bench_overload_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        import admission
+        from app import app as flask_app, model_features
+
+        if not model_features:
+            print("❌ Modelo não carregado; benchmark abortado", file=sys.stderr)
+            return 2
+
+        limiter = admission.LIMITERS['predict']
+        rate = capacidade(
+            flask_app, model_features, limiter.concurrency, args.calibration_requests, args.seed,
+        )
+        print(f"📏 Vazão sustentada: {rate:.1f} req/s", file=sys.stderr)
+
+        runs = {}
+        for label, enabled in (('with_admission', True), ('without_admission', False)):
+            admission.ENABLED = enabled
+            print(f"🚦 Carga aberta a {args.overload}x ({label})", file=sys.stderr)
+            runs[label] = carga_aberta(
+                flask_app, model_features, rate * args.overload, args.duration, args.seed, args.workers,
+            )
+            time.sleep(1)
+        runs['with_admission']['limiter'] = limiter.snapshot()
+
+    report = {'capacity_rps': round(rate, 2), 'overload': args.overload, **runs}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
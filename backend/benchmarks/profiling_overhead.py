@@ -0,0 +1,88 @@
+# backend/benchmarks/profiling_overhead.py
+"""
+Custo dos hooks de profiling no /predict.
+
+Mede o p50 do /predict sem sessão de profiling e com sessões
+deterministic e sampling ativas, e o custo isolado dos dois hooks por
+requisição quando não há sessão (o caso normal em produção).
+
+Uso (a partir de backend/):
+    python -m benchmarks.profiling_overhead --requests 200
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import gerar_payload
+
+
+def p50_predict(client, payloads) -> float:
+    timings = []
+    for payload in payloads:
+        start = time.perf_counter()
+        client.post('/predict', json=payload)
+        timings.append(time.perf_counter() - start)
+    return round(float(np.percentile(timings, 50)) * 1000, 3)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Overhead do profiling sob demanda")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='bench_profiling_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        import profiling
+        from app import app as flask_app, model_features
+
+        if not model_features:
+            print("❌ Modelo não carregado; benchmark abortado", file=sys.stderr)
+            return 2
+
+        rng = random.Random(args.seed)
+        payloads = [gerar_payload(rng, model_features, 500) for _ in range(args.requests)]
+        client = flask_app.test_client()
+        p50_predict(client, payloads[:20])
+
+        report = {'requests': args.requests, 'predict_p50_ms': {'off': p50_predict(client, payloads)}}
+        for mode in profiling.MODES:
+            profiling.iniciar(mode=mode, requests=args.requests, route='predict')
+            report['predict_p50_ms'][mode] = p50_predict(client, payloads)
+
+        # Custo dos hooks sem sessão ativa, isolado do resto da requisição
+        with flask_app.test_request_context('/predict', method='POST'):
+            from flask import g, request
+
+            calls = 100_000
+            seconds = timeit.timeit(
+                lambda: (profiling.antes_da_requisicao(request, g), profiling.depois_da_requisicao(request, None, g)),
+                number=calls,
+            )
+        report['hooks_off_ns_per_request'] = round(seconds / calls * 1e9, 1)
+        report['hooks_off_pct_of_predict'] = round(
+            100 * (seconds / calls) / (report['predict_p50_ms']['off'] / 1000), 5,
+        )
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+# backend/benchmarks/search_benchmark.py
+"""
+Latência do GET /analises/search em uma tabela com milhões de análises.
+
+Popula um SQLite temporário com `--rows` análises (features nas colunas
+indexadas, notas em parte delas) e mede p50/p95 de buscas textuais, de
+faixa e combinadas. Para comparação, mede também as mesmas buscas sem os
+índices: LIKE sobre `cow_analyses.notes` e faixa lida do payload JSON.
+
+Uso (a partir de backend/):
+    python -m benchmarks.search_benchmark --rows 2000000
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import STATUSES, gerar_features
+
+NOTES = [
+    "retorno ao cio observado",
+    "vaca saudável, boa condição corporal",
+    "inseminação repetida",
+    "descarga vaginal, acompanhar",
+    "perda de peso nas últimas semanas",
+]
+RARE_NOTE = "suspeita de aborto, repetir exame"
+
+QUERIES = {
+    'text_rare': {'q': 'aborto'},
+    'text_common': {'q': 'cio'},
+    'range_selective': {'days_since_insemination_min': 88},
+    'range_wide': {'days_since_insemination_min': 60},
+    'text_and_range': {'q': 'aborto', 'days_since_insemination_min': 60},
+    'two_ranges': {'weight_min': 150, 'weight_max': 152, 'body_temperature_max': 5},
+}
+
+
+def popular(rows: int, features, seed: int, notes_ratio: float, rare_ratio: float, chunk: int = 20000):
+    from sqlalchemy import insert
+
+    from db import AnalysisNote, AnalysisRecord, engine, month_key
+
+    rng = random.Random(seed)
+    inicio = datetime(2025, 1, 1)
+    next_id = 1
+    for start in range(0, rows, chunk):
+        batch, notes = [], []
+        for index in range(start, min(start + chunk, rows)):
+            values = gerar_features(rng, features)
+            note = None
+            if rng.random() < notes_ratio:
+                note = RARE_NOTE if rng.random() < rare_ratio / notes_ratio else rng.choice(NOTES)
+                notes.append({'analysis_id': next_id, 'farm_id': 'default', 'notes': note})
+            stamp = inicio + timedelta(seconds=index * 15)
+            prediction = rng.randint(0, 1)
+            batch.append({
+                'id': next_id,
+                'farm_id': 'default',
+                'month_key': month_key(stamp),
+                'cow_id': f"BENCH-{rng.randrange(5000):05d}",
+                'prediction': prediction,
+                'prediction_label': 'SIM' if prediction == 1 else 'NÃO',
+                'probability': round(rng.uniform(0.5, 1.0), 4),
+                'payload': values,
+                'status': rng.choice(STATUSES),
+                'notes': note,
+                'created_at': stamp,
+                'updated_at': stamp,
+                **values,
+            })
+            next_id += 1
+        with engine.begin() as connection:
+            connection.execute(insert(AnalysisRecord), batch)
+            if notes:
+                connection.execute(insert(AnalysisNote), notes)
+
+
+def _percentis(values):
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)) * 1000, 3),
+        'p95_ms': round(float(np.percentile(values, 95)) * 1000, 3),
+    }
+
+
+def medir_endpoint(client, repeats: int):
+    results = {}
+    for name, params in QUERIES.items():
+        timings, count = [], 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            response = client.get('/analises/search', query_string={**params, 'limit': 50})
+            timings.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{params} devolveu {response.status_code}")
+            count = response.get_json()['count']
+        results[name] = {'returned': count, **_percentis(timings)}
+    return results
+
+
+def medir_sem_indices(repeats: int):
+    from sqlalchemy import text
+
+    from db import engine
+
+    queries = {
+        'like_notes_scan': "SELECT id FROM cow_analyses WHERE notes LIKE '%aborto%' ORDER BY id DESC LIMIT 51",
+        'json_range_scan': (
+            "SELECT id FROM cow_analyses WHERE json_extract(payload, '$.days_since_insemination') >= 88 "
+            "AND json_extract(payload, '$.weight') BETWEEN 150 AND 152 ORDER BY id DESC LIMIT 51"
+        ),
+    }
+    results = {}
+    with engine.connect() as connection:
+        for name, sql in queries.items():
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                connection.execute(text(sql)).all()
+                timings.append(time.perf_counter() - start)
+            results[name] = _percentis(timings)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Latência do /analises/search")
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--notes-ratio', type=float, default=0.2, help="Fração de análises com notas")
+    parser.add_argument('--rare-ratio', type=float, default=0.001, help="Fração com a nota rara ('aborto')")
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--scan-repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-url', default=None)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.db_url:
+        workdir = tempfile.mkdtemp(prefix='bench_search_')
+        args.db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['DATABASE_URL'] = args.db_url
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        from app import app as flask_app, model_features
+
+        if not model_features:
+            print("❌ Modelo não carregado; benchmark abortado", file=sys.stderr)
+            return 2
+
+        print(f"🌱 Populando {args.rows} análises em {args.db_url}", file=sys.stderr)
+        start = time.perf_counter()
+        popular(args.rows, model_features, args.seed, args.notes_ratio, args.rare_ratio)
+        seed_seconds = time.perf_counter() - start
+
+        client = flask_app.test_client()
+        indexed = medir_endpoint(client, args.repeats)
+        unindexed = medir_sem_indices(args.scan_repeats)
+
+    report = {
+        'rows': args.rows,
+        'seed_seconds': round(seed_seconds, 2),
+        'search_endpoint': indexed,
+        'without_indexes': unindexed,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# backend/benchmarks/sweep_benchmark.py
+"""
+POST /predict/sweep contra a varredura feita com chamadas ao /predict.
+
+Em um SQLite temporário, mede pelo test client:
+
+- predict: latência de um POST /predict (a referência "uma predição");
+- sweep_<N>x<N>: POST /predict/sweep com duas features e N valores em
+  cada eixo, pela passada única do EarlyExitForest;
+- sweep_<N>x<N>_predict_proba: a mesma grade pelo predict_proba do
+  pipeline (o caminho sem o modelo de parada antecipada);
+- loop_<M>: M pontos da grade, um POST /predict por ponto (o que os
+  veterinários fazem hoje), com a estimativa para a grade inteira.
+
+Ao final, confere que a superfície devolvida bate com o predict_proba do
+pipeline ponto a ponto.
+
+Uso (a partir de backend/):
+    python -m benchmarks.sweep_benchmark --steps 100
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import gerar_features
+
+AXES = ('days_since_insemination', 'body_condition')
+
+
+def _medir(run, repeats: int):
+    elapsed, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run()
+        elapsed.append(time.perf_counter() - start)
+    return result, round(float(np.median(elapsed)) * 1000, 2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Varredura vetorizada x chamadas ao /predict")
+    parser.add_argument('--steps', type=int, default=100, help="Valores por eixo (grade steps x steps)")
+    parser.add_argument('--loop-points', type=int, default=50, help="Pontos pontuados um a um pelo /predict")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='bench_sweep_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        import app as app_module
+
+        if not app_module.model_features:
+            print("❌ Modelo não carregado; benchmark abortado", file=sys.stderr)
+            return 2
+        client = app_module.app.test_client()
+        features = app_module.model_features
+        base = gerar_features(random.Random(args.seed), features)
+        body = {'base': base, 'sweep': {
+            AXES[0]: {'start': 0, 'stop': 120, 'steps': args.steps},
+            AXES[1]: {'start': 20, 'stop': 80, 'steps': args.steps},
+        }}
+        label = f'sweep_{args.steps}x{args.steps}'
+
+        print("⏱️  predict", file=sys.stderr)
+        _, predict_ms = _medir(lambda: client.post('/predict', json=dict(base)), args.repeats)
+
+        print(f"⏱️  {label}", file=sys.stderr)
+        result, sweep_ms = _medir(lambda: client.post('/predict/sweep', json=body).get_json(), args.repeats)
+
+        scorer = app_module.model_early_exit
+        app_module.model_early_exit = None
+        try:
+            _, proba_ms = _medir(lambda: client.post('/predict/sweep', json=body).get_json(), args.repeats)
+        finally:
+            app_module.model_early_exit = scorer
+
+        print(f"⏱️  loop de {args.loop_points} /predict", file=sys.stderr)
+        mesh = np.meshgrid(*(np.array(axis['values']) for axis in result['axes']), indexing='ij')
+        grid = pd.DataFrame([base] * mesh[0].size)[features]
+        # A ordem dos eixos é a da resposta (o test client serializa o corpo com as chaves ordenadas)
+        for feature, values in zip((axis['feature'] for axis in result['axes']), mesh):
+            grid[feature] = values.ravel()
+        sample = grid.sample(min(args.loop_points, len(grid)), random_state=args.seed)
+        start = time.perf_counter()
+        for row in sample.to_dict('records'):
+            client.post('/predict', json=row)
+        loop_ms = (time.perf_counter() - start) * 1000
+
+    classes = list(app_module.pipeline.classes_)
+    expected = app_module.pipeline.predict_proba(grid)[:, classes.index(1)]
+    report = {
+        'grid_points': result['points'],
+        'predict_ms': predict_ms,
+        label: {'ms': sweep_ms, 'server_elapsed_ms': result['elapsed_ms']},
+        f'{label}_predict_proba': {'ms': proba_ms},
+        f"loop_{len(sample)}": {
+            'ms': round(loop_ms, 1),
+            'estimated_full_grid_s': round(loop_ms / len(sample) * len(grid) / 1000, 1),
+        },
+        'sweep_over_predict': round(sweep_ms / predict_ms, 2),
+        'max_abs_diff_vs_pipeline': float(
+            np.max(np.abs(np.ravel(result['probabilities']) - np.round(expected, 4)))
+        ),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
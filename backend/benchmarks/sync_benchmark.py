@@ -0,0 +1,226 @@
+# backend/benchmarks/sync_benchmark.py
+"""
+Custo do delta sync (/sync) contra o download completo do histórico.
+
+Popula um SQLite temporário com `--rows` análises (insert em lote pelo
+Core, sem ORM), posiciona um cliente já sincronizado e mede tempo e bytes
+transferidos em três situações:
+
+- nada mudou desde o último sync;
+- `--change-pct` das análises foram alteradas e algumas removidas;
+- download completo pelo /analises paginado (o que o app fazia antes),
+  medido nas primeiras `--full-pages` páginas e extrapolado para o total.
+
+Uso (a partir de backend/):
+    python -m benchmarks.sync_benchmark --rows 1000000
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import STATUSES, gerar_features
+
+
+def popular_banco_core(rows: int, features, n_cows: int, seed: int, chunk: int = 20000):
+    """Insert em lote via Core; updated_at fica no passado, fora da janela de assentamento."""
+
+    from sqlalchemy import insert
+
+    from db import AnalysisRecord, get_session, month_key
+
+    rng = random.Random(seed)
+    session = get_session()
+    inicio = datetime(2025, 1, 1)
+    try:
+        for start in range(0, rows, chunk):
+            batch = []
+            for index in range(start, min(start + chunk, rows)):
+                payload = gerar_features(rng, features)
+                payload['cowId'] = f"BENCH-{rng.randrange(n_cows):05d}"
+                prediction = rng.randint(0, 1)
+                stamp = inicio + timedelta(seconds=index * 10)
+                batch.append({
+                    'cow_id': payload['cowId'],
+                    'prediction': prediction,
+                    'prediction_label': 'SIM' if prediction == 1 else 'NÃO',
+                    'probability': round(rng.uniform(0.5, 1.0), 4),
+                    'payload': payload,
+                    'status': rng.choice(STATUSES),
+                    'notes': None,
+                    'month_key': month_key(stamp),
+                    'created_at': stamp,
+                    'updated_at': stamp,
+                })
+            session.execute(insert(AnalysisRecord), batch)
+            session.commit()
+    finally:
+        session.close()
+
+
+def estado_sincronizado():
+    """Token de um cliente que já recebeu tudo até agora."""
+
+    import sync
+    from db import AnalysisRecord, get_session
+
+    session = get_session()
+    try:
+        last = (
+            session.query(AnalysisRecord.updated_at, AnalysisRecord.id)
+            .order_by(AnalysisRecord.updated_at.desc(), AnalysisRecord.id.desc())
+            .first()
+        )
+        now = sync.db_now(session)
+    finally:
+        session.close()
+    return sync.encode_token({'u': last[0].isoformat(), 'i': last[1], 'd': now.isoformat(), 'di': 0})
+
+
+def alterar_e_remover(change_pct: float, delete_pct: float, seed: int):
+    from sqlalchemy import func, insert, select, update
+
+    from db import AnalysisRecord, AnalysisTombstone, get_session
+
+    session = get_session()
+    try:
+        max_id = session.query(func.max(AnalysisRecord.id)).scalar()
+        rng = random.Random(seed)
+        changed = rng.sample(range(1, max_id + 1), int(max_id * change_pct / 100))
+        split = int(max_id * delete_pct / 100)
+        removed, changed = changed[:split], changed[split:]
+        for start in range(0, len(changed), 5000):
+            session.execute(
+                update(AnalysisRecord)
+                .where(AnalysisRecord.id.in_(changed[start:start + 5000]))
+                .values(status='confirmed', updated_at=func.now())
+            )
+        for start in range(0, len(removed), 5000):
+            ids = removed[start:start + 5000]
+            session.execute(insert(AnalysisTombstone).from_select(
+                ['analysis_id', 'cow_id'],
+                select(AnalysisRecord.id, AnalysisRecord.cow_id).where(AnalysisRecord.id.in_(ids)),
+            ))
+            session.query(AnalysisRecord).filter(AnalysisRecord.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+    return len(changed), len(removed)
+
+
+def sincronizar(client, token):
+    """Segue as páginas do /sync até has_more=False."""
+
+    total_bytes, requests, changes, deleted = 0, 0, 0, 0
+    start = time.perf_counter()
+    while True:
+        response = client.get('/sync', query_string={'since': token})
+        if response.status_code != 200:
+            raise RuntimeError(f"/sync devolveu {response.status_code}: {response.get_data(as_text=True)}")
+        total_bytes += len(response.data)
+        requests += 1
+        body = response.get_json()
+        changes += len(body['changes'])
+        deleted += len(body['deleted'])
+        token = body['next_token']
+        if not body['has_more']:
+            break
+    return {
+        'seconds': round(time.perf_counter() - start, 4),
+        'bytes': total_bytes,
+        'requests': requests,
+        'changes': changes,
+        'deleted': deleted,
+    }, token
+
+
+def download_completo(client, rows: int, pages: int):
+    total_bytes, start = 0, time.perf_counter()
+    for page in range(pages):
+        response = client.get('/analises', query_string={'limit': 500, 'offset': page * 500})
+        total_bytes += len(response.data)
+    seconds = time.perf_counter() - start
+    factor = rows / (pages * 500)
+    return {
+        'pages_measured': pages,
+        'seconds_estimated': round(seconds * factor, 2),
+        'bytes_estimated': int(total_bytes * factor),
+        'requests_estimated': -(-rows // 500),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do delta sync")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--cows', type=int, default=5000)
+    parser.add_argument('--change-pct', type=float, default=1.0, help="Percentual de análises alteradas")
+    parser.add_argument('--delete-pct', type=float, default=0.1, help="Parte das alteradas que é removida")
+    parser.add_argument('--full-pages', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-url', default=None)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.db_url:
+        workdir = tempfile.mkdtemp(prefix='bench_sync_')
+        args.db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['DATABASE_URL'] = args.db_url
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        import sync
+        from app import app as flask_app, model_features
+
+        if not model_features:
+            print("❌ Modelo não carregado; benchmark abortado", file=sys.stderr)
+            return 2
+
+        print(f"🌱 Populando {args.rows} análises em {args.db_url}", file=sys.stderr)
+        start = time.perf_counter()
+        popular_banco_core(args.rows, model_features, args.cows, args.seed)
+        seed_seconds = time.perf_counter() - start
+
+        client = flask_app.test_client()
+        token = estado_sincronizado()
+        no_change, token = sincronizar(client, token)
+
+        changed, removed = alterar_e_remover(args.change_pct, args.delete_pct, args.seed)
+        time.sleep(sync.SYNC_SETTLE_SECONDS + 1)
+        delta, token = sincronizar(client, token)
+        full = download_completo(client, args.rows, args.full_pages)
+
+    report = {
+        'rows': args.rows,
+        'seed_seconds': round(seed_seconds, 2),
+        'changed_rows': changed,
+        'deleted_rows': removed,
+        'sync_no_change': no_change,
+        'sync_delta': delta,
+        'full_download': full,
+        'bytes_ratio_delta_vs_full': round(delta['bytes'] / full['bytes_estimated'], 5),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    if delta['changes'] != changed or delta['deleted'] != removed:
+        print("❌ Delta sync não devolveu todas as alterações", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
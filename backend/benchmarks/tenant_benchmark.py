@@ -0,0 +1,149 @@
+# backend/benchmarks/tenant_benchmark.py
+"""
+Latência da listagem por fazenda conforme o número de fazendas cresce.
+
+Popula um SQLite temporário em degraus (`--tenants 1,10,100,500`), com
+`--rows-per-farm` análises por fazenda, e a cada degrau mede p50/p95 do
+GET /analises e do histórico de uma vaca para fazendas sorteadas (header
+X-Farm-Id). Com o filtro e os índices por fazenda, a latência deve ficar
+estável enquanto o total de linhas cresce.
+
+Uso (a partir de backend/):
+    python -m benchmarks.tenant_benchmark --tenants 1,10,100,500
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import STATUSES, gerar_features
+
+
+def popular_fazendas(first: int, last: int, rows_per_farm: int, cows_per_farm: int, features, seed: int):
+    """Insere as fazendas [first, last) em lote via Core."""
+
+    from sqlalchemy import insert
+
+    from db import AnalysisRecord, get_session, month_key
+
+    rng = random.Random(seed + first)
+    inicio = datetime(2025, 1, 1)
+    session = get_session()
+    try:
+        for farm in range(first, last):
+            farm_id = f"farm-{farm:05d}"
+            batch = []
+            for index in range(rows_per_farm):
+                payload = gerar_features(rng, features)
+                payload['cowId'] = f"COW-{rng.randrange(cows_per_farm):04d}"
+                prediction = rng.randint(0, 1)
+                stamp = inicio + timedelta(minutes=index * 37)
+                batch.append({
+                    'farm_id': farm_id,
+                    'month_key': month_key(stamp),
+                    'cow_id': payload['cowId'],
+                    'prediction': prediction,
+                    'prediction_label': 'SIM' if prediction == 1 else 'NÃO',
+                    'probability': round(rng.uniform(0.5, 1.0), 4),
+                    'payload': payload,
+                    'status': rng.choice(STATUSES),
+                    'notes': None,
+                    'created_at': stamp,
+                    'updated_at': stamp,
+                })
+            session.execute(insert(AnalysisRecord), batch)
+            session.commit()
+    finally:
+        session.close()
+
+
+def medir(client, tenants: int, cows_per_farm: int, requests: int, seed: int):
+    rng = random.Random(seed)
+    timings = {'analises_limit50': [], 'cow_history': []}
+    for _ in range(requests):
+        headers = {'X-Farm-Id': f"farm-{rng.randrange(tenants):05d}"}
+        for name, url in (
+            ('analises_limit50', '/analises?limit=50'),
+            ('cow_history', f"/cows/COW-{rng.randrange(cows_per_farm):04d}/history?limit=20"),
+        ):
+            start = time.perf_counter()
+            response = client.get(url, headers=headers)
+            timings[name].append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} devolveu {response.status_code}")
+    return {
+        name: {
+            'p50_ms': round(float(np.percentile(values, 50)) * 1000, 3),
+            'p95_ms': round(float(np.percentile(values, 95)) * 1000, 3),
+        }
+        for name, values in timings.items()
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Latência por fazenda x número de fazendas")
+    parser.add_argument('--tenants', default="1,10,100,500", help="Degraus de fazendas, crescentes")
+    parser.add_argument('--rows-per-farm', type=int, default=1000)
+    parser.add_argument('--cows-per-farm', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-url', default=None)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.db_url:
+        workdir = tempfile.mkdtemp(prefix='bench_tenant_')
+        args.db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['DATABASE_URL'] = args.db_url
+    # app.py resolve o modelo relativo a backend/
+    os.chdir(BACKEND_DIR)
+
+    steps = sorted(int(step) for step in args.tenants.split(',') if step)
+    results = []
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        from app import app as flask_app, model_features
+
+        if not model_features:
+            print("❌ Modelo não carregado; benchmark abortado", file=sys.stderr)
+            return 2
+
+        client = flask_app.test_client()
+        populated = 0
+        for tenants in steps:
+            print(f"🌱 Fazendas {populated} → {tenants}", file=sys.stderr)
+            popular_fazendas(populated, tenants, args.rows_per_farm, args.cows_per_farm, model_features, args.seed)
+            populated = tenants
+            results.append({
+                'tenants': tenants,
+                'total_rows': tenants * args.rows_per_farm,
+                **medir(client, tenants, args.cows_per_farm, args.requests, args.seed),
+            })
+
+    report = {
+        'rows_per_farm': args.rows_per_farm,
+        'requests_per_step': args.requests,
+        'steps': results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
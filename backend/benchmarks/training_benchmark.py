@@ -0,0 +1,164 @@
+# backend/benchmarks/training_benchmark.py
+"""
+Latência do /predict enquanto um treino roda pelo POST /models/train.
+
+Gera carga aberta no /predict (chegadas em ritmo fixo, `--rate` req/s) e
+mede p50/p95/p99 em três janelas:
+
+- baseline: sem treino;
+- training_nice_<N>: durante um job com a prioridade e os núcleos padrão
+  do job runner (`--nice`, `--cores`);
+- training_nice_0: durante o mesmo job sem redução de prioridade, para
+  mostrar o efeito do limite.
+
+O treino usa o cow_monitoring_data.csv replicado `--upsample` vezes (com
+ruído pequeno nas colunas numéricas, para não virar duplicata) para durar
+alguns segundos. Jobs, versões e banco ficam em um diretório temporário.
+
+Uso (a partir de backend/):
+    python -m benchmarks.training_benchmark --rate 20 --upsample 5
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_benchmark import gerar_payload
+
+ADMIN_TOKEN = 'bench-training'
+DATA_NAME = 'bench_training.csv'
+
+
+def preparar_dados(data_dir: str, upsample: int, seed: int) -> int:
+    df = pd.read_csv(os.path.join(BACKEND_DIR, 'cow_monitoring_data.csv'))
+    rng = np.random.default_rng(seed)
+    numeric = df.select_dtypes('number').columns
+    copies = []
+    for _ in range(upsample):
+        copy = df.copy()
+        copy[numeric] = copy[numeric] + rng.normal(0, 1e-3, (len(df), len(numeric))) * df[numeric].std().to_numpy()
+        copies.append(copy)
+    data = pd.concat(copies, ignore_index=True)
+    data.to_csv(os.path.join(data_dir, DATA_NAME), index=False)
+    return len(data)
+
+
+def carga(app, features, rate: float, seed: int, workers: int, until, max_seconds: float):
+    """Dispara /predict a `rate` req/s até `until()` ficar verdadeiro (ou max_seconds)."""
+
+    rng = random.Random(seed)
+    local = threading.local()
+
+    def run(payload):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        start = time.perf_counter()
+        response = local.client.post('/predict', json=payload)
+        return response.status_code, time.perf_counter() - start
+
+    futures = []
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        index = 0
+        while time.perf_counter() - start < max_seconds and not until():
+            delay = start + index * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(run, gerar_payload(rng, features, 500)))
+            index += 1
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - start
+
+    latencies = [elapsed for status, elapsed in results if status == 200]
+    return {
+        'seconds': round(wall, 1),
+        'requests': len(results),
+        'errors': sum(1 for status, _ in results if status != 200),
+        'latency_ms': {
+            f"p{q}": round(float(np.percentile(latencies, q)) * 1000, 2) for q in (50, 95, 99)
+        } if latencies else None,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="p99 do /predict durante o treino em segundo plano")
+    parser.add_argument('--rate', type=float, default=20.0, help="Requisições por segundo no /predict")
+    parser.add_argument('--baseline-seconds', type=float, default=15.0)
+    parser.add_argument('--max-seconds', type=float, default=300.0, help="Limite de cada janela de treino")
+    parser.add_argument('--upsample', type=int, default=5)
+    parser.add_argument('--nice', type=int, default=None, help="Nice do job (padrão: TRAINING_NICE)")
+    parser.add_argument('--cores', type=int, default=None, help="Núcleos do job (padrão: TRAINING_CORES)")
+    parser.add_argument('--workers', type=int, default=64, help="Threads do gerador de carga")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='bench_training_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['TRAINING_DIR'] = workdir
+    os.environ['TRAINING_DATA_DIR'] = workdir
+    os.environ['ADMIN_TOKEN'] = ADMIN_TOKEN
+    rows = preparar_dados(workdir, args.upsample, args.seed)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        import training_jobs
+        from app import app as flask_app, model_features
+
+        if not model_features:
+            print("❌ Modelo não carregado; benchmark abortado", file=sys.stderr)
+            return 2
+        admin = flask_app.test_client()
+        headers = {'X-Admin-Token': ADMIN_TOKEN}
+        nice = training_jobs.TRAINING_NICE if args.nice is None else args.nice
+        cores = training_jobs.TRAINING_CORES if args.cores is None else args.cores
+
+        print(f"⏱️  baseline ({args.baseline_seconds:.0f}s a {args.rate} req/s)", file=sys.stderr)
+        report = {'rate_rps': args.rate, 'training_rows': rows, 'cpu_count': os.cpu_count()}
+        report['baseline'] = carga(
+            flask_app, model_features, args.rate, args.seed, args.workers, lambda: False, args.baseline_seconds,
+        )
+
+        for job_nice in dict.fromkeys((nice, 0)):
+            label = f'training_nice_{job_nice}'
+            print(f"⏱️  {label}", file=sys.stderr)
+            response = admin.post('/models/train', json={'data': DATA_NAME, 'nice': job_nice, 'cores': cores},
+                                  headers=headers)
+            job_id = response.get_json()['id']
+
+            def terminou():
+                return admin.get(f'/models/train/{job_id}', headers=headers).get_json()['state'] in (
+                    training_jobs.FINAL_STATES
+                )
+
+            window = carga(flask_app, model_features, args.rate, args.seed, args.workers, terminou, args.max_seconds)
+            job = admin.get(f'/models/train/{job_id}', headers=headers).get_json()
+            window['job'] = {key: job[key] for key in ('state', 'timings', 'version', 'error', 'options')}
+            report[label] = window
+            time.sleep(1)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
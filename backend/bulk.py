@@ -0,0 +1,232 @@
+# backend/bulk.py
+"""
+Alteração e remoção de análises em massa.
+
+As análises alvo vêm de uma lista de ids ou de um filtro (cow_id, status,
+faixa de created_at) e são processadas em chunks de ids: cada chunk lê o
+estado anterior das linhas em uma consulta, aplica um único UPDATE ou
+DELETE com `id IN (...)` e ajusta, na mesma transação, o que deriva delas:
+
+- agregados do dashboard (status entra na chave de `analysis_rollups`);
+- cópia das notas em `analysis_notes` (busca textual);
+- tombstones do /sync para as removidas (as alteradas ganham updated_at
+  novo pelo onupdate da coluna);
+- eventos do /analises/stream, publicados quando o chunk é confirmado.
+
+Cada chunk é uma transação, com uma pausa entre chunks para não segurar
+locks e o pool do banco por toda a operação. Um erro interrompe o
+processamento: o chunk com erro é desfeito e os seguintes ficam como
+`skipped`, e cada id volta com o seu resultado.
+"""
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+import events
+from db import AnalysisNote, AnalysisRecord, gravar_tombstones
+from rollups import aplicar, contribuicoes
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_PAUSE_MS = int(os.getenv("BULK_PAUSE_MS", "10"))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "50000"))
+STATUS_MAX_LENGTH = 32
+FILTER_FIELDS = ('cow_id', 'status', 'created_from', 'created_to')
+
+_ESTADO = (
+    AnalysisRecord.id, AnalysisRecord.farm_id, AnalysisRecord.cow_id, AnalysisRecord.created_at,
+    AnalysisRecord.prediction_label, AnalysisRecord.status, AnalysisRecord.probability,
+)
+
+
+def validar_alteracoes(changes) -> dict:
+    if not isinstance(changes, dict) or not changes:
+        raise ValueError("Informe 'changes' com status e/ou notes")
+    unknown = set(changes) - {'status', 'notes'}
+    if unknown:
+        raise ValueError(f"Campos não suportados em massa: {sorted(unknown)}")
+    if 'status' in changes:
+        status = changes['status']
+        if not isinstance(status, str) or not status or len(status) > STATUS_MAX_LENGTH:
+            raise ValueError(f"status deve ser um texto de 1 a {STATUS_MAX_LENGTH} caracteres")
+    if 'notes' in changes and changes['notes'] is not None and not isinstance(changes['notes'], str):
+        raise ValueError("notes deve ser texto ou null")
+    return dict(changes)
+
+
+def _data(filtro: dict, name: str):
+    value = filtro.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"{name} deve estar em ISO 8601") from None
+
+
+def resolver_alvos(session, body: dict):
+    """
+    Ids alvo a partir de `ids` (ordem pedida, sem repetidos) ou de `filter`
+    (ids que casam hoje, em ordem crescente).
+    """
+
+    ids, filtro = body.get('ids'), body.get('filter')
+    if (ids is None) == (filtro is None):
+        raise ValueError("Informe 'ids' ou 'filter' (um dos dois)")
+
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ValueError("ids deve ser uma lista não vazia")
+        if len(ids) > BULK_MAX_ROWS:
+            raise ValueError(f"Máximo de {BULK_MAX_ROWS} ids por requisição")
+        try:
+            requested = list(dict.fromkeys(int(value) for value in ids))
+        except (TypeError, ValueError):
+            raise ValueError("ids deve conter apenas inteiros") from None
+        return requested
+
+    if not isinstance(filtro, dict) or not any(filtro.get(field) for field in FILTER_FIELDS):
+        raise ValueError(f"filter precisa de ao menos um de {list(FILTER_FIELDS)}")
+    unknown = set(filtro) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Filtros não suportados: {sorted(unknown)}")
+
+    query = select(AnalysisRecord.id)
+    if filtro.get('cow_id'):
+        query = query.where(AnalysisRecord.cow_id == str(filtro['cow_id']))
+    if filtro.get('status'):
+        query = query.where(AnalysisRecord.status == str(filtro['status']))
+    created_from, created_to = _data(filtro, 'created_from'), _data(filtro, 'created_to')
+    if created_from:
+        query = query.where(AnalysisRecord.created_at >= created_from)
+    if created_to:
+        query = query.where(AnalysisRecord.created_at < created_to)
+
+    # O filtro de fazenda entra pelo do_orm_execute da sessão
+    found = list(session.scalars(query.order_by(AnalysisRecord.id).limit(BULK_MAX_ROWS + 1)))
+    if len(found) > BULK_MAX_ROWS:
+        raise ValueError(f"O filtro seleciona mais de {BULK_MAX_ROWS} análises; restrinja a faixa")
+    return found
+
+
+def _chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _ajustar_agregados(connection, before, status=None) -> None:
+    """Tira a contribuição das linhas antigas e, se houve troca de status, soma a das novas."""
+
+    rows = [(row.farm_id, row.created_at, row.prediction_label, row.status, row.probability) for row in before]
+    rollup, bins = contribuicoes(rows, sign=-1)
+    if status is not None:
+        new_rollup, new_bins = contribuicoes(
+            (farm_id, created_at, label, status, probability) for farm_id, created_at, label, _, probability in rows
+        )
+        for key, (count, probability_sum) in new_rollup.items():
+            rollup[key][0] += count
+            rollup[key][1] += probability_sum
+        for key, count in new_bins.items():
+            bins[key] += count
+    aplicar(connection, rollup, bins)
+
+
+def _atualizar_chunk(session, ids, changes):
+    before = session.execute(select(*_ESTADO).where(AnalysisRecord.id.in_(ids))).all()
+    found = [row.id for row in before]
+    if not found:
+        return found
+
+    session.execute(
+        update(AnalysisRecord).where(AnalysisRecord.id.in_(found)).values(**changes),
+        execution_options={'synchronize_session': False},
+    )
+    connection = session.connection()
+    if 'status' in changes:
+        changed = [row for row in before if row.status != changes['status']]
+        if changed:
+            _ajustar_agregados(connection, changed, status=changes['status'])
+    if 'notes' in changes:
+        notes_table = AnalysisNote.__table__
+        connection.execute(delete(notes_table).where(notes_table.c.analysis_id.in_(found)))
+        if changes['notes']:
+            connection.execute(insert(notes_table), [
+                {'analysis_id': row.id, 'farm_id': row.farm_id, 'notes': changes['notes']} for row in before
+            ])
+    events.registrar(session, [
+        events.novo_evento(
+            'updated', row.id, row.farm_id, row.cow_id, changes.get('status', row.status),
+            row.prediction_label, row.probability,
+        )
+        for row in before
+    ])
+    return found
+
+
+def _remover_chunk(session, ids, _changes=None):
+    before = session.execute(select(*_ESTADO).where(AnalysisRecord.id.in_(ids))).all()
+    found = [row.id for row in before]
+    if not found:
+        return found
+
+    connection = session.connection()
+    gravar_tombstones(connection, [
+        {'analysis_id': row.id, 'cow_id': row.cow_id, 'farm_id': row.farm_id} for row in before
+    ])
+    session.execute(
+        delete(AnalysisRecord).where(AnalysisRecord.id.in_(found)),
+        execution_options={'synchronize_session': False},
+    )
+    notes_table = AnalysisNote.__table__
+    connection.execute(delete(notes_table).where(notes_table.c.analysis_id.in_(found)))
+    _ajustar_agregados(connection, before)
+    events.registrar(session, [
+        events.novo_evento(
+            'deleted', row.id, row.farm_id, row.cow_id, row.status, row.prediction_label, row.probability,
+        )
+        for row in before
+    ])
+    return found
+
+
+def _processar(session, ids, operation, outcome, changes=None, chunk_size=None, pause_ms=None):
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    pause = (BULK_PAUSE_MS if pause_ms is None else pause_ms) / 1000
+    results = {}
+    chunks = list(_chunks(ids, chunk_size))
+    error = None
+    for index, chunk in enumerate(chunks):
+        if error is not None:
+            results.update({analysis_id: 'skipped' for analysis_id in chunk})
+            continue
+        try:
+            found = set(operation(session, chunk, changes))
+            session.commit()
+        except SQLAlchemyError as exc:
+            session.rollback()
+            error = exc
+            results.update({analysis_id: 'error' for analysis_id in chunk})
+            continue
+        results.update({analysis_id: outcome if analysis_id in found else 'not_found' for analysis_id in chunk})
+        if pause and index < len(chunks) - 1:
+            time.sleep(pause)
+
+    summary = {}
+    for value in results.values():
+        summary[value] = summary.get(value, 0) + 1
+    return {
+        'requested': len(ids),
+        'chunks': len(chunks),
+        'summary': summary,
+        'results': [{'id': analysis_id, 'outcome': results[analysis_id]} for analysis_id in ids],
+    }, error
+
+
+def atualizar(session, ids, changes, chunk_size=None, pause_ms=None):
+    return _processar(session, ids, _atualizar_chunk, 'updated', changes, chunk_size, pause_ms)
+
+
+def remover(session, ids, chunk_size=None, pause_ms=None):
+    return _processar(session, ids, _remover_chunk, 'deleted', None, chunk_size, pause_ms)
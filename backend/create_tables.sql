@@ -1,5 +1,13 @@
+-- cow_analyses é particionada por mês (month_key = AAAAMM de created_at) e
+-- subparticionada por fazenda: consultas com farm_id (e opcionalmente month_key)
+-- leem só as subpartições correspondentes. No MySQL toda chave única de uma
+-- tabela particionada precisa conter as colunas de partição, por isso a PK é
+-- (id, farm_id, month_key); o id continua único pelo AUTO_INCREMENT.
+-- Novas partições mensais: python scripts/manage_partitions.py
 CREATE TABLE IF NOT EXISTS cow_analyses (
-  id INT AUTO_INCREMENT PRIMARY KEY,
+  id INT AUTO_INCREMENT,
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  month_key INT NOT NULL,
   cow_id VARCHAR(128) NOT NULL,
   prediction TINYINT NOT NULL,
   prediction_label VARCHAR(8) NOT NULL,
@@ -8,5 +16,104 @@ CREATE TABLE IF NOT EXISTS cow_analyses (
   status VARCHAR(32) DEFAULT 'completed',
   notes TEXT NULL,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  updated_at TIMESTAMP NULL ON UPDATE CURRENT_TIMESTAMP
+  age FLOAT NULL,
+  weight FLOAT NULL,
+  previous_pregnancies FLOAT NULL,
+  body_condition FLOAT NULL,
+  days_since_insemination FLOAT NULL,
+  milk_production FLOAT NULL,
+  body_temperature FLOAT NULL,
+  updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (id, farm_id, month_key),
+  INDEX ix_cow_analyses_farm_id_id (farm_id, id),
+  INDEX ix_cow_analyses_farm_cow_created (farm_id, cow_id, created_at),
+  INDEX ix_cow_analyses_farm_updated_at_id (farm_id, updated_at, id),
+  INDEX ix_cow_analyses_farm_age (farm_id, age),
+  INDEX ix_cow_analyses_farm_weight (farm_id, weight),
+  INDEX ix_cow_analyses_farm_previous_pregnancies (farm_id, previous_pregnancies),
+  INDEX ix_cow_analyses_farm_body_condition (farm_id, body_condition),
+  INDEX ix_cow_analyses_farm_days_since_insemination (farm_id, days_since_insemination),
+  INDEX ix_cow_analyses_farm_milk_production (farm_id, milk_production),
+  INDEX ix_cow_analyses_farm_body_temperature (farm_id, body_temperature)
+)
+PARTITION BY RANGE (month_key)
+SUBPARTITION BY KEY (farm_id) SUBPARTITIONS 16 (
+  PARTITION p_hist VALUES LESS THAN (202601),
+  PARTITION p202601 VALUES LESS THAN (202602),
+  PARTITION p202602 VALUES LESS THAN (202603),
+  PARTITION p202603 VALUES LESS THAN (202604),
+  PARTITION p202604 VALUES LESS THAN (202605),
+  PARTITION p202605 VALUES LESS THAN (202606),
+  PARTITION p202606 VALUES LESS THAN (202607),
+  PARTITION p202607 VALUES LESS THAN (202608),
+  PARTITION p202608 VALUES LESS THAN (202609),
+  PARTITION p202609 VALUES LESS THAN (202610),
+  PARTITION p202610 VALUES LESS THAN (202611),
+  PARTITION p202611 VALUES LESS THAN (202612),
+  PARTITION p202612 VALUES LESS THAN (202701),
+  PARTITION p202701 VALUES LESS THAN (202702),
+  PARTITION p202702 VALUES LESS THAN (202703),
+  PARTITION p202703 VALUES LESS THAN (202704),
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS cow_analysis_tombstones (
+  analysis_id INT PRIMARY KEY,
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  cow_id VARCHAR(128) NOT NULL,
+  deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX ix_cow_analysis_tombstones_farm_deleted_at_id (farm_id, deleted_at, analysis_id)
+);
+
+CREATE TABLE IF NOT EXISTS sync_client_keys (
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  client_key VARCHAR(64) NOT NULL,
+  analysis_id INT NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (farm_id, client_key)
+);
+
+CREATE TABLE IF NOT EXISTS analysis_rollups (
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  bucket_size VARCHAR(8) NOT NULL,
+  bucket_start DATETIME NOT NULL,
+  prediction_label VARCHAR(8) NOT NULL,
+  status VARCHAR(32) NOT NULL,
+  count INT NOT NULL DEFAULT 0,
+  probability_sum DOUBLE NOT NULL DEFAULT 0,
+  PRIMARY KEY (farm_id, bucket_size, bucket_start, prediction_label, status)
+);
+
+CREATE TABLE IF NOT EXISTS confidence_rollups (
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  bucket_size VARCHAR(8) NOT NULL,
+  bucket_start DATETIME NOT NULL,
+  bin TINYINT NOT NULL,
+  count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (farm_id, bucket_size, bucket_start, bin)
+);
+
+-- Cópia das notas para busca textual: FULLTEXT não é permitido na tabela particionada.
+CREATE TABLE IF NOT EXISTS analysis_notes (
+  analysis_id INT PRIMARY KEY,
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  notes TEXT NOT NULL,
+  FULLTEXT KEY ft_analysis_notes_notes (notes)
+);
+
+-- Alertas do detector de anomalias de comportamento (POST /readings).
+CREATE TABLE IF NOT EXISTS health_alerts (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  cow_id VARCHAR(128) NOT NULL,
+  metric VARCHAR(32) NOT NULL,
+  direction VARCHAR(8) NOT NULL,
+  value DOUBLE NOT NULL,
+  baseline DOUBLE NOT NULL,
+  baseline_std DOUBLE NOT NULL,
+  z_score DOUBLE NOT NULL,
+  reading_at DATETIME NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX ix_health_alerts_farm_id_id (farm_id, id),
+  INDEX ix_health_alerts_farm_cow_id (farm_id, cow_id, id)
 );
@@ -1,5 +1,7 @@
 # backend/db.py
+import math
 import os
+from datetime import datetime
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -8,13 +10,19 @@ from sqlalchemy import (
     Column,
     DateTime,
     Float,
+    Index,
     Integer,
     String,
     Text,
     create_engine,
+    delete,
+    event,
+    extract,
     func,
+    insert,
 )
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import declarative_base, sessionmaker, with_loader_criteria
 
 BASE_DIR = Path(__file__).resolve().parent
 ENV_PATH = BASE_DIR / ".env"
@@ -27,26 +35,115 @@ PASS = os.getenv("DB_PASS")
 HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME")
 
-if not all([USER, PASS, HOST, DB_NAME]):
-    raise RuntimeError(
-        "Credenciais do banco não encontradas. Verifique o arquivo backend/.env"
-    )
+# DATABASE_URL permite apontar para um banco local (ex.: SQLite nos benchmarks)
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+if DATABASE_URL:
+    CONN_STR = DATABASE_URL
+else:
+    if not all([USER, PASS, HOST, DB_NAME]):
+        raise RuntimeError(
+            "Credenciais do banco não encontradas. Verifique o arquivo backend/.env"
+        )
+    CONN_STR = f"mysql+pymysql://{USER}:{PASS}@{HOST}/{DB_NAME}"
 
-CONN_STR = f"mysql+pymysql://{USER}:{PASS}@{HOST}/{DB_NAME}"
-engine = create_engine(CONN_STR, pool_recycle=3600, pool_pre_ping=True)
+if CONN_STR.startswith("sqlite"):
+    engine = create_engine(
+        CONN_STR,
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+else:
+    engine = create_engine(CONN_STR, pool_recycle=3600, pool_pre_ping=True)
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+# Fazenda usada por clientes que ainda não enviam X-Farm-Id (e pelas linhas anteriores ao multi-tenant)
+DEFAULT_FARM_ID = os.getenv("DEFAULT_FARM_ID", "default")
+
+# No SQLite o CURRENT_TIMESTAMP é gravado sem frações de segundo; os parâmetros
+# precisam do mesmo formato para as comparações de marca d'água do /sync.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+
+def month_key(value=None) -> int:
+    """
+    Chave de partição mensal (AAAAMM) de um created_at.
+    """
+
+    value = value or datetime.now()
+    return value.year * 100 + value.month
+
+
+# Features do modelo, guardadas em colunas tipadas e indexadas (fora do payload JSON)
+FEATURE_COLUMNS = (
+    "age",
+    "weight",
+    "previous_pregnancies",
+    "body_condition",
+    "days_since_insemination",
+    "milk_production",
+    "body_temperature",
+)
+
+
+def feature_value(value):
+    try:
+        number = float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError, OverflowError):
+        return None
+    # "nan"/"inf" viram NULL no SQLite e JSON inválido na volta: ficam no JSON como texto
+    return number if number is None or math.isfinite(number) else None
+
+
+def separar_features(payload):
+    """
+    Divide o payload enviado pelo app em (extras, features): as features com
+    valor numérico vão para as colunas; o resto, inclusive uma feature com
+    valor que não é número, fica no JSON.
+    """
+
+    if not isinstance(payload, dict):
+        return payload, {feature: None for feature in FEATURE_COLUMNS}
+    features = {feature: feature_value(payload.get(feature)) for feature in FEATURE_COLUMNS}
+    extras = {
+        key: value for key, value in payload.items()
+        if key not in FEATURE_COLUMNS or (features[key] is None and value not in (None, ""))
+    }
+    return extras, features
+
+
+# month_key de um created_at vindo do default do banco: o mesmo relógio (e fuso) do
+# CURRENT_TIMESTAMP/NOW(), avaliado uma vez por instrução junto com o created_at
+MONTH_KEY_NOW = extract("year", func.now()) * 100 + extract("month", func.now())
+
 
-class AnalysisRecord(Base):
+class FarmScoped:
+    """
+    Mixin das tabelas separadas por fazenda; sessões abertas com farm_id só enxergam a própria.
+    """
+
+    farm_id = Column(String(64), nullable=False, default=DEFAULT_FARM_ID)
+
+
+class AnalysisRecord(FarmScoped, Base):
     """
     ORM responsável por mapear as análises de prenhez salvas no banco.
+
+    No MySQL a tabela é particionada por mês (month_key) e subparticionada
+    por fazenda (ver create_tables.sql); a chave primária física é
+    (id, farm_id, month_key), mas o id continua único pelo AUTO_INCREMENT.
     """
 
     __tablename__ = "cow_analyses"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
+    month_key = Column(Integer, nullable=False, default=MONTH_KEY_NOW)
     cow_id = Column(String(128), nullable=False)
     prediction = Column(Integer, nullable=False)
     prediction_label = Column(String(8), nullable=False)
@@ -54,13 +151,116 @@ class AnalysisRecord(Base):
     payload = Column(JSON, nullable=False)
     status = Column(String(32), nullable=False, default="completed")
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    age = Column(Float, nullable=True)
+    weight = Column(Float, nullable=True)
+    previous_pregnancies = Column(Float, nullable=True)
+    body_condition = Column(Float, nullable=True)
+    days_since_insemination = Column(Float, nullable=True)
+    milk_production = Column(Float, nullable=True)
+    body_temperature = Column(Float, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+    # Preenchido também na criação: é a marca d'água do /sync
     updated_at = Column(
-        DateTime(timezone=True),
+        Timestamp,
         nullable=True,
+        default=func.now(),
         onupdate=func.now(),
     )
 
+    __table_args__ = (
+        Index("ix_cow_analyses_farm_id_id", "farm_id", "id"),
+        Index("ix_cow_analyses_farm_cow_created", "farm_id", "cow_id", "created_at"),
+        Index("ix_cow_analyses_farm_updated_at_id", "farm_id", "updated_at", "id"),
+        *(Index(f"ix_cow_analyses_farm_{feature}", "farm_id", feature) for feature in FEATURE_COLUMNS),
+        # Sem AUTOINCREMENT o SQLite reaproveita o maior id depois de uma remoção
+        {"sqlite_autoincrement": True},
+    )
+
+
+@event.listens_for(AnalysisRecord, "before_insert")
+def _month_key_do_created_at(mapper, connection, target):
+    # created_at informado pela aplicação: a partição segue ele, não o relógio do banco
+    if target.month_key is None and target.created_at is not None:
+        target.month_key = month_key(target.created_at)
+
+
+@event.listens_for(AnalysisRecord.payload, "set", retval=True)
+def _separar_features(target, value, oldvalue, initiator):
+    # Atribuir o payload (criação e PUT) grava as features nas colunas e guarda só os extras no JSON
+    extras, features = separar_features(value)
+    for feature, feature_val in features.items():
+        setattr(target, feature, feature_val)
+    return extras
+
+
+class AnalysisNote(FarmScoped, Base):
+    """
+    Cópia das notas para a busca textual: no MySQL o índice FULLTEXT não é
+    permitido na tabela particionada, então fica nesta tabela auxiliar (no
+    SQLite, um índice FTS5 sobre ela; ver search.py).
+    """
+
+    __tablename__ = "analysis_notes"
+
+    analysis_id = Column(Integer, primary_key=True, autoincrement=False)
+    notes = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ft_analysis_notes_notes", "notes", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
+
+class AnalysisTombstone(FarmScoped, Base):
+    """
+    Registro das análises removidas, para o /sync avisar os clientes offline.
+    """
+
+    __tablename__ = "cow_analysis_tombstones"
+
+    analysis_id = Column(Integer, primary_key=True, autoincrement=False)
+    cow_id = Column(String(128), nullable=False)
+    deleted_at = Column(Timestamp, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_cow_analysis_tombstones_farm_deleted_at_id", "farm_id", "deleted_at", "analysis_id"),
+    )
+
+
+def gravar_tombstones(connection, source) -> None:
+    """
+    Grava os tombstones das análises removidas. `source` é uma lista de
+    linhas (analysis_id, cow_id, farm_id) ou um select com essas colunas.
+    Um id reaproveitado (AUTO_INCREMENT do MySQL volta a max(id)+1 ao
+    reiniciar) troca o tombstone antigo em vez de violar a chave primária.
+    """
+
+    table = AnalysisTombstone.__table__
+    if isinstance(source, list):
+        if not source:
+            return
+        ids = [row["analysis_id"] for row in source]
+        statement = insert(table)
+        params = source
+    else:
+        ids = source.with_only_columns(source.selected_columns[0])
+        statement = insert(table).from_select(["analysis_id", "cow_id", "farm_id"], source)
+        params = None
+    connection.execute(delete(table).where(table.c.analysis_id.in_(ids)))
+    connection.execute(statement, params)
+
+
+class SyncClientKey(FarmScoped, Base):
+    """
+    Chaves de idempotência enviadas pelo app no push do /sync.
+    """
+
+    __tablename__ = "sync_client_keys"
+
+    farm_id = Column(String(64), primary_key=True, default=DEFAULT_FARM_ID)
+    client_key = Column(String(64), primary_key=True)
+    analysis_id = Column(Integer, nullable=False)
+    created_at = Column(Timestamp, server_default=func.now())
+
 
 def init_db() -> None:
     """
@@ -70,9 +270,92 @@ def init_db() -> None:
     Base.metadata.create_all(bind=engine)
 
 
-def get_session():
+class AnalysisRollup(FarmScoped, Base):
+    """
+    Contagens pré-agregadas do dashboard por janela de tempo (hora/dia/mês), rótulo e status.
+    """
+
+    __tablename__ = "analysis_rollups"
+
+    farm_id = Column(String(64), primary_key=True, default=DEFAULT_FARM_ID)
+    bucket_size = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    prediction_label = Column(String(8), primary_key=True)
+    status = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)
+
+
+class ConfidenceRollup(FarmScoped, Base):
+    """
+    Histograma pré-agregado da probabilidade de prenhez (bins de 0.1) por janela de tempo.
+    """
+
+    __tablename__ = "confidence_rollups"
+
+    farm_id = Column(String(64), primary_key=True, default=DEFAULT_FARM_ID)
+    bucket_size = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    bin = Column(Integer, primary_key=True, autoincrement=False)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class HealthAlert(FarmScoped, Base):
+    """
+    Alertas de comportamento emitidos pelo detector de anomalias (anomaly.py).
+    """
+
+    __tablename__ = "health_alerts"
+
+    id = Column(Integer, primary_key=True)
+    cow_id = Column(String(128), nullable=False)
+    metric = Column(String(32), nullable=False)
+    direction = Column(String(8), nullable=False)
+    value = Column(Float, nullable=False)
+    baseline = Column(Float, nullable=False)
+    baseline_std = Column(Float, nullable=False)
+    z_score = Column(Float, nullable=False)
+    reading_at = Column(DateTime, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_health_alerts_farm_id_id", "farm_id", "id"),
+        Index("ix_health_alerts_farm_cow_id", "farm_id", "cow_id", "id"),
+    )
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _filtrar_fazenda(execute_state):
+    farm_id = execute_state.session.info.get("farm_id")
+    if farm_id is None or execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if execute_state.is_select or execute_state.is_update or execute_state.is_delete:
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                FarmScoped,
+                lambda cls: cls.farm_id == farm_id,
+                include_aliases=True,
+            )
+        )
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _preencher_fazenda(session, flush_context, instances):
+    farm_id = session.info.get("farm_id")
+    if farm_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, FarmScoped) and obj.farm_id is None:
+            obj.farm_id = farm_id
+
+
+def get_session(farm_id=None):
     """
     Helper para obter uma sessão nova do SQLAlchemy.
+
+    Com `farm_id`, consultas, updates e deletes do ORM ficam restritos à
+    fazenda e os registros novos são gravados nela; sem ele (scripts de
+    manutenção e retreino) a sessão enxerga todas as fazendas.
     """
 
-    return SessionLocal()
+    return SessionLocal(info={"farm_id": farm_id})
@@ -0,0 +1,186 @@
+# backend/early_exit.py
+"""
+Avaliação da floresta de prenhez com parada antecipada.
+
+A probabilidade da floresta é a média das probabilidades das folhas de cada
+árvore. Depois de avaliar k das n árvores com soma parcial S, a média final
+fica presa no intervalo
+
+    [(S + mínimo das restantes) / n, (S + máximo das restantes) / n]
+
+em que mínimo/máximo das restantes somam a menor e a maior folha de cada
+árvore ainda não avaliada (pré-computadas ao carregar o modelo). Quando o
+intervalo inteiro fica de um lado de 0.5, nenhuma árvore restante consegue
+virar o rótulo e a avaliação para: o rótulo é o mesmo da floresta completa.
+
+As árvores são avaliadas na ordem da floresta. Cada árvore do RandomForest
+cresce de um bootstrap e de sorteios de features independentes, então
+qualquer prefixo é uma amostra sem viés da floresta e a média das k
+primeiras estima bem a probabilidade final. Ordens "espertas" (por exemplo,
+as árvores que mais concordam com a floresta primeiro) garantem o rótulo
+com menos árvores, mas a média do prefixo passa a exagerar a confiança; o
+benchmarks/early_exit_benchmark.py mede as duas. Com orçamento de latência,
+a avaliação também para quando o tempo acaba; aí o rótulo vem da média das
+árvores avaliadas e o intervalo diz se ele ainda poderia virar.
+
+A travessia é feita em Python puro sobre listas: para uma linha, cada
+árvore custa uma fração de microssegundo, contra alguns microssegundos do
+`tree_.apply` e o custo fixo do Parallel no `predict_proba` da floresta.
+"""
+import time
+
+import numpy as np
+
+THRESHOLD = 0.5
+# Folga para a diferença de arredondamento entre a nossa soma e a do sklearn
+EPSILON = 1e-9
+
+
+class EarlyExitForest:
+    """
+    Árvores de um Pipeline(pré-processamento, RandomForest) achatadas em
+    listas, na ordem de avaliação, com os limites das árvores restantes.
+    """
+
+    def __init__(self, pipeline, features, order=None):
+        self.preprocessor = pipeline[:-1]
+        self.forest = pipeline[-1]
+        self.features = list(features)
+
+        classes = self.forest.classes_.tolist()
+        if len(classes) != 2:
+            raise ValueError(f"Parada antecipada exige duas classes, a floresta tem {len(classes)}")
+        self.classes = classes
+        positive = classes.index(1) if 1 in classes else 1
+        n_features = self.forest.n_features_in_
+        if n_features != len(self.features):
+            raise ValueError(
+                f"Floresta usa {n_features} colunas, mas o modelo declara {len(self.features)} features"
+            )
+
+        trees = [estimator.tree_ for estimator in self.forest.estimators_]
+        probs = [self._prob_positiva(tree, positive) for tree in trees]
+        self.order = list(range(len(trees))) if order is None else [int(index) for index in order]
+        if sorted(self.order) != list(range(len(trees))):
+            raise ValueError("A ordem de avaliação precisa conter cada árvore exatamente uma vez")
+
+        self.n_trees = len(trees)
+        # Para lotes (probabilities): tree_ do sklearn e a probabilidade de SIM por nó
+        self.batch_trees = list(zip(trees, probs))
+        self.trees = []
+        leaf_min, leaf_max = [], []
+        for index in self.order:
+            tree, prob = trees[index], probs[index]
+            leaves = tree.children_left == -1
+            leaf_min.append(float(prob[leaves].min()))
+            leaf_max.append(float(prob[leaves].max()))
+            self.trees.append((
+                tree.children_left.tolist(),
+                tree.children_right.tolist(),
+                tree.feature.tolist(),
+                tree.threshold.tolist(),
+                prob.tolist(),
+            ))
+        # remaining_*[k]: soma das folhas extremas das árvores k..n-1
+        remaining_min = np.concatenate([np.cumsum(leaf_min[::-1])[::-1], [0.0]])
+        remaining_max = np.concatenate([np.cumsum(leaf_max[::-1])[::-1], [0.0]])
+        self.remaining_min = remaining_min.tolist()
+        self.remaining_max = remaining_max.tolist()
+        # Antes de first_check nenhuma linha consegue garantir o rótulo: nem
+        # com as k primeiras árvores todas no extremo. Pula a verificação.
+        done_min = remaining_min[0] - remaining_min
+        done_max = remaining_max[0] - remaining_max
+        half = self.n_trees * THRESHOLD
+        possible = np.flatnonzero((done_max + remaining_min > half) | (done_min + remaining_max < half))
+        self.first_check = int(possible[0]) if possible.size else self.n_trees
+
+    @staticmethod
+    def _prob_positiva(tree, positive):
+        value = tree.value[:, 0, :]
+        return value[:, positive] / value.sum(axis=1)
+
+    def transform(self, X):
+        # float32, como no tree_.apply: os splits comparam exatamente os mesmos valores
+        return np.asarray(self.preprocessor.transform(X), dtype=np.float32).tolist()
+
+    def score_row(self, x, deadline=None, min_trees=1, stop_when_certain=True):
+        """
+        Avalia uma linha já pré-processada até o rótulo ficar garantido, as
+        árvores acabarem ou `deadline` (perf_counter) passar.
+        `stop_when_certain=False` avalia todas (referência para comparação).
+        """
+
+        n = self.n_trees
+        half = n * THRESHOLD
+        remaining_min, remaining_max = self.remaining_min, self.remaining_max
+        first_check = self.first_check if stop_when_certain else n + 1
+        total = 0.0
+        k = 0
+        stopped_by = 'complete'
+        for left, right, feature, threshold, prob in self.trees:
+            node = 0
+            while left[node] != -1:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            total += prob[node]
+            k += 1
+            if k >= first_check and (
+                total + remaining_min[k] > half + EPSILON or total + remaining_max[k] < half - EPSILON
+            ):
+                if k < n:
+                    stopped_by = 'certain'
+                break
+            if deadline is not None and k >= min_trees and time.perf_counter() >= deadline:
+                if k < n:
+                    stopped_by = 'budget'
+                break
+
+        lower = (total + remaining_min[k]) / n
+        upper = (total + remaining_max[k]) / n
+        # Média das avaliadas como estimativa, sem sair do intervalo garantido
+        probability = min(max(total / k, lower), upper)
+        if lower > THRESHOLD + EPSILON:
+            positive = True
+        elif upper < THRESHOLD - EPSILON:
+            positive = False
+        else:
+            positive = probability > THRESHOLD
+        return {
+            'prediction': self.classes[1] if positive else self.classes[0],
+            'probability': probability,
+            'trees_evaluated': k,
+            'n_trees': n,
+            'stopped_by': stopped_by,
+            # Limite de virada: a probabilidade da floresta completa está neste
+            # intervalo; se ele cruza 0.5, as árvores restantes podem virar o rótulo
+            'probability_bounds': [lower, upper],
+            'label_can_flip': lower <= THRESHOLD + EPSILON and upper >= THRESHOLD - EPSILON,
+        }
+
+    def probabilities(self, X):
+        """
+        Probabilidade de SIM da floresta completa para um lote, sem parada
+        antecipada: um `tree_.apply` vetorizado por árvore sobre a matriz
+        inteira, sem o Parallel nem as matrizes (linhas x classes) do
+        `predict_proba`. Mesmo resultado do pipeline.
+        """
+
+        Xt = np.ascontiguousarray(self.preprocessor.transform(X), dtype=np.float32)
+        total = np.zeros(Xt.shape[0])
+        for tree, prob in self.batch_trees:
+            total += prob[tree.apply(Xt)]
+        return total / self.n_trees
+
+    def score(self, X, budget_ms=None):
+        """
+        Um resultado por linha de X. O orçamento conta desde a chamada
+        (pré-processamento incluso) e vale para o lote inteiro.
+        """
+
+        start = time.perf_counter()
+        deadline = None if budget_ms is None else start + budget_ms / 1000
+        results = [self.score_row(x, deadline) for x in self.transform(X)]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for result in results:
+            result['elapsed_ms'] = elapsed_ms
+        return results
+
@@ -0,0 +1,238 @@
+# backend/events.py
+"""
+Eventos de alteração das análises para o app (SSE e long-poll).
+
+Toda escrita em `cow_analyses` feita pela sessão (criação, alteração,
+remoção, em massa ou não) registra um evento compacto na sessão; só depois
+do commit os eventos entram no ChangeHub, um buffer circular em memória
+com uma Condition. Cada assinante (GET /analises/stream ou
+GET /analises/changes) espera na Condition com o seu cursor e filtra por
+fazenda e vaca: nenhum assinante segura conexão com o banco, e um app
+ocioso custa uma thread parada, não uma consulta a cada poll.
+
+Os ids dos eventos são "<boot>:<seq>". Um cliente que volta com um
+Last-Event-ID de outro processo, ou mais antigo que o buffer, recebe um
+evento `reset` e deve recarregar a lista pelo /sync ou /analises. O hub é
+por processo: com vários workers, cada um só vê as próprias escritas.
+"""
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import event
+
+from db import AnalysisRecord, SessionLocal
+
+EVENTS_BUFFER = int(os.getenv("EVENTS_BUFFER", "10000"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "2000"))
+LONG_POLL_MAX_SECONDS = 30
+RETRY_MS = 3000
+
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class ChangeHub:
+    """
+    Buffer circular de eventos com sequência crescente e espera por Condition.
+    """
+
+    def __init__(self, capacity: int = EVENTS_BUFFER):
+        self._events = deque(maxlen=capacity)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self.subscribers = 0
+        self.published = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publicar(self, items) -> None:
+        if not items:
+            return
+        with self._condition:
+            for item in items:
+                self._seq += 1
+                self._events.append((self._seq, item))
+            self.published += len(items)
+            self._condition.notify_all()
+
+    def _depois(self, cursor: int):
+        """Eventos com seq > cursor e se algum deles já saiu do buffer."""
+
+        if cursor >= self._seq:
+            return [], False
+        first = self._events[0][0] if self._events else self._seq + 1
+        lost = cursor < first - 1
+        start = max(cursor - first + 1, 0)
+        return list(itertools.islice(self._events, start, None)), lost
+
+    def esperar(self, cursor: int, timeout: float):
+        with self._condition:
+            if cursor >= self._seq:
+                self._condition.wait(timeout)
+            items, lost = self._depois(cursor)
+            return items, lost, self._seq
+
+    def cursor(self, last_event_id):
+        """
+        Posição inicial de um assinante: a do Last-Event-ID, ou o fim do
+        buffer. Devolve (cursor, reset).
+        """
+
+        if not last_event_id:
+            return self._seq, False
+        boot, _, seq = str(last_event_id).partition(':')
+        try:
+            seq = int(seq)
+        except ValueError:
+            return self._seq, True
+        if boot != BOOT_ID or seq > self._seq:
+            return self._seq, True
+        return seq, False
+
+    def assinar(self) -> bool:
+        with self._condition:
+            if self.subscribers >= EVENTS_MAX_SUBSCRIBERS:
+                return False
+            self.subscribers += 1
+            return True
+
+    def cancelar(self) -> None:
+        with self._condition:
+            self.subscribers -= 1
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                'boot_id': BOOT_ID,
+                'seq': self._seq,
+                'buffered': len(self._events),
+                'capacity': self._events.maxlen,
+                'subscribers': self.subscribers,
+                'published': self.published,
+            }
+
+
+hub = ChangeHub()
+
+
+def event_id(seq: int) -> str:
+    return f"{BOOT_ID}:{seq}"
+
+
+def novo_evento(kind: str, analysis_id, farm_id, cow_id, status=None, prediction_label=None, probability=None) -> dict:
+    return {
+        'type': kind,
+        'analysis_id': analysis_id,
+        'farm_id': farm_id,
+        'cow_id': cow_id,
+        'status': status,
+        'prediction_label': prediction_label,
+        'probability': probability,
+        'at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def evento_de(record: AnalysisRecord, kind: str) -> dict:
+    return novo_evento(
+        kind, record.id, record.farm_id, record.cow_id, record.status, record.prediction_label, record.probability,
+    )
+
+
+def registrar(session, items) -> None:
+    """Guarda eventos na sessão; o hub só os recebe se a transação for confirmada."""
+
+    session.info.setdefault('events_pending', []).extend(items)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _coletar(session, flush_context):
+    items = [evento_de(obj, 'created') for obj in session.new if isinstance(obj, AnalysisRecord)]
+    items += [
+        evento_de(obj, 'updated') for obj in session.dirty
+        if isinstance(obj, AnalysisRecord) and session.is_modified(obj, include_collections=False)
+    ]
+    items += [evento_de(obj, 'deleted') for obj in session.deleted if isinstance(obj, AnalysisRecord)]
+    if items:
+        registrar(session, items)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publicar(session):
+    hub.publicar(session.info.pop('events_pending', None))
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _descartar(session, previous_transaction):
+    session.info.pop('events_pending', None)
+
+
+def casa(item: dict, farm_id: str, cow_id=None) -> bool:
+    if item['farm_id'] != farm_id:
+        return False
+    # `cleared` (remoção de todas as análises da fazenda) vale para qualquer vaca
+    return cow_id is None or item['type'] == 'cleared' or item['cow_id'] == cow_id
+
+
+def _sse(name: str, data: dict, seq=None) -> str:
+    lines = [f"event: {name}"]
+    if seq is not None:
+        lines.append(f"id: {event_id(seq)}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream(farm_id: str, cow_id, last_event_id):
+    """
+    Gerador do text/event-stream. A vaga do assinante (`assinar()`) é
+    devolvida pelo chamador quando a resposta é fechada.
+    """
+
+    cursor, reset = hub.cursor(last_event_id)
+    yield f"retry: {RETRY_MS}\n\n"
+    if reset:
+        yield _sse('reset', {'reason': 'unknown_cursor'}, cursor)
+    last_write = time.monotonic()
+    while True:
+        items, lost, cursor = hub.esperar(cursor, EVENTS_KEEPALIVE_SECONDS)
+        if lost:
+            yield _sse('reset', {'reason': 'buffer_overflow'}, cursor)
+            last_write = time.monotonic()
+            continue
+        for seq, item in items:
+            if casa(item, farm_id, cow_id):
+                yield _sse(item['type'], item, seq)
+                last_write = time.monotonic()
+        if time.monotonic() - last_write >= EVENTS_KEEPALIVE_SECONDS:
+            # Também detecta cliente desconectado: a escrita falha e a resposta é fechada
+            yield ": keepalive\n\n"
+            last_write = time.monotonic()
+
+
+def long_poll(farm_id: str, cow_id, last_event_id, timeout: float) -> dict:
+    """
+    Espera até `timeout` segundos por eventos da fazenda (e vaca) depois do
+    cursor; devolve assim que houver algum.
+    """
+
+    cursor, reset = hub.cursor(last_event_id)
+    if reset:
+        return {'events': [], 'reset': True, 'last_event_id': event_id(cursor)}
+    # NaN passaria pelo min/max e o prazo nunca venceria
+    timeout = min(max(timeout, 0), LONG_POLL_MAX_SECONDS) if math.isfinite(timeout) else LONG_POLL_MAX_SECONDS
+    deadline = time.monotonic() + timeout
+    while True:
+        items, lost, cursor = hub.esperar(cursor, max(deadline - time.monotonic(), 0))
+        if lost:
+            return {'events': [], 'reset': True, 'last_event_id': event_id(cursor)}
+        matching = [{'id': event_id(seq), **item} for seq, item in items if casa(item, farm_id, cow_id)]
+        if matching or time.monotonic() >= deadline:
+            return {'events': matching, 'reset': False, 'last_event_id': event_id(cursor)}
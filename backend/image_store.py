@@ -0,0 +1,186 @@
+# backend/image_store.py
+"""
+Armazenamento das imagens enviadas pelo app e geração de derivados.
+
+O corpo multipart é gravado direto em disco pelo parser do werkzeug, em
+blocos, através do `_get_file_stream` do StreamingUploadRequest; a rota só
+move o arquivo para o destino final. Miniatura e preview são gerados em um
+pool de workers, fora da thread da requisição (o Pillow libera o GIL ao
+decodificar e redimensionar), e servidos como arquivos estáticos com
+suporte a Range e cache.
+"""
+import os
+import re
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from flask import Request
+
+BASE_DIR = Path(__file__).resolve().parent
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", BASE_DIR / "uploads"))
+INCOMING_DIR = UPLOAD_DIR / ".incoming"
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", min(4, os.cpu_count() or 1)))
+
+VARIANTS = {
+    'thumb': 256,
+    'preview': 1024,
+}
+SIGNATURES = {
+    b'\xff\xd8\xff': 'jpg',
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'GIF87a': 'gif',
+    b'GIF89a': 'gif',
+}
+
+IMAGE_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image-worker")
+_jobs = {}
+
+
+class StreamingUploadRequest(Request):
+    """
+    Request que grava os arquivos multipart direto em INCOMING_DIR, sem buffer em memória.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile("wb+", dir=INCOMING_DIR, suffix=".part", delete=False)
+
+
+def descartar_temporarios(request) -> None:
+    """
+    Remove os .part que a rota não reivindicou (chamado no teardown da requisição).
+    """
+
+    if "files" not in request.__dict__:
+        return
+    # items(multi=True): um campo repetido no multipart tem um .part por arquivo
+    for _, storage in request.files.items(multi=True):
+        name = getattr(storage.stream, "name", None)
+        storage.close()
+        if isinstance(name, str) and os.path.exists(name):
+            os.remove(name)
+
+
+def _detectar_formato(path: Path):
+    with open(path, "rb") as handle:
+        head = handle.read(12)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, extension in SIGNATURES.items():
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+def valid_image_id(image_id: str) -> bool:
+    return bool(IMAGE_ID_RE.fullmatch(image_id or ""))
+
+
+def image_dir(image_id: str) -> Path:
+    return UPLOAD_DIR / image_id[:2] / image_id
+
+
+def _original(image_id: str):
+    folder = image_dir(image_id)
+    if not folder.is_dir():
+        return None
+    for path in folder.glob("original.*"):
+        return path
+    return None
+
+
+def variant_path(image_id: str, variant: str):
+    if variant == "original":
+        return _original(image_id)
+    if variant not in VARIANTS:
+        return None
+    path = image_dir(image_id) / f"{variant}.jpg"
+    return path if path.exists() else None
+
+
+def gerar_derivados(original: Path) -> dict:
+    """
+    Decodifica o original uma vez e grava cada derivado em JPEG (executa no pool).
+    """
+
+    from PIL import Image, ImageOps
+
+    sizes = {}
+    with Image.open(original) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for variant, max_side in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+            image.thumbnail((max_side, max_side))
+            target = original.parent / f"{variant}.jpg"
+            tmp = target.with_suffix(".tmp")
+            image.save(tmp, "JPEG", quality=82, optimize=True)
+            os.replace(tmp, target)
+            sizes[variant] = image.size
+    return sizes
+
+
+def _agendar(image_id: str, original: Path) -> None:
+    def _finalizar(future):
+        _jobs.pop(image_id, None)
+        if future.exception() is not None:
+            (original.parent / ".failed").write_text(str(future.exception()), encoding="utf-8")
+
+    future = _executor.submit(gerar_derivados, original)
+    _jobs[image_id] = future
+    future.add_done_callback(_finalizar)
+
+
+def salvar_upload(storage) -> dict:
+    """
+    Move o arquivo já gravado em disco para o destino final e agenda os derivados.
+    """
+
+    part_path = Path(storage.stream.name)
+    storage.stream.flush()
+    extension = _detectar_formato(part_path)
+    if extension is None:
+        raise ValueError("Formato de imagem não suportado (use JPEG, PNG, GIF ou WEBP)")
+
+    image_id = uuid.uuid4().hex
+    folder = image_dir(image_id)
+    folder.mkdir(parents=True, exist_ok=True)
+    original = folder / f"original.{extension}"
+    storage.stream.close()
+    os.replace(part_path, original)
+
+    _agendar(image_id, original)
+    return {
+        'image_id': image_id,
+        'size_bytes': original.stat().st_size,
+        'format': extension,
+    }
+
+
+def image_status(image_id: str) -> str:
+    """
+    'ready', 'processing', 'failed' ou 'missing'.
+    """
+
+    original = _original(image_id)
+    if original is None:
+        return "missing"
+    folder = image_dir(image_id)
+    if all((folder / f"{variant}.jpg").exists() for variant in VARIANTS):
+        return "ready"
+    if (folder / ".failed").exists():
+        return "failed"
+    if image_id not in _jobs:
+        # Job perdido (ex.: reinício do servidor no meio do processamento)
+        _agendar(image_id, original)
+    return "processing"
+
+
+def image_urls(image_id: str) -> dict:
+    urls = {'original_url': f"/images/{image_id}/original"}
+    for variant in VARIANTS:
+        key = 'thumbnail_url' if variant == 'thumb' else f"{variant}_url"
+        urls[key] = f"/images/{image_id}/{variant}"
+    return urls
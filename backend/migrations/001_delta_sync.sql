@@ -0,0 +1,24 @@
+-- Delta sync (/sync): marca d'água em updated_at, tombstones e chaves de idempotência.
+-- Aplicar uma vez em bancos criados antes desta versão.
+
+ALTER TABLE cow_analyses
+  MODIFY updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+-- Linhas antigas nunca editadas ficam com updated_at = created_at.
+-- Em tabelas grandes, repetir com LIMIT até afetar 0 linhas para não segurar locks longos.
+UPDATE cow_analyses SET updated_at = created_at WHERE updated_at IS NULL LIMIT 10000;
+
+ALTER TABLE cow_analyses ADD INDEX ix_cow_analyses_updated_at_id (updated_at, id);
+
+CREATE TABLE IF NOT EXISTS cow_analysis_tombstones (
+  analysis_id INT PRIMARY KEY,
+  cow_id VARCHAR(128) NOT NULL,
+  deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX ix_cow_analysis_tombstones_deleted_at_id (deleted_at, analysis_id)
+);
+
+CREATE TABLE IF NOT EXISTS sync_client_keys (
+  client_key VARCHAR(64) PRIMARY KEY,
+  analysis_id INT NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
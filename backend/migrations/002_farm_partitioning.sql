@@ -0,0 +1,89 @@
+-- Multi-tenant: farm_id em todas as tabelas de análise e cow_analyses
+-- particionada por mês (month_key) e subparticionada por fazenda.
+-- Aplicar uma vez, depois de 001_delta_sync.sql. Linhas existentes vão para a
+-- fazenda 'default' (DEFAULT_FARM_ID do backend).
+--
+-- Um ALTER TABLE ... PARTITION BY reescreveria a tabela inteira sob lock; em vez
+-- disso a cópia é feita para uma tabela nova, em faixas de id, e as tabelas são
+-- trocadas com um RENAME atômico no final.
+
+CREATE TABLE cow_analyses_part (
+  id INT AUTO_INCREMENT,
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  month_key INT NOT NULL,
+  cow_id VARCHAR(128) NOT NULL,
+  prediction TINYINT NOT NULL,
+  prediction_label VARCHAR(8) NOT NULL,
+  probability FLOAT NOT NULL,
+  payload JSON NOT NULL,
+  status VARCHAR(32) DEFAULT 'completed',
+  notes TEXT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (id, farm_id, month_key),
+  INDEX ix_cow_analyses_farm_id_id (farm_id, id),
+  INDEX ix_cow_analyses_farm_cow_created (farm_id, cow_id, created_at),
+  INDEX ix_cow_analyses_farm_updated_at_id (farm_id, updated_at, id)
+)
+PARTITION BY RANGE (month_key)
+SUBPARTITION BY KEY (farm_id) SUBPARTITIONS 16 (
+  PARTITION p_hist VALUES LESS THAN (202601),
+  PARTITION p202601 VALUES LESS THAN (202602),
+  PARTITION p202602 VALUES LESS THAN (202603),
+  PARTITION p202603 VALUES LESS THAN (202604),
+  PARTITION p202604 VALUES LESS THAN (202605),
+  PARTITION p202605 VALUES LESS THAN (202606),
+  PARTITION p202606 VALUES LESS THAN (202607),
+  PARTITION p202607 VALUES LESS THAN (202608),
+  PARTITION p202608 VALUES LESS THAN (202609),
+  PARTITION p202609 VALUES LESS THAN (202610),
+  PARTITION p202610 VALUES LESS THAN (202611),
+  PARTITION p202611 VALUES LESS THAN (202612),
+  PARTITION p202612 VALUES LESS THAN (202701),
+  PARTITION p202701 VALUES LESS THAN (202702),
+  PARTITION p202702 VALUES LESS THAN (202703),
+  PARTITION p202703 VALUES LESS THAN (202704),
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- Anotar o horário de início da cópia: o passo final recopia o que mudou depois dele.
+SET @copia_inicio = NOW();
+
+-- Repetir avançando a faixa (@inicio += 10000) até passar de MAX(id).
+SET @inicio = 0;
+INSERT INTO cow_analyses_part
+  (id, farm_id, month_key, cow_id, prediction, prediction_label, probability,
+   payload, status, notes, created_at, updated_at)
+SELECT
+  id, 'default', YEAR(COALESCE(created_at, NOW())) * 100 + MONTH(COALESCE(created_at, NOW())),
+  cow_id, prediction, prediction_label, probability, payload, status, notes, created_at, updated_at
+FROM cow_analyses
+WHERE id > @inicio AND id <= @inicio + 10000;
+
+-- Passo final (com a aplicação parada ou em manutenção): recopia o que mudou
+-- durante a cópia, remove o que foi apagado e troca as tabelas.
+REPLACE INTO cow_analyses_part
+  (id, farm_id, month_key, cow_id, prediction, prediction_label, probability,
+   payload, status, notes, created_at, updated_at)
+SELECT
+  id, 'default', YEAR(COALESCE(created_at, NOW())) * 100 + MONTH(COALESCE(created_at, NOW())),
+  cow_id, prediction, prediction_label, probability, payload, status, notes, created_at, updated_at
+FROM cow_analyses
+WHERE updated_at >= @copia_inicio;
+
+DELETE p FROM cow_analyses_part p
+LEFT JOIN cow_analyses a ON a.id = p.id
+WHERE a.id IS NULL;
+
+RENAME TABLE cow_analyses TO cow_analyses_legacy, cow_analyses_part TO cow_analyses;
+-- Depois de validar: DROP TABLE cow_analyses_legacy;
+
+ALTER TABLE cow_analysis_tombstones
+  ADD COLUMN farm_id VARCHAR(64) NOT NULL DEFAULT 'default' AFTER analysis_id,
+  DROP INDEX ix_cow_analysis_tombstones_deleted_at_id,
+  ADD INDEX ix_cow_analysis_tombstones_farm_deleted_at_id (farm_id, deleted_at, analysis_id);
+
+ALTER TABLE sync_client_keys
+  ADD COLUMN farm_id VARCHAR(64) NOT NULL DEFAULT 'default' FIRST,
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (farm_id, client_key);
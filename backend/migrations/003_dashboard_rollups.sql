@@ -0,0 +1,23 @@
+-- Agregados do GET /dashboard. Depois de criar as tabelas, popular com:
+--     python scripts/backfill_rollups.py
+-- (com a API parada; a partir daí a API mantém os agregados a cada escrita).
+
+CREATE TABLE IF NOT EXISTS analysis_rollups (
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  bucket_size VARCHAR(8) NOT NULL,
+  bucket_start DATETIME NOT NULL,
+  prediction_label VARCHAR(8) NOT NULL,
+  status VARCHAR(32) NOT NULL,
+  count INT NOT NULL DEFAULT 0,
+  probability_sum DOUBLE NOT NULL DEFAULT 0,
+  PRIMARY KEY (farm_id, bucket_size, bucket_start, prediction_label, status)
+);
+
+CREATE TABLE IF NOT EXISTS confidence_rollups (
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  bucket_size VARCHAR(8) NOT NULL,
+  bucket_start DATETIME NOT NULL,
+  bin TINYINT NOT NULL,
+  count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (farm_id, bucket_size, bucket_start, bin)
+);
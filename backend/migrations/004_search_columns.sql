@@ -0,0 +1,32 @@
+-- Busca em /analises/search: features em colunas indexadas e notas em
+-- analysis_notes com índice FULLTEXT. Depois de aplicar, preencher as
+-- análises existentes com:
+--     python scripts/backfill_search_columns.py
+-- ALGORITHM=INPLACE/LOCK=NONE: as colunas e índices são criados sem bloquear escritas.
+
+ALTER TABLE cow_analyses
+  ADD COLUMN age FLOAT NULL AFTER notes,
+  ADD COLUMN weight FLOAT NULL AFTER age,
+  ADD COLUMN previous_pregnancies FLOAT NULL AFTER weight,
+  ADD COLUMN body_condition FLOAT NULL AFTER previous_pregnancies,
+  ADD COLUMN days_since_insemination FLOAT NULL AFTER body_condition,
+  ADD COLUMN milk_production FLOAT NULL AFTER days_since_insemination,
+  ADD COLUMN body_temperature FLOAT NULL AFTER milk_production,
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE cow_analyses
+  ADD INDEX ix_cow_analyses_farm_age (farm_id, age),
+  ADD INDEX ix_cow_analyses_farm_weight (farm_id, weight),
+  ADD INDEX ix_cow_analyses_farm_previous_pregnancies (farm_id, previous_pregnancies),
+  ADD INDEX ix_cow_analyses_farm_body_condition (farm_id, body_condition),
+  ADD INDEX ix_cow_analyses_farm_days_since_insemination (farm_id, days_since_insemination),
+  ADD INDEX ix_cow_analyses_farm_milk_production (farm_id, milk_production),
+  ADD INDEX ix_cow_analyses_farm_body_temperature (farm_id, body_temperature),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+CREATE TABLE IF NOT EXISTS analysis_notes (
+  analysis_id INT PRIMARY KEY,
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  notes TEXT NOT NULL,
+  FULLTEXT KEY ft_analysis_notes_notes (notes)
+);
@@ -0,0 +1,18 @@
+-- Alertas de comportamento gerados pelo POST /readings (anomaly.py).
+-- As linhas de base ficam em memória/ANOMALY_STATE_PATH; a tabela guarda só os alertas.
+
+CREATE TABLE IF NOT EXISTS health_alerts (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  farm_id VARCHAR(64) NOT NULL DEFAULT 'default',
+  cow_id VARCHAR(128) NOT NULL,
+  metric VARCHAR(32) NOT NULL,
+  direction VARCHAR(8) NOT NULL,
+  value DOUBLE NOT NULL,
+  baseline DOUBLE NOT NULL,
+  baseline_std DOUBLE NOT NULL,
+  z_score DOUBLE NOT NULL,
+  reading_at DATETIME NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX ix_health_alerts_farm_id_id (farm_id, id),
+  INDEX ix_health_alerts_farm_cow_id (farm_id, cow_id, id)
+);
@@ -0,0 +1,269 @@
+# backend/profiling.py
+"""
+Profiling sob demanda das requisições da API.
+
+Um administrador abre uma sessão de profiling (POST /admin/profile) para as
+próximas N requisições ou para uma fração amostrada delas, opcionalmente só
+de uma rota. Cada requisição escolhida é perfilada na própria thread:
+
+- deterministic: `sys.setprofile` registra cada chamada e retorno e soma o
+  tempo próprio de cada pilha;
+- sampling: uma thread lê a pilha da requisição via `sys._current_frames`
+  a cada `interval_ms` e conta as amostras.
+
+O resultado é guardado como pilhas colapsadas ("a;b;c valor", o formato do
+flamegraph.pl e do speedscope), por requisição e agregadas, mais um
+relatório das funções mais quentes. Sem sessão ativa, o custo por
+requisição é uma única verificação de variável global.
+"""
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+MODES = ('deterministic', 'sampling')
+MAX_REQUESTS = 1000
+MAX_STACKS_PER_REQUEST = 2000
+SESSION_TTL_SECONDS = 600
+KEEP_FINISHED = 10
+# Raiz das pilhas: a partir daqui o código é da aplicação e dos hooks (o resto é werkzeug/threading)
+ROOT_FUNCTION = 'Flask.full_dispatch_request'
+
+_active = None
+_sessions = {}
+_lock = threading.Lock()
+
+
+def autorizado(token) -> bool:
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(str(token), ADMIN_TOKEN)
+
+
+def _nome(code, module) -> str:
+    return f"{module}:{code.co_qualname}"
+
+
+def _pilha(frame):
+    names = []
+    while frame is not None:
+        names.append(_nome(frame.f_code, frame.f_globals.get('__name__', '?')))
+        frame = frame.f_back
+    names.reverse()
+    for index, name in enumerate(names):
+        if name.endswith(ROOT_FUNCTION):
+            return names[index:]
+    return names
+
+
+class _Deterministico:
+    """Tempo próprio por pilha via sys.setprofile, só na thread da requisição."""
+
+    def __init__(self):
+        self.stack = []
+        self.stacks = Counter()
+        self.last = 0.0
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter()
+        if self.stack:
+            self.stacks[";".join(self.stack)] += now - self.last
+        if event == 'call':
+            self.stack.append(_nome(frame.f_code, frame.f_globals.get('__name__', '?')))
+        elif event == 'c_call':
+            name = getattr(arg, '__qualname__', None) or getattr(arg, '__name__', '?')
+            self.stack.append(f"{getattr(arg, '__module__', None) or 'builtins'}:{name}")
+        elif event in ('return', 'c_return', 'c_exception') and self.stack:
+            self.stack.pop()
+        self.last = time.perf_counter()
+
+    def start(self):
+        # A pilha atual entra como base; os retornos dos hooks a desfazem até a raiz
+        self.stack = _pilha(sys._getframe())
+        self.last = time.perf_counter()
+        sys.setprofile(self._callback)
+
+    def stop(self):
+        sys.setprofile(None)
+        # segundos -> microssegundos inteiros, como o flamegraph espera
+        return Counter({stack: int(value * 1e6) for stack, value in self.stacks.items() if value >= 1e-6})
+
+
+class _Amostrador:
+    """Conta amostras da pilha da thread da requisição a cada intervalo."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[";".join(_pilha(frame))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+class ProfileSession:
+    def __init__(self, mode: str, requests: int, sample_rate: float, route, interval_ms: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.target = requests
+        self.sample_rate = sample_rate
+        self.route = route
+        self.interval = interval_ms / 1000
+        self.started_at = time.time()
+        self.claimed = 0
+        self.records = []
+        self.aggregate = Counter()
+        self.finished = False
+
+    def reservar(self, endpoint) -> bool:
+        if endpoint is None or endpoint.startswith('admin_'):
+            return False
+        if self.route and endpoint != self.route:
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        with _lock:
+            if self.finished or self.claimed >= self.target:
+                return False
+            self.claimed += 1
+            return True
+
+    def registrar(self, request_info: dict, stacks: Counter) -> None:
+        top = Counter(dict(stacks.most_common(MAX_STACKS_PER_REQUEST)))
+        with _lock:
+            self.records.append({**request_info, 'stacks': dict(top)})
+            self.aggregate.update(stacks)
+            if len(self.records) >= self.target:
+                _encerrar(self)
+
+    def unidade(self) -> str:
+        return 'microseconds' if self.mode == 'deterministic' else f"samples ({self.interval * 1000:g} ms)"
+
+    def relatorio(self, top: int = 30, include_requests: bool = True) -> dict:
+        with _lock:
+            aggregate = Counter(self.aggregate)
+            records = list(self.records)
+        return {
+            'id': self.id,
+            'mode': self.mode,
+            'route': self.route,
+            'sample_rate': self.sample_rate,
+            'unit': self.unidade(),
+            'requested': self.target,
+            'captured': len(records),
+            'finished': self.finished,
+            'hot_functions': funcoes_quentes(aggregate, top),
+            'collapsed': colapsar(aggregate),
+            'requests': records if include_requests else None,
+        }
+
+
+def funcoes_quentes(stacks: Counter, top: int = 30):
+    """Tempo próprio (topo da pilha) e acumulado (presente na pilha) por função."""
+
+    own, cumulative = Counter(), Counter()
+    for stack, value in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += value
+        for frame in set(frames):
+            cumulative[frame] += value
+    total = sum(stacks.values()) or 1
+    return [
+        {
+            'function': name,
+            'self': own[name],
+            'cumulative': cumulative[name],
+            'cumulative_pct': round(100 * cumulative[name] / total, 2),
+        }
+        for name, _ in (own + Counter()).most_common(top)
+    ]
+
+
+def colapsar(stacks: Counter) -> str:
+    return "\n".join(f"{stack} {value}" for stack, value in sorted(stacks.items()) if value)
+
+
+def _encerrar(session) -> None:
+    global _active
+    session.finished = True
+    if _active is session:
+        _active = None
+
+
+def iniciar(mode='deterministic', requests=10, sample_rate=1.0, route=None, interval_ms=1.0) -> ProfileSession:
+    global _active
+    if mode not in MODES:
+        raise ValueError(f"mode deve ser um de {list(MODES)}")
+    if not 1 <= int(requests) <= MAX_REQUESTS:
+        raise ValueError(f"requests deve estar entre 1 e {MAX_REQUESTS}")
+    if not 0.0 < float(sample_rate) <= 1.0:
+        raise ValueError("sample_rate deve estar em (0, 1]")
+    session = ProfileSession(mode, int(requests), float(sample_rate), route, max(float(interval_ms), 0.1))
+    with _lock:
+        if _active is not None:
+            _encerrar(_active)
+        _sessions[session.id] = session
+        finished = [key for key, value in _sessions.items() if value.finished]
+        for key in finished[:-KEEP_FINISHED]:
+            del _sessions[key]
+        _active = session
+    return session
+
+
+def obter(session_id: str):
+    return _sessions.get(session_id)
+
+
+def parar(session_id: str):
+    session = _sessions.get(session_id)
+    if session is not None:
+        with _lock:
+            _encerrar(session)
+    return session
+
+
+def antes_da_requisicao(request, g) -> None:
+    session = _active
+    if session is None:
+        return
+    if time.time() - session.started_at > SESSION_TTL_SECONDS:
+        with _lock:
+            _encerrar(session)
+        return
+    if not session.reservar(request.endpoint):
+        return
+    profiler = _Deterministico() if session.mode == 'deterministic' else _Amostrador(session.interval)
+    g.profile = (session, profiler, time.perf_counter())
+    profiler.start()
+
+
+def depois_da_requisicao(request, response, g) -> None:
+    entry = g.pop('profile', None)
+    if entry is None:
+        return
+    session, profiler, start = entry
+    stacks = profiler.stop()
+    session.registrar({
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code if response is not None else None,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+    }, stacks)
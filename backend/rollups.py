@@ -0,0 +1,283 @@
+# backend/rollups.py
+"""
+Agregados do dashboard mantidos de forma incremental.
+
+Cada análise contribui, em cada tamanho de janela (hora, dia, mês), com
+uma unidade em `analysis_rollups` (fazenda x janela x rótulo x status, com a
+soma das probabilidades) e uma em `confidence_rollups` (bin de 0.1 da
+probabilidade). Os eventos de flush da sessão calculam os deltas das
+análises criadas, alteradas e removidas pelo ORM e os aplicam com upsert
+(`count = count + delta`) na mesma transação da escrita: um rollback desfaz
+os dois. O GET /dashboard só lê esses agregados, então o custo depende do
+número de janelas pedidas e não do tamanho de `cow_analyses`.
+
+Escritas em massa fora do ORM (ex.: DELETE /analises) ajustam os agregados
+explicitamente; `scripts/backfill_rollups.py` reconstrói tudo a partir do
+histórico.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect, select
+
+from db import AnalysisRecord, AnalysisRollup, ConfidenceRollup, SessionLocal
+
+BUCKET_SIZES = ('hour', 'day', 'month')
+CONFIDENCE_BINS = 10
+DEFAULT_WINDOWS = {
+    'hour': timedelta(hours=48),
+    'day': timedelta(days=30),
+    'month': timedelta(days=366),
+}
+
+_TRACKED = ('prediction_label', 'status', 'probability')
+
+
+def bucket_start(value: datetime, size: str) -> datetime:
+    value = value.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    if size == 'hour':
+        return value
+    value = value.replace(hour=0)
+    if size == 'day':
+        return value
+    return value.replace(day=1)
+
+
+def confidence_bin(probability: float) -> int:
+    return min(max(int(probability * CONFIDENCE_BINS), 0), CONFIDENCE_BINS - 1)
+
+
+def contribuicoes(rows, sign: int = 1):
+    """
+    Agrega linhas (farm_id, created_at, rótulo, status, probabilidade) nos deltas das duas tabelas.
+    """
+
+    rollup = defaultdict(lambda: [0, 0.0])
+    bins = defaultdict(int)
+    for farm_id, created_at, label, status, probability in rows:
+        probability = float(probability or 0.0)
+        created_at = created_at or datetime.now()
+        for size in BUCKET_SIZES:
+            start = bucket_start(created_at, size)
+            entry = rollup[(farm_id, size, start, label, status)]
+            entry[0] += sign
+            entry[1] += sign * probability
+            bins[(farm_id, size, start, confidence_bin(probability))] += sign
+    return rollup, bins
+
+
+def _linhas(rollup, bins):
+    rollup_rows = [
+        {
+            'farm_id': farm_id, 'bucket_size': size, 'bucket_start': start,
+            'prediction_label': label, 'status': status,
+            'count': count, 'probability_sum': probability_sum,
+        }
+        for (farm_id, size, start, label, status), (count, probability_sum) in rollup.items()
+        if count or probability_sum
+    ]
+    bin_rows = [
+        {'farm_id': farm_id, 'bucket_size': size, 'bucket_start': start, 'bin': bin_index, 'count': count}
+        for (farm_id, size, start, bin_index), count in bins.items()
+        if count
+    ]
+    return rollup_rows, bin_rows
+
+
+def _upsert(connection, table, rows, keys, sums):
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column] for column in sums})
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: table.c[column] + stmt.excluded[column] for column in sums},
+        )
+    else:
+        raise RuntimeError(f"Upsert de rollups não suportado no dialeto {dialect}")
+    connection.execute(stmt, rows)
+
+
+def aplicar(connection, rollup, bins) -> None:
+    rollup_rows, bin_rows = _linhas(rollup, bins)
+    _upsert(
+        connection, AnalysisRollup.__table__, rollup_rows,
+        keys=['farm_id', 'bucket_size', 'bucket_start', 'prediction_label', 'status'],
+        sums=['count', 'probability_sum'],
+    )
+    _upsert(
+        connection, ConfidenceRollup.__table__, bin_rows,
+        keys=['farm_id', 'bucket_size', 'bucket_start', 'bin'],
+        sums=['count'],
+    )
+
+
+def _valor_anterior(state, attribute):
+    history = state.attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), attribute)
+
+
+def _linha_anterior(record):
+    state = inspect(record)
+    return (
+        _valor_anterior(state, 'farm_id'),
+        record.created_at,
+        *(_valor_anterior(state, attribute) for attribute in _TRACKED),
+    )
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _registrar_alteracoes(session, flush_context, instances):
+    # Valores anteriores precisam ser lidos antes do flush (a linha removida some depois dele)
+    removed, added = [], []
+    for obj in session.deleted:
+        if isinstance(obj, AnalysisRecord):
+            removed.append(_linha_anterior(obj))
+    for obj in session.dirty:
+        if not isinstance(obj, AnalysisRecord):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[attribute].history.has_changes() for attribute in _TRACKED):
+            removed.append(_linha_anterior(obj))
+            added.append(obj)
+    session.info['rollup_pending'] = (removed, added)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _aplicar_alteracoes(session, flush_context):
+    removed, added = session.info.pop('rollup_pending', ([], []))
+    added = added + [obj for obj in session.new if isinstance(obj, AnalysisRecord)]
+    if not removed and not added:
+        return
+
+    connection = session.connection()
+    ids = [obj.id for obj in added]
+    # created_at vem do default do banco: uma consulta só para todas as análises do flush
+    created = dict(connection.execute(
+        select(AnalysisRecord.id, AnalysisRecord.created_at).where(AnalysisRecord.id.in_(ids))
+    ).all()) if ids else {}
+
+    rollup, bins = contribuicoes(removed, sign=-1)
+    new_rollup, new_bins = contribuicoes(
+        (obj.farm_id, created.get(obj.id), obj.prediction_label, obj.status, obj.probability)
+        for obj in added
+    )
+    for key, (count, probability_sum) in new_rollup.items():
+        rollup[key][0] += count
+        rollup[key][1] += probability_sum
+    for key, count in new_bins.items():
+        bins[key] += count
+    aplicar(connection, rollup, bins)
+
+
+def limpar_fazenda(session, farm_id: str) -> None:
+    """
+    Zera os agregados de uma fazenda (usado quando todas as análises dela são removidas).
+    """
+
+    for model in (AnalysisRollup, ConfidenceRollup):
+        session.query(model).filter(model.farm_id == farm_id).delete(synchronize_session=False)
+
+
+def _parse_data(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+
+def dashboard(session, bucket: str = 'day', start=None, end=None) -> dict:
+    """
+    Séries por janela, totais do período, histograma de confiança e totais gerais.
+    """
+
+    if bucket not in BUCKET_SIZES:
+        raise ValueError(f"bucket deve ser um de {list(BUCKET_SIZES)}")
+    end = _parse_data(end) if isinstance(end, str) else end
+    start = _parse_data(start) if isinstance(start, str) else start
+    end = end or datetime.now()
+    start = start or end - DEFAULT_WINDOWS[bucket]
+    first_bucket = bucket_start(start, bucket)
+
+    rows = (
+        session.query(AnalysisRollup)
+        .filter(AnalysisRollup.bucket_size == bucket)
+        .filter(AnalysisRollup.bucket_start >= first_bucket, AnalysisRollup.bucket_start <= end)
+        .filter(AnalysisRollup.count != 0)
+        .all()
+    )
+    series = defaultdict(lambda: {'count': 0, 'by_label': defaultdict(int), 'probability_sum': 0.0})
+    totals = {'count': 0, 'by_label': defaultdict(int), 'by_status': defaultdict(int), 'probability_sum': 0.0}
+    for row in rows:
+        point = series[row.bucket_start]
+        point['count'] += row.count
+        point['by_label'][row.prediction_label] += row.count
+        point['probability_sum'] += row.probability_sum
+        totals['count'] += row.count
+        totals['by_label'][row.prediction_label] += row.count
+        totals['by_status'][row.status] += row.count
+        totals['probability_sum'] += row.probability_sum
+
+    histogram = [0] * CONFIDENCE_BINS
+    for bin_index, count in (
+        session.query(ConfidenceRollup.bin, ConfidenceRollup.count)
+        .filter(ConfidenceRollup.bucket_size == bucket)
+        .filter(ConfidenceRollup.bucket_start >= first_bucket, ConfidenceRollup.bucket_start <= end)
+    ):
+        histogram[bin_index] += count
+
+    all_time = defaultdict(int)
+    for label, count in (
+        session.query(AnalysisRollup.prediction_label, AnalysisRollup.count)
+        .filter(AnalysisRollup.bucket_size == 'month')
+    ):
+        all_time[label] += count
+
+    return {
+        'bucket': bucket,
+        'from': first_bucket.isoformat(),
+        'to': end.isoformat(),
+        'totals': _resumo(totals, by_status=True),
+        'series': [
+            {'bucket_start': key.isoformat(), **_resumo(point)}
+            for key, point in sorted(series.items())
+        ],
+        'confidence_histogram': [
+            {'from': index / CONFIDENCE_BINS, 'to': (index + 1) / CONFIDENCE_BINS, 'count': count}
+            for index, count in enumerate(histogram)
+        ],
+        'all_time': {
+            'count': sum(all_time.values()),
+            'by_label': dict(all_time),
+            'pregnancy_rate': _taxa(all_time),
+        },
+    }
+
+
+def _taxa(by_label):
+    total = sum(by_label.values())
+    return round(by_label.get('SIM', 0) / total, 4) if total else None
+
+
+def _resumo(point, by_status=False):
+    summary = {
+        'count': point['count'],
+        'by_label': dict(point['by_label']),
+        'pregnancy_rate': _taxa(point['by_label']),
+        'mean_probability': round(point['probability_sum'] / point['count'], 4) if point['count'] else None,
+    }
+    if by_status:
+        summary['by_status'] = dict(point['by_status'])
+    return summary
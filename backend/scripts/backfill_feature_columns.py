@@ -0,0 +1,111 @@
+# backend/scripts/backfill_feature_columns.py
+"""
+Tira as features do payload JSON das análises antigas.
+
+Desde a separação, o payload guarda só os extras do app (cowId, imagem,
+metadados) e as 7 features ficam nas colunas tipadas. Análises gravadas
+antes ainda têm as features também dentro do JSON. O script percorre
+`cow_analyses` em chunks paginados por id e, para as linhas cujo payload
+ainda tem alguma feature, grava as colunas e reescreve o payload sem elas.
+
+Cada chunk é uma transação curta (só as linhas do chunk ficam bloqueadas),
+com uma pausa entre chunks; pode ser interrompido e retomado com
+--start-id, e rodar de novo não altera as linhas já migradas.
+
+Uso (a partir de backend/):
+    python scripts/backfill_feature_columns.py --chunk-size 2000 --pause-ms 50
+"""
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import bindparam, select, update
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from db import FEATURE_COLUMNS, AnalysisRecord, engine, init_db, separar_features
+
+
+def separar_chunk(connection, rows) -> int:
+    """
+    Migra as linhas (id, payload) que ainda têm features no JSON; devolve
+    quantas foram reescritas.
+    """
+
+    table = AnalysisRecord.__table__
+    params = []
+    for row in rows:
+        if not isinstance(row.payload, dict):
+            continue
+        extras, features = separar_features(row.payload)
+        if extras == row.payload:
+            # Já migrada (ou a feature no JSON não é número e fica lá)
+            continue
+        params.append({'row_id': row.id, 'extras': extras, **features})
+    if params:
+        connection.execute(
+            update(table)
+            .where(table.c.id == bindparam('row_id'))
+            .values(
+                payload=bindparam('extras'),
+                # Mesmo conteúdo para o app: não deve reaparecer como alterada no /sync
+                updated_at=table.c.updated_at,
+                **{feature: bindparam(feature) for feature in FEATURE_COLUMNS},
+            ),
+            params,
+        )
+    return len(params)
+
+
+def backfill(chunk_size: int = 2000, start_id: int = 0, pause_ms: int = 50, verbose: bool = True) -> dict:
+    table = AnalysisRecord.__table__
+    last_id, scanned, migrated = start_id, 0, 0
+    longest_chunk = 0.0
+    start = time.perf_counter()
+    while True:
+        chunk_start = time.perf_counter()
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.payload)
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            migrated += separar_chunk(connection, rows)
+        longest_chunk = max(longest_chunk, time.perf_counter() - chunk_start)
+
+        last_id = rows[-1].id
+        scanned += len(rows)
+        if verbose:
+            print(f"🔄 {migrated}/{scanned} análises migradas (id ≤ {last_id}, {time.perf_counter() - start:.1f}s)")
+        if pause_ms:
+            time.sleep(pause_ms / 1000)
+
+    return {
+        'scanned': scanned,
+        'migrated': migrated,
+        'last_id': last_id,
+        'seconds': round(time.perf_counter() - start, 2),
+        'longest_chunk_ms': round(longest_chunk * 1000, 1),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Move as features do payload JSON para as colunas tipadas")
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--start-id', type=int, default=0, help="Retoma a partir deste id")
+    parser.add_argument('--pause-ms', type=int, default=50, help="Pausa entre chunks")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    init_db()
+    report = backfill(chunk_size=args.chunk_size, start_id=args.start_id, pause_ms=args.pause_ms)
+    print(f"✅ Backfill concluído: {report['migrated']} de {report['scanned']} análises "
+          f"(chunk mais longo: {report['longest_chunk_ms']} ms)")
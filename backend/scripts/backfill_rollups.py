@@ -0,0 +1,108 @@
+# backend/scripts/backfill_rollups.py
+"""
+Reconstrói os agregados do dashboard a partir de `cow_analyses`.
+
+Apaga os agregados (de uma fazenda ou de todas) e reprocessa o histórico em
+chunks paginados por id: cada chunk é agregado em memória com pandas e
+aplicado com o mesmo upsert incremental usado pela API, em uma transação
+por chunk. Rode com a API parada (ou fora do horário de uso): alterações
+feitas durante o backfill em análises ainda não reprocessadas seriam
+contadas duas vezes.
+
+Uso (a partir de backend/):
+    python scripts/backfill_rollups.py
+    python scripts/backfill_rollups.py --farm fazenda-1 --chunk-size 50000
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, select
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from db import AnalysisRecord, AnalysisRollup, ConfidenceRollup, engine
+from rollups import BUCKET_SIZES, CONFIDENCE_BINS, aplicar
+
+FREQUENCIES = {'hour': 'h', 'day': 'D'}
+
+
+def _inicio_janela(created_at: pd.Series, size: str) -> pd.Series:
+    if size == 'month':
+        return created_at.dt.to_period('M').dt.to_timestamp()
+    return created_at.dt.floor(FREQUENCIES[size])
+
+
+def agregar_chunk(df: pd.DataFrame):
+    """Mesmos deltas de rollups.contribuicoes, agregados de forma vetorizada."""
+
+    df = df.assign(
+        created_at=pd.to_datetime(df['created_at']),
+        probability=df['probability'].fillna(0.0).astype(float),
+    )
+    df['bin'] = np.clip((df['probability'] * CONFIDENCE_BINS).astype(int), 0, CONFIDENCE_BINS - 1)
+
+    rollup, bins = defaultdict(lambda: [0, 0.0]), defaultdict(int)
+    for size in BUCKET_SIZES:
+        df['bucket_start'] = _inicio_janela(df['created_at'], size)
+        grouped = df.groupby(['farm_id', 'bucket_start', 'prediction_label', 'status'], sort=False)
+        for (farm_id, start, label, status), count, probability_sum in zip(
+            grouped.size().index, grouped.size().values, grouped['probability'].sum().values,
+        ):
+            rollup[(farm_id, size, start.to_pydatetime(), label, status)] = [int(count), float(probability_sum)]
+        for (farm_id, start, bin_index), count in df.groupby(['farm_id', 'bucket_start', 'bin'], sort=False).size().items():
+            bins[(farm_id, size, start.to_pydatetime(), int(bin_index))] = int(count)
+    return rollup, bins
+
+
+def backfill(farm_id=None, chunk_size: int = 50000, verbose: bool = True) -> int:
+    columns = [
+        AnalysisRecord.id, AnalysisRecord.farm_id, AnalysisRecord.created_at,
+        AnalysisRecord.prediction_label, AnalysisRecord.status, AnalysisRecord.probability,
+    ]
+    with engine.begin() as connection:
+        for model in (AnalysisRollup, ConfidenceRollup):
+            stmt = delete(model)
+            if farm_id:
+                stmt = stmt.where(model.farm_id == farm_id)
+            connection.execute(stmt)
+
+    last_id, total, start = 0, 0, time.perf_counter()
+    while True:
+        query = select(*columns).where(AnalysisRecord.id > last_id)
+        if farm_id:
+            query = query.where(AnalysisRecord.farm_id == farm_id)
+        query = query.order_by(AnalysisRecord.id).limit(chunk_size)
+
+        with engine.begin() as connection:
+            df = pd.DataFrame(connection.execute(query).all(), columns=[column.key for column in columns])
+            if df.empty:
+                break
+            aplicar(connection, *agregar_chunk(df))
+
+        last_id = int(df['id'].iloc[-1])
+        total += len(df)
+        if verbose:
+            print(f"🔄 {total} análises reprocessadas (id ≤ {last_id}, {time.perf_counter() - start:.1f}s)")
+        if len(df) < chunk_size:
+            break
+    return total
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstrói os agregados do dashboard")
+    parser.add_argument('--farm', default=None, help="Só esta fazenda (padrão: todas)")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    total = backfill(farm_id=args.farm, chunk_size=args.chunk_size)
+    print(f"✅ Backfill concluído: {total} análises")
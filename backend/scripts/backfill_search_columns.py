@@ -0,0 +1,76 @@
+# backend/scripts/backfill_search_columns.py
+"""
+Preenche as colunas de features e o índice de notas das análises antigas.
+
+Análises gravadas antes das colunas indexadas só têm as features dentro do
+payload JSON. O script percorre `cow_analyses` em chunks paginados por id,
+move as features para as colunas (como o backfill_feature_columns.py) e
+recopia as notas para `analysis_notes`, em uma transação por chunk (pode
+ser interrompido e retomado com --start-id).
+
+Uso (a partir de backend/):
+    python scripts/backfill_search_columns.py --chunk-size 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import delete, insert, select
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from db import AnalysisNote, AnalysisRecord, engine, init_db
+from scripts.backfill_feature_columns import separar_chunk
+from search import init_index
+
+
+def backfill(chunk_size: int = 5000, start_id: int = 0, verbose: bool = True) -> int:
+    table = AnalysisRecord.__table__
+    notes_table = AnalysisNote.__table__
+
+    last_id, total, start = start_id, 0, time.perf_counter()
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.farm_id, table.c.payload, table.c.notes)
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+
+            separar_chunk(connection, rows)
+
+            ids = [row.id for row in rows]
+            connection.execute(delete(notes_table).where(notes_table.c.analysis_id.in_(ids)))
+            notes = [
+                {'analysis_id': row.id, 'farm_id': row.farm_id, 'notes': row.notes}
+                for row in rows if row.notes
+            ]
+            if notes:
+                connection.execute(insert(notes_table), notes)
+
+        last_id = rows[-1].id
+        total += len(rows)
+        if verbose:
+            print(f"🔄 {total} análises atualizadas (id ≤ {last_id}, {time.perf_counter() - start:.1f}s)")
+    return total
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill das colunas de busca")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--start-id', type=int, default=0, help="Retoma a partir deste id")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    init_db()
+    init_index()
+    total = backfill(chunk_size=args.chunk_size, start_id=args.start_id)
+    print(f"✅ Backfill concluído: {total} análises")
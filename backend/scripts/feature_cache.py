@@ -0,0 +1,281 @@
+# backend/scripts/feature_cache.py
+"""
+Pré-processamento em chunks para CSVs de monitoramento grandes.
+
+Espelha o `preprocess_data` do CowPregnancyClassifierPadrao sem carregar o
+arquivo inteiro em memória:
+
+1. lê só as colunas necessárias em chunks, convertendo as numéricas para
+   float32 (célula não numérica vira NaN, como no caminho em memória);
+2. primeira passada: estima mediana/moda por amostragem de reservatório
+   (exata enquanto o arquivo couber no reservatório);
+3. segunda passada: preenche missing, remove duplicatas e grava as colunas
+   em um cache colunar (um .bin float32 por coluna + meta.json), indexado
+   pelo hash SHA-256 do CSV de origem;
+4. o target é derivado do próprio cache, com os quantis de comportamento
+   calculados sobre as linhas já deduplicadas (como no fluxo em memória).
+
+Treinos seguintes sobre o mesmo arquivo carregam o cache via memmap e pulam
+o pré-processamento por completo.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.feature_cache'
+)
+
+# Mesmo mapeamento de CowPregnancyClassifierPadrao._feature_engineering
+FEATURE_MAPPING = {
+    'age': 'lactation_number_in_data',
+    'weight': 'avgtotalmotion',
+    'previous_pregnancies': 'parity',
+    'body_condition': 'avgrumination',
+    'days_since_insemination': 'daysprior',
+    'milk_production': 'avgactivity',
+    'body_temperature': 'avghoursstanding',
+}
+PARITY_MAPPING = {
+    'primiparous': 1,
+    'multiparous': 2,
+    'nulliparous': 0,
+    '1': 1,
+    '2': 2,
+    '0': 0,
+}
+TARGET_COLUMNS = ['calved', 'daysprior', 'predictedcalving', 'avgactivity', 'avgrumination']
+
+
+def hash_file(file_path, block_size=1 << 20):
+    """SHA-256 do arquivo lido em blocos"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _colunas_disponiveis(file_path):
+    header = pd.read_csv(file_path, nrows=0).columns
+    wanted = set(FEATURE_MAPPING.values()) | set(TARGET_COLUMNS)
+    return [col for col in header if col in wanted]
+
+
+def _ler_chunks(file_path, columns, chunksize):
+    # Sem dtype numérico forçado: uma célula perdida ("-", "n/a ") vira NaN, como no caminho em memória
+    dtype = {'parity': 'string'} if 'parity' in columns else None
+    for chunk in pd.read_csv(file_path, usecols=columns, dtype=dtype, chunksize=chunksize):
+        for col in columns:
+            if col != 'parity':
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('float32')
+        yield chunk
+
+
+def _mapear_parity(chunk):
+    if 'parity' in chunk.columns:
+        mapped = chunk['parity'].astype(str).str.lower().map(PARITY_MAPPING)
+        chunk['parity'] = mapped.astype('float32')
+    return chunk
+
+
+class _Reservatorio:
+    """Amostra uniforme de tamanho fixo (chaves aleatórias, mantém as menores)"""
+
+    def __init__(self, columns, size, seed):
+        self.columns = columns
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.values = np.empty((0, len(columns)), dtype='float32')
+
+    def add(self, chunk):
+        keys = self.rng.random(len(chunk))
+        values = chunk[self.columns].to_numpy(dtype='float32')
+        self.keys = np.concatenate([self.keys, keys])
+        self.values = np.concatenate([self.values, values])
+        if len(self.keys) > self.size:
+            keep = np.argpartition(self.keys, self.size)[:self.size]
+            self.keys = self.keys[keep]
+            self.values = self.values[keep]
+
+    def column(self, name):
+        return self.values[:, self.columns.index(name)]
+
+
+class _HashesVistos:
+    """Conjunto de hashes uint64 em runs ordenados (~8 bytes por linha única)"""
+
+    def __init__(self):
+        self.runs = []
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            idx = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[idx] == hashes
+        return found
+
+    def add(self, hashes):
+        if len(hashes) == 0:
+            return
+        self.runs.append(np.unique(hashes))
+        # Funde runs de tamanho parecido para manter poucas buscas binárias por chunk
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            last = self.runs.pop()
+            self.runs[-1] = np.union1d(self.runs[-1], last)
+
+
+def _estatisticas(file_path, columns, chunksize, reservoir_size, seed):
+    """Primeira passada: contagem de linhas, moda de parity e medianas"""
+    numeric = [col for col in columns if col != 'parity']
+    reservoir = _Reservatorio(numeric, reservoir_size, seed)
+    parity_counts = pd.Series(dtype='int64')
+    total_rows = 0
+
+    for chunk in _ler_chunks(file_path, columns, chunksize):
+        chunk = _mapear_parity(chunk)
+        total_rows += len(chunk)
+        if 'parity' in chunk.columns:
+            parity_counts = parity_counts.add(chunk['parity'].value_counts(), fill_value=0)
+        reservoir.add(chunk)
+
+    stats = {'rows_read': total_rows, 'medians': {}, 'quantiles': {}}
+    stats['parity_mode'] = float(parity_counts.idxmax()) if not parity_counts.empty else 1.0
+    for col in numeric:
+        values = reservoir.column(col)
+        stats['medians'][col] = float(np.nanmedian(values)) if np.isfinite(values).any() else 0.0
+    stats['exact'] = total_rows <= reservoir_size
+    return stats
+
+
+def _target(cols, stats):
+    """Mesma regra de _create_target_variable, sobre arrays de um bloco de linhas"""
+    conditions = []
+    if 'calved' in cols and 'daysprior' in cols:
+        conditions.append((cols['calved'] == 1) & (cols['daysprior'] < 0))
+    if 'predictedcalving' in cols:
+        conditions.append(cols['predictedcalving'] > 0)
+    if 'avgactivity' in cols and 'avgrumination' in cols:
+        conditions.append(
+            (cols['avgactivity'] < stats['quantiles']['avgactivity'])
+            & (cols['avgrumination'] > stats['quantiles']['avgrumination'])
+        )
+    if not conditions:
+        return None
+    return np.logical_or.reduce(conditions).astype('float32')
+
+
+def _memmap(path, n_rows, dtype='float32'):
+    if n_rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(n_rows,))
+
+
+def build_feature_cache(file_path, cache_path, chunksize=100_000, reservoir_size=200_000, seed=42):
+    """Executa as duas passadas e grava o cache colunar em `cache_path`"""
+    columns = _colunas_disponiveis(file_path)
+    print(f"🔧 Colunas lidas ({len(columns)}): {columns}")
+    stats = _estatisticas(file_path, columns, chunksize, reservoir_size, seed)
+    print(f"📊 Linhas lidas: {stats['rows_read']} | estatísticas exatas: {stats['exact']}")
+
+    features = [feat for feat, orig in FEATURE_MAPPING.items() if orig in columns]
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    raw_path = {col: os.path.join(tmp_path, f"raw_{col}.bin") for col in columns}
+    handles = {col: open(raw_path[col], 'wb') for col in columns}
+    behaviour = [col for col in ('avgactivity', 'avgrumination') if col in columns]
+    post_reservoir = _Reservatorio(behaviour, reservoir_size, seed + 1)
+    seen = _HashesVistos()
+    n_rows = 0
+    try:
+        for chunk in _ler_chunks(file_path, columns, chunksize):
+            chunk = _mapear_parity(chunk)
+            if 'parity' in chunk.columns:
+                chunk['parity'] = chunk['parity'].fillna(stats['parity_mode'])
+            chunk = chunk.fillna(stats['medians'])
+
+            # Remove duplicatas dentro do chunk e entre chunks (hash das linhas)
+            hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            keep = ~pd.Series(hashes).duplicated().to_numpy() & ~seen.contains(hashes)
+            seen.add(hashes[keep])
+            chunk = chunk[keep]
+
+            for col in columns:
+                handles[col].write(chunk[col].to_numpy(dtype='float32').tobytes())
+            post_reservoir.add(chunk)
+            n_rows += len(chunk)
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    # Limiares de comportamento sobre as linhas já preenchidas e deduplicadas
+    for col, q in (('avgactivity', 0.3), ('avgrumination', 0.7)):
+        if col in behaviour:
+            values = post_reservoir.column(col)
+            stats['quantiles'][col] = float(np.quantile(values, q)) if values.size else 0.0
+
+    raw = {col: _memmap(raw_path[col], n_rows) for col in columns}
+    with open(os.path.join(tmp_path, 'target.bin'), 'wb') as handle:
+        for start in range(0, n_rows, chunksize):
+            block = {col: values[start:start + chunksize] for col, values in raw.items()}
+            target = _target(block, stats)
+            if target is None:
+                target = np.zeros(len(next(iter(block.values()))), dtype='float32')
+            handle.write(target.tobytes())
+    del raw
+
+    for feat in features:
+        os.replace(raw_path[FEATURE_MAPPING[feat]], os.path.join(tmp_path, f"{feat}.bin"))
+    for path in raw_path.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+    meta = {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(file_path),
+        'n_rows': n_rows,
+        'dtype': 'float32',
+        'features': features,
+        'duplicates_removed': stats['rows_read'] - n_rows,
+        'stats': stats,
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as handle:
+        json.dump(meta, handle, indent=2)
+    if os.path.exists(cache_path):
+        shutil.rmtree(cache_path)
+    os.replace(tmp_path, cache_path)
+    print(f"✅ Cache gravado em: {cache_path} ({n_rows} linhas, {meta['duplicates_removed']} duplicatas)")
+    return meta
+
+
+def load_feature_cache(cache_path):
+    """Carrega X (DataFrame) e y a partir do cache colunar"""
+    with open(os.path.join(cache_path, 'meta.json'), encoding='utf-8') as handle:
+        meta = json.load(handle)
+    n_rows = meta['n_rows']
+
+    def _coluna(name):
+        return _memmap(os.path.join(cache_path, f"{name}.bin"), n_rows, meta['dtype'])
+
+    X = pd.DataFrame({feat: _coluna(feat) for feat in meta['features']})
+    y = np.asarray(_coluna('target'), dtype='float64')
+    return X, y, meta
+
+
+def cached_features(file_path, cache_dir=None, chunksize=100_000, use_cache=True):
+    """Devolve (X, y, meta), reaproveitando o cache quando o hash do CSV bate"""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    key = f"{hash_file(file_path)}-v{CACHE_VERSION}"
+    cache_path = os.path.join(cache_dir, key)
+    if use_cache and os.path.exists(os.path.join(cache_path, 'meta.json')):
+        print(f"♻️  Cache encontrado ({key[:12]}...), pulando pré-processamento")
+    else:
+        os.makedirs(cache_dir, exist_ok=True)
+        build_feature_cache(file_path, cache_path, chunksize=chunksize)
+    return load_feature_cache(cache_path)
@@ -0,0 +1,376 @@
+# backend/scripts/generate_synthetic_herd.py
+"""
+Gerador vetorizado de rebanho sintético para testes de escala e carga.
+
+Três saídas, todas em chunks de tamanho fixo (memória constante):
+
+- training: as 7 features da interface + `is_pregnant`, com as mesmas
+  distribuições por classe de `criar_dados_balanceados` (train_model.py);
+- readings: leituras de 2 em 2 horas por vaca, com as colunas de
+  `cow_monitoring_data.csv` (cada vaca cobre as horas antes do parto);
+- analyses: análises prontas para `cow_analyses`, inseridas em lote no
+  banco configurado (DATABASE_URL), junto com os agregados do dashboard.
+
+Cada chunk tem o próprio gerador, derivado de (seed, índice do chunk) via
+`SeedSequence`; atributos fixos de cada vaca (lactação, paridade, data do
+parto) vêm de um hash de (seed, vaca). Assim a saída é idêntica para a
+mesma seed e o mesmo --chunk-rows, com qualquer número de processos. Os
+chunks de training/readings viram arquivos `part-NNNNN` independentes,
+gerados em paralelo.
+
+Uso (a partir de backend/):
+    python scripts/generate_synthetic_herd.py training --rows 100000000 --output /data/herd --format npy
+    python scripts/generate_synthetic_herd.py readings --rows 10000000 --output /data/readings
+    python scripts/generate_synthetic_herd.py analyses --rows 5000000 --farms 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+CHUNK_ROWS = 1_000_000
+
+# Distribuições de criar_dados_balanceados em train_model.py: (NÃO prenhe, prenhe).
+# ('int', a, b) = inteiro em [a, b); ('normal', média, desvio)
+TRAINING_DISTRIBUTIONS = {
+    'age': (('int', 1, 3), ('int', 3, 5)),
+    'weight': (('normal', 180, 20), ('normal', 120, 15)),
+    'previous_pregnancies': (('int', 1, 2), ('int', 2, 4)),
+    'body_condition': (('normal', 30, 5), ('normal', 55, 5)),
+    'days_since_insemination': (('int', 1, 20), ('int', 40, 90)),
+    'milk_production': (('normal', 95, 10), ('normal', 65, 10)),
+    'body_temperature': (('normal', 10, 1), ('normal', 6, 1)),
+}
+TRAINING_COLUMNS = [*TRAINING_DISTRIBUTIONS, 'is_pregnant']
+
+READING_COLUMNS = [
+    'cow', 'lactation_number_in_data', 'TIME', 'avgtotalmotion', 'avgtotalsteps', 'avghoursstanding',
+    'avghourslying', 'avglyingbouts', 'avgrumination', 'avgactivity', 'date', 'calvdate', 'Activity',
+    'rumination', 'totalmotion', 'totalsteps', 'hoursstanding', 'hourslying', 'lyingbouts',
+    'predictedcalving', 'CalvingEaseScore', 'breed', 'calved', 'parity', 'daysprior', 'hoursbefore',
+    'CES', 'dayhour',
+]
+# Leituras de 2 em 2 horas nas 72h antes do parto, como no CSV de monitoramento
+READINGS_PER_COW = 36
+FIRST_COW = 1000
+CALVING_START = date(2011, 9, 1)
+CALVING_DAYS = 730
+# Fração de linhas sem rumination/activity (o colar não mediu), como no CSV original
+MISSING_RATE = 0.15
+
+STATUSES = ('completed', 'manual', 'confirmed')
+ANALYSES_START = datetime(2024, 1, 1)
+ANALYSES_DAYS = 730
+
+
+def _rng(seed: int, chunk_index: int) -> np.random.Generator:
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+
+def _hash_uniforme(seed: int, ids: np.ndarray, salt: int) -> np.ndarray:
+    """Uniforme [0, 1) determinística por id (splitmix64), igual em qualquer chunk"""
+    with np.errstate(over='ignore'):
+        x = ids.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        x ^= np.uint64((seed * 0x2545F4914F6CDD1D + salt * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def gerar_treino(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    pregnant = rng.random(n) < 0.5
+    columns = {}
+    for feature, (negative, positive) in TRAINING_DISTRIBUTIONS.items():
+        if negative[0] == 'int':
+            low = np.where(pregnant, positive[1], negative[1])
+            high = np.where(pregnant, positive[2], negative[2])
+            columns[feature] = (low + np.floor(rng.random(n) * (high - low))).astype(np.int32)
+        else:
+            mean = np.where(pregnant, positive[1], negative[1])
+            std = np.where(pregnant, positive[2], negative[2])
+            columns[feature] = (mean + std * rng.standard_normal(n)).astype(np.float32)
+    columns['is_pregnant'] = pregnant.astype(np.int8)
+    return pd.DataFrame(columns)
+
+
+def _tabela_datas(fmt: str, start: date, days: int, upper: bool = False) -> np.ndarray:
+    """Datas formatadas uma vez por dia; as linhas só indexam a tabela"""
+    labels = [(start + timedelta(days=offset)).strftime(fmt) for offset in range(days)]
+    return np.array([label.upper() for label in labels] if upper else labels, dtype=object)
+
+
+def gerar_leituras(rng: np.random.Generator, seed: int, start_row: int, n: int) -> pd.DataFrame:
+    rows = np.arange(start_row, start_row + n, dtype=np.int64)
+    cow_index = rows // READINGS_PER_COW
+    slot = rows % READINGS_PER_COW
+
+    # Atributos da vaca: mesmos em todas as suas leituras, em qualquer chunk
+    lactation = 1 + (_hash_uniforme(seed, cow_index, 1) < 0.14).astype(np.int8)
+    multiparous = _hash_uniforme(seed, cow_index, 2) < 0.73
+    calving_day = (_hash_uniforme(seed, cow_index, 3) * CALVING_DAYS).astype(np.int64)
+    calving_hour = (_hash_uniforme(seed, cow_index, 4) * 12).astype(np.int64) * 2
+    ease = 1 + np.minimum((-np.log1p(-_hash_uniforme(seed, cow_index, 5)) * 0.45).astype(np.int8), 4)
+    predicted = np.minimum((_hash_uniforme(seed, cow_index, 6) * 12).astype(np.int8), 11)
+
+    hoursbefore = -2 * (READINGS_PER_COW - 1 - slot)
+    absolute_hour = calving_day * 24 + calving_hour + hoursbefore
+    reading_day = absolute_hour // 24
+    dayhour = absolute_hour % 24
+    daysprior = -((-hoursbefore) // 24)
+    # Perto do parto: mais atividade e menos ruminação
+    closeness = np.exp(hoursbefore / 24.0)
+
+    motion = rng.lognormal(6.65, 0.5, n) * (1 + 0.5 * closeness)
+    steps = motion * rng.uniform(0.15, 0.35, n)
+    standing = np.clip(rng.normal(1.17, 0.28, n) + 0.2 * closeness, 0.0, 2.0)
+    bouts = np.abs(rng.normal(0.94, 0.45, n)) * (1 + closeness)
+    rumination = np.clip(rng.normal(27.6, 10.0, n) * (1 - 0.5 * closeness), 0.0, None)
+    activity = np.clip(rng.normal(29.4, 12.8, n) * (1 + 0.6 * closeness), 0.0, None)
+    missing = rng.random(n) < MISSING_RATE
+    rumination[missing] = np.nan
+    activity[missing] = np.nan
+
+    def bruto(average, spread, low=0.0, high=None):
+        return np.clip(average * rng.lognormal(0.0, spread, n), low, high)
+
+    calved = (hoursbefore == 0).astype(np.int8) | ((hoursbefore == -2) & (rng.random(n) < 0.5))
+    reading_dates = _tabela_datas('%d%b%y:00:00:00', CALVING_START - timedelta(days=4), CALVING_DAYS + 5, upper=True)
+    calving_dates = _tabela_datas('%d-%b-%y', CALVING_START, CALVING_DAYS)
+    reading_start = (CALVING_START - timedelta(days=4)).toordinal() - CALVING_START.toordinal()
+
+    return pd.DataFrame({
+        'cow': FIRST_COW + cow_index,
+        'lactation_number_in_data': lactation,
+        'TIME': dayhour,
+        'avgtotalmotion': motion.round(4),
+        'avgtotalsteps': steps.round(4),
+        'avghoursstanding': standing.round(6),
+        'avghourslying': (2.0 - standing).round(6),
+        'avglyingbouts': bouts.round(6),
+        'avgrumination': rumination.round(4),
+        'avgactivity': activity.round(4),
+        'date': reading_dates[reading_day - reading_start],
+        'calvdate': calving_dates[calving_day],
+        'Activity': np.where(missing, np.nan, bruto(np.nan_to_num(activity), 0.6).round(1)),
+        'rumination': np.where(missing, np.nan, bruto(np.nan_to_num(rumination), 0.8).round(0)),
+        'totalmotion': bruto(motion, 0.8).round(0).astype(np.int64),
+        'totalsteps': bruto(steps, 0.8).round(0).astype(np.int64),
+        'hoursstanding': bruto(standing, 0.5, 0.0, 2.0).round(6),
+        'hourslying': (2.0 - bruto(standing, 0.5, 0.0, 2.0)).round(6),
+        'lyingbouts': rng.poisson(bouts),
+        'predictedcalving': predicted,
+        'CalvingEaseScore': ease,
+        'breed': 'H',
+        'calved': calved.astype(np.int8),
+        'parity': np.where(multiparous, 'multiparous', 'primiparous'),
+        'daysprior': daysprior,
+        'hoursbefore': hoursbefore,
+        'CES': np.minimum(ease, 3),
+        'dayhour': dayhour,
+    }, columns=READING_COLUMNS)
+
+
+def gerar_analises(rng: np.random.Generator, seed: int, n: int, farms: int, cows_per_farm: int) -> pd.DataFrame:
+    features = gerar_treino(rng, n)
+    # Probabilidade próxima do rótulo, com erros suficientes para preencher todas as faixas de confiança
+    probability = np.clip(
+        np.where(features['is_pregnant'] == 1, 0.8, 0.2) + rng.normal(0.0, 0.2, n), 0.0, 1.0,
+    ).round(4)
+    prediction = (probability >= 0.5).astype(np.int8)
+    farm = rng.integers(0, farms, n)
+    cow = rng.integers(0, cows_per_farm, n)
+    seconds = np.sort(rng.integers(0, ANALYSES_DAYS * 86400, n))
+    created_at = pd.Timestamp(ANALYSES_START) + pd.to_timedelta(seconds, unit='s')
+
+    df = features.drop(columns='is_pregnant').astype(np.float64).round(3)
+    df.insert(0, 'farm_id', pd.Series(farm).map(lambda index: f"fazenda-{index:03d}").to_numpy())
+    df.insert(1, 'cow_id', pd.Series(cow).map(lambda index: f"SYN-{index:06d}").to_numpy())
+    df['prediction'] = prediction
+    df['prediction_label'] = np.where(prediction == 1, 'SIM', 'NÃO')
+    df['probability'] = probability
+    df['status'] = np.asarray(STATUSES)[rng.integers(0, len(STATUSES), n)]
+    df['created_at'] = created_at
+    df['updated_at'] = created_at
+    df['month_key'] = created_at.year * 100 + created_at.month
+    return df
+
+
+def _part_path(output: str, index: int, fmt: str) -> str:
+    return os.path.join(output, f"part-{index:05d}.{fmt}")
+
+
+def escrever_parte(mode: str, seed: int, index: int, start_row: int, n: int, output: str, fmt: str) -> dict:
+    started = time.perf_counter()
+    rng = _rng(seed, index)
+    df = gerar_treino(rng, n) if mode == 'training' else gerar_leituras(rng, seed, start_row, n)
+    path = _part_path(output, index, fmt)
+    tmp_path = f"{path}.tmp"
+    if fmt == 'npy':
+        # Colunar em float32, no formato do cache de features (uma matriz por parte)
+        with open(tmp_path, 'wb') as handle:
+            np.save(handle, df.to_numpy(dtype=np.float32))
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return {'part': index, 'rows': n, 'bytes': os.path.getsize(path), 'seconds': time.perf_counter() - started}
+
+
+def _chunks(rows: int, chunk_rows: int):
+    for index, start in enumerate(range(0, rows, chunk_rows)):
+        yield index, start, min(chunk_rows, rows - start)
+
+
+def gerar_arquivos(mode: str, rows: int, output: str, seed: int = 42, chunk_rows: int = CHUNK_ROWS,
+                   n_jobs: int = -1, fmt: str = 'csv', verbose: bool = True) -> dict:
+    if mode == 'readings' and fmt == 'npy':
+        raise ValueError("readings tem colunas de texto (datas, paridade); use --format csv")
+    os.makedirs(output, exist_ok=True)
+    columns = TRAINING_COLUMNS if mode == 'training' else READING_COLUMNS
+    start = time.perf_counter()
+    written, size, parts = 0, 0, 0
+    tasks = (
+        delayed(escrever_parte)(mode, seed, index, start_row, n, output, fmt)
+        for index, start_row, n in _chunks(rows, chunk_rows)
+    )
+    for part in Parallel(n_jobs=n_jobs, return_as='generator_unordered')(tasks):
+        written += part['rows']
+        size += part['bytes']
+        parts += 1
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"🧬 {written}/{rows} linhas ({parts} partes, {written / elapsed:,.0f} linhas/s)")
+
+    elapsed = time.perf_counter() - start
+    meta = {
+        'mode': mode,
+        'rows': rows,
+        'seed': seed,
+        'chunk_rows': chunk_rows,
+        'format': fmt,
+        'columns': columns,
+        'parts': parts,
+        'bytes': size,
+        'seconds': round(elapsed, 2),
+        'rows_per_second': round(rows / elapsed) if elapsed else None,
+    }
+    with open(os.path.join(output, 'meta.json'), 'w', encoding='utf-8') as handle:
+        json.dump(meta, handle, indent=2)
+    return meta
+
+
+def _gerar_chunk_analises(seed: int, index: int, n: int, farms: int, cows_per_farm: int) -> pd.DataFrame:
+    return gerar_analises(_rng(seed, index), seed, n, farms, cows_per_farm)
+
+
+def _linhas_para_driver(df: pd.DataFrame, compiled):
+    """
+    Parâmetros já no formato do driver (JSON em texto, datas em
+    'AAAA-MM-DD HH:MM:SS'), montados por coluna: o executemany do DBAPI não
+    passa pelo processamento de tipos do SQLAlchemy linha a linha.
+    """
+
+    # As features vão nas colunas tipadas; o payload guarda só os extras do app
+    payloads = [json.dumps({'cowId': cow_id}) for cow_id in df['cow_id']]
+    stamps = df['created_at'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    columns = {
+        **{column: df[column].tolist() for column in df.columns if column not in ('created_at', 'updated_at')},
+        'payload': payloads,
+        'created_at': stamps.tolist(),
+        'updated_at': stamps.tolist(),
+    }
+    if compiled.positional:
+        return list(zip(*(columns[name] for name in compiled.positiontup)))
+    keys = list(compiled.params)
+    return [dict(zip(keys, values)) for values in zip(*(columns[name] for name in keys))]
+
+
+def popular_banco(rows: int, seed: int = 42, chunk_rows: int = 50_000, farms: int = 10,
+                  cows_per_farm: int = 5000, n_jobs: int = -1, verbose: bool = True) -> dict:
+    """
+    Insere `rows` análises em `cow_analyses` com executemany direto no driver
+    e aplica os agregados do dashboard de cada chunk na mesma transação. Os
+    chunks são gerados em paralelo; a escrita é sequencial, em ordem.
+    """
+
+    from sqlalchemy import insert
+
+    from db import AnalysisRecord, engine, init_db
+    from rollups import aplicar
+    from scripts.backfill_rollups import agregar_chunk
+
+    init_db()
+    table = AnalysisRecord.__table__
+    start = time.perf_counter()
+    written = 0
+    tasks = (
+        delayed(_gerar_chunk_analises)(seed, index, n, farms, cows_per_farm)
+        for index, _, n in _chunks(rows, chunk_rows)
+    )
+    for df in Parallel(n_jobs=n_jobs, return_as='generator')(tasks):
+        with engine.begin() as connection:
+            columns = [column for column in df.columns] + ['payload']
+            compiled = insert(table).compile(dialect=connection.dialect, column_keys=columns)
+            connection.exec_driver_sql(str(compiled), _linhas_para_driver(df, compiled))
+            aplicar(connection, *agregar_chunk(df))
+        written += len(df)
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"🐄 {written}/{rows} análises inseridas ({written / elapsed:,.0f}/s)")
+
+    elapsed = time.perf_counter() - start
+    return {'rows': written, 'seconds': round(elapsed, 2), 'rows_per_second': round(written / elapsed)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gera rebanho sintético em escala")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Processos (-1 = todos os núcleos)")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    for mode, help_text in (('training', "Features do modelo + is_pregnant"),
+                            ('readings', "Leituras no formato de cow_monitoring_data.csv")):
+        sub = subparsers.add_parser(mode, help=help_text)
+        sub.add_argument('--rows', type=int, required=True)
+        sub.add_argument('--output', required=True, help="Diretório das partes e do meta.json")
+        sub.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Linhas por parte")
+        sub.add_argument('--format', choices=['csv', 'npy'], default='csv')
+
+    analyses = subparsers.add_parser('analyses', help="Insere análises no banco (DATABASE_URL)")
+    analyses.add_argument('--rows', type=int, required=True)
+    analyses.add_argument('--chunk-rows', type=int, default=50_000, help="Linhas por transação")
+    analyses.add_argument('--farms', type=int, default=10)
+    analyses.add_argument('--cows-per-farm', type=int, default=5000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.mode == 'analyses':
+        report = popular_banco(
+            args.rows, seed=args.seed, chunk_rows=args.chunk_rows, farms=args.farms,
+            cows_per_farm=args.cows_per_farm, n_jobs=args.n_jobs,
+        )
+    else:
+        report = gerar_arquivos(
+            args.mode, args.rows, args.output, seed=args.seed, chunk_rows=args.chunk_rows,
+            n_jobs=args.n_jobs, fmt=args.format,
+        )
+    print(f"✅ {report['rows']} linhas em {report['seconds']}s ({report['rows_per_second']:,} linhas/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
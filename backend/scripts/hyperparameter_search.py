@@ -0,0 +1,178 @@
+# backend/scripts/hyperparameter_search.py
+"""
+Busca de hiperparâmetros do RandomForest por successive halving.
+
+Cada candidato (scaler + hiperparâmetros da floresta) começa com poucas
+árvores; a cada rodada só a melhor fração sobrevive e cresce com
+`warm_start`, reaproveitando as árvores já treinadas em vez de refazer o
+fit. As rodadas de cada nível rodam em paralelo e a busca para quando o
+orçamento de tempo (wall-clock ou CPU) acabaria na próxima rodada.
+"""
+import itertools
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import RobustScaler, StandardScaler
+
+from scripts.model_metrics import model_size_bytes, single_row_latency_ms
+
+SEARCH_SPACE = {
+    'scaler': ['standard', 'robust', 'none'],
+    'max_depth': [6, 10, 15, None],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': ['sqrt', 0.5],
+}
+SCALERS = {
+    'standard': StandardScaler,
+    'robust': RobustScaler,
+    'none': lambda: 'passthrough',
+}
+
+
+def gerar_candidatos(n_candidates=24, seed=42):
+    """Amostra configurações da grade sem repetição"""
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    if n_candidates >= len(grid):
+        return grid
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in sorted(rng.choice(len(grid), size=n_candidates, replace=False))]
+
+
+def montar_pipeline(config, n_estimators, seed=42):
+    return Pipeline([
+        ('scaler', SCALERS[config['scaler']]()),
+        ('classifier', RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=config['max_depth'],
+            min_samples_split=5,
+            min_samples_leaf=config['min_samples_leaf'],
+            max_features=config['max_features'],
+            class_weight='balanced',
+            random_state=seed,
+            warm_start=True,
+            n_jobs=1,
+        )),
+    ])
+
+
+def _crescer(pipeline, n_estimators, X_train, y_train, X_val, y_val):
+    """Adiciona árvores até `n_estimators` (warm_start) e avalia na validação"""
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    pipeline.set_params(classifier__n_estimators=n_estimators)
+    pipeline.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+    proba = pipeline.predict_proba(X_val)[:, 1]
+    y_pred = (proba >= 0.5).astype(int)
+    metrics = {
+        'accuracy': float(accuracy_score(y_val, y_pred)),
+        'roc_auc': float(roc_auc_score(y_val, proba)) if len(np.unique(y_val)) > 1 else None,
+        'fit_seconds': fit_time,
+        'cpu_seconds': time.process_time() - cpu_start,
+    }
+    return pipeline, metrics
+
+
+def _score(metrics, metric):
+    value = metrics.get(metric)
+    return -np.inf if value is None else value
+
+
+def successive_halving(X_train, y_train, X_val, y_val, n_candidates=24, min_trees=25, max_trees=200,
+                       eta=2, budget_seconds=None, budget_cpu_seconds=None, metric='accuracy',
+                       n_jobs=-1, seed=42):
+    """Executa a busca e devolve (pipeline vencedor, relatório com todas as rodadas)"""
+    configs = gerar_candidatos(n_candidates, seed)
+    candidates = [
+        {'id': i, 'config': config, 'pipeline': montar_pipeline(config, min_trees, seed), 'history': []}
+        for i, config in enumerate(configs)
+    ]
+    all_candidates = list(candidates)
+    y_train = np.asarray(y_train)
+    y_val = np.asarray(y_val)
+
+    print(f"🔎 Successive halving: {len(candidates)} candidatos, {min_trees}->{max_trees} árvores, eta={eta}")
+    search_start = time.perf_counter()
+    cpu_used = 0.0
+    n_trees = min_trees
+    rounds = []
+    stop_reason = 'max_trees'
+
+    while True:
+        round_start = time.perf_counter()
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_crescer)(cand['pipeline'], n_trees, X_train, y_train, X_val, y_val)
+            for cand in candidates
+        )
+        round_wall = time.perf_counter() - round_start
+        round_cpu = sum(metrics['cpu_seconds'] for _, metrics in outputs)
+        cpu_used += round_cpu
+
+        for cand, (pipeline, metrics) in zip(candidates, outputs):
+            cand['pipeline'] = pipeline
+            metrics['n_estimators'] = n_trees
+            metrics['model_size_bytes'] = model_size_bytes(pipeline)
+            metrics['single_row_latency_ms'] = single_row_latency_ms(pipeline, X_val, repeats=15)
+            cand['history'].append(metrics)
+
+        candidates.sort(key=lambda cand: _score(cand['history'][-1], metric), reverse=True)
+        best = candidates[0]['history'][-1]
+        rounds.append({
+            'n_estimators': n_trees,
+            'candidates': len(candidates),
+            'wall_seconds': round_wall,
+            'cpu_seconds': round_cpu,
+        })
+        print(f"   🌲 {n_trees} árvores | {len(candidates)} candidatos | {round_wall:.2f}s | "
+              f"melhor {metric}={best[metric]:.4f} ({candidates[0]['config']})")
+
+        if len(candidates) == 1:
+            stop_reason = 'single_candidate'
+            break
+        next_trees = min(n_trees * eta, max_trees)
+        if next_trees == n_trees:
+            break
+
+        # Estimativa da próxima rodada: menos candidatos, mas mais árvores novas por candidato
+        survivors = max(1, len(candidates) // eta)
+        growth = (next_trees - n_trees) / n_trees
+        factor = survivors / len(candidates) * growth
+        elapsed = time.perf_counter() - search_start
+        if budget_seconds is not None and elapsed + round_wall * factor > budget_seconds:
+            stop_reason = 'wall_budget'
+            break
+        if budget_cpu_seconds is not None and cpu_used + round_cpu * factor > budget_cpu_seconds:
+            stop_reason = 'cpu_budget'
+            break
+
+        for cand in candidates[survivors:]:
+            cand['pipeline'] = None
+        candidates = candidates[:survivors]
+        n_trees = next_trees
+
+    winner = candidates[0]
+    # O bundle final não deve continuar em warm_start (um novo fit refaz a floresta)
+    winner['pipeline'].set_params(classifier__warm_start=False)
+    report = {
+        'strategy': 'successive_halving',
+        'metric': metric,
+        'eta': eta,
+        'min_trees': min_trees,
+        'max_trees': max_trees,
+        'budget_seconds': budget_seconds,
+        'budget_cpu_seconds': budget_cpu_seconds,
+        'stop_reason': stop_reason,
+        'wall_seconds': time.perf_counter() - search_start,
+        'cpu_seconds': cpu_used,
+        'rounds': rounds,
+        'winner': {'id': winner['id'], 'config': winner['config'], **winner['history'][-1]},
+        'candidates': [
+            {'id': cand['id'], 'config': cand['config'], 'history': cand['history']}
+            for cand in all_candidates
+        ],
+    }
+    return winner['pipeline'], report
@@ -0,0 +1,88 @@
+# backend/scripts/manage_partitions.py
+"""
+Manutenção das partições mensais de `cow_analyses` (MySQL).
+
+Divide a partição `pmax` para que sempre existam partições para os próximos
+`--months-ahead` meses; assim nenhuma linha nova cai em `pmax` e as
+consultas por mês continuam podando partições. `REORGANIZE PARTITION` sobre
+a `pmax` vazia é só metadado, sem cópia de dados.
+
+Uso (a partir de backend/, ex.: cron mensal):
+    python scripts/manage_partitions.py --months-ahead 3
+    python scripts/manage_partitions.py --dry-run
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from db import engine, month_key
+
+TABLE = "cow_analyses"
+
+
+def _proximo_mes(key: int) -> int:
+    year, month = divmod(key, 100)
+    return key + 1 if month < 12 else (year + 1) * 100 + 1
+
+
+def particoes_mensais(connection):
+    rows = connection.execute(text(
+        "SELECT DISTINCT PARTITION_NAME, PARTITION_DESCRIPTION "
+        "FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL"
+    ), {"table": TABLE}).all()
+    return {name: description for name, description in rows}
+
+
+def plano(existing: dict, months_ahead: int, today=None):
+    """DDL que cria as partições faltantes até `months_ahead` meses à frente (ou None)."""
+
+    if "pmax" not in existing:
+        raise RuntimeError(f"{TABLE} não está particionada (aplique migrations/002_farm_partitioning.sql)")
+    bounds = [int(value) for value in existing.values() if value not in (None, "MAXVALUE")]
+    next_start = max(bounds) if bounds else month_key(today)
+
+    target = month_key(today)
+    for _ in range(months_ahead):
+        target = _proximo_mes(target)
+
+    new_parts = []
+    while next_start <= target:
+        upper = _proximo_mes(next_start)
+        new_parts.append(f"PARTITION p{next_start} VALUES LESS THAN ({upper})")
+        next_start = upper
+    if not new_parts:
+        return None
+    new_parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return f"ALTER TABLE {TABLE} REORGANIZE PARTITION pmax INTO (\n  " + ",\n  ".join(new_parts) + "\n)"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cria as próximas partições mensais de cow_analyses")
+    parser.add_argument('--months-ahead', type=int, default=3)
+    parser.add_argument('--dry-run', action='store_true')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if engine.dialect.name != "mysql":
+        print(f"ℹ️ Particionamento só se aplica ao MySQL (banco atual: {engine.dialect.name})")
+        sys.exit(0)
+
+    with engine.begin() as connection:
+        ddl = plano(particoes_mensais(connection), args.months_ahead, datetime.now())
+        if ddl is None:
+            print("✅ Partições já cobrem os próximos meses")
+        elif args.dry_run:
+            print(ddl)
+        else:
+            connection.execute(text(ddl))
+            print(f"✅ Partições criadas:\n{ddl}")
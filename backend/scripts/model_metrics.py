@@ -0,0 +1,58 @@
+# backend/scripts/model_metrics.py
+"""
+Medidas de custo de modelos usadas na busca de hiperparâmetros e na
+seleção de modelos: tamanho serializado, memória depois de carregado e
+latência de inferência (uma linha e lote).
+"""
+import pickle
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def model_size_bytes(model):
+    """Tamanho do modelo serializado com pickle (proxy do artefato joblib)"""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def single_row_latency_ms(model, X, repeats=30, warmup=3):
+    """Mediana da latência de predict_proba para uma única linha, como no /predict"""
+    row = X.iloc[[0]] if hasattr(X, 'iloc') else X[:1]
+    for _ in range(warmup):
+        model.predict_proba(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000.0)
+
+
+def batch_latency_ms(model, X, batch_size=1000, repeats=5):
+    """Mediana da latência de predict_proba para um lote de `batch_size` linhas (repete X se faltar)"""
+    reps = -(-batch_size // len(X))
+    if hasattr(X, 'iloc'):
+        batch = X.iloc[np.tile(np.arange(len(X)), reps)[:batch_size]]
+    else:
+        batch = np.tile(X, (reps, 1))[:batch_size]
+    model.predict_proba(batch)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000.0)
+
+
+def loaded_memory_bytes(model):
+    """Memória alocada ao desserializar o modelo (o que o processo da API mantém carregado)"""
+    payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    tracemalloc.start()
+    try:
+        loaded = pickle.loads(payload)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del loaded
+    return int(current)
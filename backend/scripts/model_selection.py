@@ -0,0 +1,246 @@
+# backend/scripts/model_selection.py
+"""
+Seleção do modelo servido por acurácia e custo de inferência.
+
+A partir da floresta treinada, gera versões comprimidas:
+
+- poda de árvores: mantém as N árvores com melhor acurácia out-of-bag
+  (cada árvore é avaliada nas linhas de treino que ficaram fora do seu
+  bootstrap, então a escolha não usa o conjunto de teste);
+- limite de profundidade: refaz o fit com `max_depth` menor;
+- destilação: uma floresta pequena treinada com os rótulos da floresta
+  original sobre o treino mais cópias com ruído.
+
+Todos os candidatos (inclusive o original) são medidos em um holdout que
+não participou do treino nem da escolha do original: acurácia, AUC,
+latência de uma linha e de um lote, tamanho do artefato e memória depois
+de carregado. A tabela marca a fronteira de Pareto (acurácia x latência x
+tamanho) e o quanto de acurácia cada compressão custa. Só um orçamento de
+latência explícito troca o modelo: o escolhido é o mais acurado que cabe
+nele. Sem orçamento, o original segue e a tabela fica como relatório (a
+diferença de acurácia entre candidatos é ruído do holdout).
+
+Os candidatos continuam sendo Pipeline(pré-processamento, RandomForest),
+então o /predict e o ForestExplainer funcionam com qualquer um.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.pipeline import Pipeline
+
+from scripts.model_metrics import batch_latency_ms, loaded_memory_bytes, model_size_bytes, single_row_latency_ms
+
+PRUNE_TREES = (100, 50, 25, 10)
+DEPTH_CAPS = (10, 6, 4)
+# (árvores, profundidade) das florestas destiladas
+DISTILL_CONFIGS = ((25, 8), (10, 6))
+BATCH_SIZE = 1000
+
+
+def _floresta(pipeline):
+    return pipeline.steps[-1][1]
+
+
+def _com_floresta(pipeline, forest):
+    """Mesmo pré-processamento já treinado, outra floresta no último passo"""
+    return Pipeline(pipeline.steps[:-1] + [(pipeline.steps[-1][0], forest)])
+
+
+def avaliar(name, model, X_test, y_test, kind='original', params=None):
+    proba = model.predict_proba(X_test)[:, 1]
+    y_pred = (proba >= 0.5).astype(int)
+    forest = _floresta(model)
+    depths = [estimator.get_depth() for estimator in forest.estimators_]
+    batch_ms = batch_latency_ms(model, X_test, BATCH_SIZE)
+    return {
+        'name': name,
+        'kind': kind,
+        'params': params or {},
+        'n_estimators': len(forest.estimators_),
+        'max_depth': int(max(depths)),
+        'total_nodes': int(sum(estimator.tree_.node_count for estimator in forest.estimators_)),
+        'accuracy': float(accuracy_score(y_test, y_pred)),
+        'roc_auc': float(roc_auc_score(y_test, proba)) if len(np.unique(y_test)) > 1 else None,
+        'single_row_latency_ms': round(single_row_latency_ms(model, X_test), 4),
+        'batch_latency_ms': round(batch_ms, 3),
+        'batch_row_latency_us': round(batch_ms * 1000 / BATCH_SIZE, 3),
+        'model_size_bytes': model_size_bytes(model),
+        'memory_bytes': loaded_memory_bytes(model),
+    }
+
+
+def acuracia_oob_por_arvore(pipeline, X_train, y_train):
+    """Acurácia de cada árvore nas linhas de treino fora do seu bootstrap"""
+    forest = _floresta(pipeline)
+    if not getattr(forest, 'bootstrap', False):
+        return None
+    Xt = np.asarray(pipeline[:-1].transform(X_train))
+    y = np.asarray(y_train)
+    classes = forest.classes_
+    scores = []
+    for estimator, samples in zip(forest.estimators_, forest.estimators_samples_):
+        oob = np.ones(len(y), dtype=bool)
+        oob[samples] = False
+        if not oob.any():
+            scores.append(0.0)
+            continue
+        predicted = classes[np.argmax(estimator.predict_proba(Xt[oob]), axis=1)]
+        scores.append(float(np.mean(predicted == y[oob])))
+    return np.asarray(scores)
+
+
+def podar_arvores(pipeline, n_trees, tree_scores=None):
+    """Mantém as `n_trees` melhores árvores (ou as primeiras, sem pontuação OOB)"""
+    forest = _floresta(pipeline)
+    if tree_scores is None:
+        keep = np.arange(n_trees)
+    else:
+        keep = np.sort(np.argsort(-tree_scores, kind='stable')[:n_trees])
+    pruned = copy.copy(forest)
+    pruned.estimators_ = [forest.estimators_[index] for index in keep]
+    pruned.n_estimators = len(pruned.estimators_)
+    return _com_floresta(pipeline, pruned)
+
+
+def limitar_profundidade(pipeline, max_depth, X_train, y_train):
+    step = pipeline.steps[-1][0]
+    capped = clone(pipeline).set_params(**{f'{step}__max_depth': max_depth})
+    return capped.fit(X_train, y_train)
+
+
+def destilar(pipeline, X_train, n_trees, max_depth, copies=4, noise=0.1, seed=42):
+    """
+    Floresta pequena treinada nos rótulos do modelo original. As cópias com
+    ruído (fração do desvio de cada coluna) cobrem a vizinhança do treino,
+    onde a fronteira do professor importa.
+    """
+
+    rng = np.random.default_rng(seed)
+    X_train = pd.DataFrame(X_train).reset_index(drop=True)
+    scale = X_train.std().fillna(0).to_numpy() * noise
+    jittered = [
+        X_train + rng.standard_normal(X_train.shape) * scale
+        for _ in range(copies)
+    ]
+    X_student = pd.concat([X_train, *jittered], ignore_index=True)
+    y_student = pipeline.predict(X_student)
+
+    step = pipeline.steps[-1][0]
+    student = clone(pipeline).set_params(**{
+        f'{step}__n_estimators': n_trees,
+        f'{step}__max_depth': max_depth,
+        # Os rótulos do professor já vêm balanceados pela floresta original
+        f'{step}__class_weight': None,
+    })
+    return student.fit(X_student, y_student)
+
+
+def gerar_candidatos(pipeline, X_train, y_train, prune_trees=PRUNE_TREES, depth_caps=DEPTH_CAPS,
+                     distill_configs=DISTILL_CONFIGS):
+    """Devolve [(nome, tipo, parâmetros, pipeline)], começando pelo original"""
+    forest = _floresta(pipeline)
+    candidates = [('original', 'original', {}, pipeline)]
+
+    tree_scores = acuracia_oob_por_arvore(pipeline, X_train, y_train)
+    for n_trees in prune_trees:
+        if n_trees < len(forest.estimators_):
+            candidates.append((
+                f'prune_{n_trees}', 'prune', {'n_estimators': n_trees},
+                podar_arvores(pipeline, n_trees, tree_scores),
+            ))
+
+    current_depth = forest.max_depth
+    for depth in depth_caps:
+        if current_depth is None or depth < current_depth:
+            candidates.append((
+                f'depth_{depth}', 'depth_cap', {'max_depth': depth},
+                limitar_profundidade(pipeline, depth, X_train, y_train),
+            ))
+
+    for n_trees, depth in distill_configs:
+        candidates.append((
+            f'distill_{n_trees}x{depth}', 'distill', {'n_estimators': n_trees, 'max_depth': depth},
+            destilar(pipeline, X_train, n_trees, depth),
+        ))
+    return candidates
+
+
+def fronteira_pareto(rows, maximize=('accuracy',), minimize=('single_row_latency_ms', 'model_size_bytes')):
+    """Marca `pareto` nas linhas que nenhuma outra supera em todos os objetivos"""
+
+    def vetor(row):
+        return [row[key] for key in maximize] + [-row[key] for key in minimize]
+
+    vectors = [vetor(row) for row in rows]
+    for row, mine in zip(rows, vectors):
+        row['pareto'] = not any(
+            all(o >= m for o, m in zip(other, mine)) and any(o > m for o, m in zip(other, mine))
+            for other in vectors if other is not mine
+        )
+    return rows
+
+
+def escolher(rows, latency_budget_ms=None, metric='accuracy'):
+    """
+    O mais acurado com latência de uma linha dentro do orçamento (empate:
+    o mais rápido). Se nenhum cabe, o mais rápido. Sem orçamento, o
+    original (primeira linha).
+    """
+
+    if latency_budget_ms is None:
+        return rows[0], True
+
+    def score(row):
+        return -np.inf if row.get(metric) is None else row[metric]
+
+    fitting = [row for row in rows if row['single_row_latency_ms'] <= latency_budget_ms]
+    if not fitting:
+        return min(rows, key=lambda row: row['single_row_latency_ms']), False
+    return max(fitting, key=lambda row: (score(row), -row['single_row_latency_ms'])), True
+
+
+def selecionar(pipeline, X_train, y_train, X_test, y_test, latency_budget_ms=None, metric='accuracy', **kwargs):
+    """
+    Gera e mede os candidatos; devolve (pipeline escolhido, relatório para o
+    metadata). Com latency_budget_ms, X_test/y_test devem ser um holdout
+    próprio da seleção; sem ele, o original fica e a tabela é só relatório.
+    """
+    print("\n⚖️  SELEÇÃO POR ACURÁCIA E LATÊNCIA:")
+    print("=" * 50)
+    candidates = gerar_candidatos(pipeline, X_train, y_train, **kwargs)
+    models = {}
+    rows = []
+    for name, kind, params, model in candidates:
+        models[name] = model
+        rows.append(avaliar(name, model, X_test, y_test, kind, params))
+
+    baseline = rows[0]
+    for row in rows:
+        row['accuracy_cost'] = round(baseline['accuracy'] - row['accuracy'], 4)
+        row['latency_speedup'] = round(baseline['single_row_latency_ms'] / row['single_row_latency_ms'], 2)
+        row['size_ratio'] = round(row['model_size_bytes'] / baseline['model_size_bytes'], 4)
+    fronteira_pareto(rows)
+    chosen, budget_met = escolher(rows, latency_budget_ms, metric)
+
+    print(f"{'candidato':<14} {'acc':>6} {'auc':>6} {'1 linha ms':>10} {'lote us/l':>9} "
+          f"{'KB':>8} {'custo acc':>9} pareto")
+    for row in rows:
+        auc = f"{row['roc_auc']:.3f}" if row['roc_auc'] is not None else '   -'
+        print(f"{row['name']:<14} {row['accuracy']:>6.3f} {auc:>6} {row['single_row_latency_ms']:>10.3f} "
+              f"{row['batch_row_latency_us']:>9.2f} {row['model_size_bytes'] / 1024:>8.1f} "
+              f"{row['accuracy_cost']:>9.4f} {'*' if row['pareto'] else ''}")
+    budget = f"{latency_budget_ms} ms" if latency_budget_ms is not None else "sem orçamento"
+    print(f"🏁 Escolhido: {chosen['name']} ({budget}{'' if budget_met else ', nenhum candidato coube'})")
+
+    report = {
+        'metric': metric,
+        'latency_budget_ms': latency_budget_ms,
+        'budget_met': budget_met,
+        'selected': chosen['name'],
+        'batch_size': BATCH_SIZE,
+        'candidates': rows,
+    }
+    return models[chosen['name']], report
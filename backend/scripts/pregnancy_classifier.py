@@ -2,9 +2,12 @@
 import pandas as pd
 import numpy as np
 import joblib
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.model_selection import train_test_split, cross_val_score, KFold
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, KFold
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
@@ -14,14 +17,62 @@ from sklearn.svm import SVC
 from sklearn.naive_bayes import GaussianNB
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from sklearn.pipeline import Pipeline
+import argparse
+import json
 import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from scripts.feature_cache import cached_features
+from scripts.hyperparameter_search import successive_halving
+from scripts.model_selection import selecionar
+
+
+def _display_disponivel():
+    """Indica se há um display para abrir janelas do matplotlib"""
+    if 'agg' in matplotlib.get_backend().lower():
+        return False
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+
+def _avaliar_fold(name, model, X, y, train_idx, test_idx):
+    """Treina e avalia um par (modelo, fold); roda dentro do pool de processos"""
+    try:
+        estimator = clone(model)
+        start = time.perf_counter()
+        estimator.fit(X.iloc[train_idx], y[train_idx])
+        fit_time = time.perf_counter() - start
+        start = time.perf_counter()
+        y_pred = estimator.predict(X.iloc[test_idx])
+        predict_time = time.perf_counter() - start
+        return name, accuracy_score(y[test_idx], y_pred), fit_time, predict_time, None
+    except Exception as e:
+        return name, None, None, None, str(e)
+
 
 class CowPregnancyClassifierPadrao:
-    def __init__(self):
+    def __init__(self, n_jobs=-1, show_plots=None):
         self.pipeline = None
         self.features = None
         self.model_trained = False
         self.label_encoders = {}
+        self.n_jobs = n_jobs
+        # None = detectar automaticamente (execuções headless não abrem janelas)
+        self.show_plots = _display_disponivel() if show_plots is None else show_plots
+        self.comparison_summary = {}
+    
+    def _mostrar_grafico(self):
+        """Exibe o gráfico atual ou apenas o descarta em execuções headless"""
+        if self.show_plots:
+            plt.show()
+        else:
+            plt.close()
         
     def load_data(self, file_path):
         """Carrega dados seguindo padrão dos notebooks"""
@@ -89,6 +140,19 @@ class CowPregnancyClassifierPadrao:
         
         return df_processed, y
     
+    def preprocess_file(self, file_path, chunksize=100_000, cache_dir=None, use_cache=True):
+        """Pré-processamento em chunks com cache colunar (CSVs maiores que a RAM)"""
+        print("\n🧹 PRÉ-PROCESSAMENTO EM CHUNKS:")
+        print("="*50)
+        
+        X, y, meta = cached_features(file_path, cache_dir=cache_dir, chunksize=chunksize, use_cache=use_cache)
+        self.features = meta['features']
+        
+        print(f"📋 Features finais: {self.features}")
+        print(f"📊 Shape de X: {X.shape}")
+        print(f"🎯 Distribuição do target: {pd.Series(y).value_counts().to_dict()}")
+        return X, y
+    
     def _handle_parity_column(self, df):
         """Converte a coluna 'parity' de texto para numérico"""
         if 'parity' in df.columns:
@@ -245,15 +309,17 @@ class CowPregnancyClassifierPadrao:
         plt.tight_layout()
         plt.savefig('correlation_matrix.png')
         print("📈 Heatmap salvo como 'correlation_matrix.png'")
-        plt.show()
+        self._mostrar_grafico()
     
-    def compare_models(self, X, y):
+    def compare_models(self, X, y, n_jobs=None):
         """Compara múltiplos modelos como nos notebooks"""
         print("\n🤖 COMPARAÇÃO DE MODELOS:")
         print("="*50)
         
         # Garantir que X é totalmente numérico
         X_numeric = X.apply(pd.to_numeric, errors='coerce')
+        y = np.asarray(y)
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
         
         # Lista de modelos para comparar
         models = [
@@ -265,21 +331,42 @@ class CowPregnancyClassifierPadrao:
             ('RF', RandomForestClassifier(random_state=42, class_weight='balanced'))
         ]
         
-        # Validação cruzada
+        # Validação cruzada: cada par (modelo, fold) vira uma tarefa do pool de processos
+        kfold = KFold(n_splits=5, shuffle=True, random_state=42)
+        folds = list(kfold.split(X_numeric))
+        
+        print(f"📊 Avaliação com validação cruzada (5 folds, n_jobs={n_jobs}):")
+        start = time.perf_counter()
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_avaliar_fold)(name, model, X_numeric, y, train_idx, test_idx)
+            for name, model in models
+            for train_idx, test_idx in folds
+        )
+        wall_time = time.perf_counter() - start
+        
         results = []
         names = []
-        
-        print("📊 Avaliação com validação cruzada (5 folds):")
-        for name, model in models:
-            try:
-                kfold = KFold(n_splits=5, shuffle=True, random_state=42)
-                cv_results = cross_val_score(model, X_numeric, y, cv=kfold, scoring='accuracy')
-                results.append(cv_results)
-                names.append(name)
-                print(f"   {name}: {cv_results.mean():.3f} (+/- {cv_results.std():.3f})")
-            except Exception as e:
-                print(f"   ❌ {name}: Erro - {e}")
-                results.append([0])  # Placeholder para manter o índice
+        self.comparison_summary = {}
+        for name, _ in models:
+            model_outputs = [out for out in outputs if out[0] == name]
+            errors = [out[4] for out in model_outputs if out[4] is not None]
+            if errors:
+                print(f"   ❌ {name}: Erro - {errors[0]}")
+                continue
+            cv_results = np.array([out[1] for out in model_outputs])
+            fit_time = sum(out[2] for out in model_outputs)
+            predict_time = sum(out[3] for out in model_outputs)
+            results.append(cv_results)
+            names.append(name)
+            self.comparison_summary[name] = {
+                'accuracy_mean': float(cv_results.mean()),
+                'accuracy_std': float(cv_results.std()),
+                'fit_time': fit_time,
+                'predict_time': predict_time,
+            }
+            print(f"   {name}: {cv_results.mean():.3f} (+/- {cv_results.std():.3f}) | "
+                  f"fit {fit_time:.2f}s | predict {predict_time:.3f}s")
+        print(f"⏱️  Tempo total da comparação: {wall_time:.2f}s")
         
         # Boxplot comparativo (apenas para modelos que funcionaram)
         if len(results) > 0:
@@ -291,7 +378,7 @@ class CowPregnancyClassifierPadrao:
             plt.grid(True, alpha=0.3)
             plt.savefig('model_comparison.png')
             print("📈 Gráfico de comparação salvo como 'model_comparison.png'")
-            plt.show()
+            self._mostrar_grafico()
         
         return models, results, names
     
@@ -364,7 +451,52 @@ class CowPregnancyClassifierPadrao:
         self.model_trained = True
         return test_score
     
-    def save_model(self, file_path):
+    def search_hyperparameters(self, X, y, test_size=0.2, latency_budget_ms=None, select=True, holdout_size=0.2,
+                               **search_kwargs):
+        """
+        Successive halving sobre scaler + RandomForest; o vencedor vira self.pipeline (ou, com
+        latency_budget_ms, a compressão escolhida em um holdout separado da validação da busca).
+        Sem orçamento a seleção é só relatório: sai da própria validação (otimista) e não tira
+        dados do treino.
+        """
+        print("\n🔎 BUSCA DE HIPERPARÂMETROS:")
+        print("="*50)
+        
+        X_numeric = X.apply(pd.to_numeric, errors='coerce')
+        holdout = select and latency_budget_ms is not None
+        if holdout:
+            # A validação escolheu o vencedor: medir os candidatos nela favoreceria o original
+            X_numeric, X_hold, y, y_hold = train_test_split(
+                X_numeric, y, test_size=holdout_size, random_state=42, stratify=y
+            )
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_numeric, y, test_size=test_size, random_state=42, stratify=y
+        )
+        search_kwargs.setdefault('n_jobs', self.n_jobs)
+        self.pipeline, report = successive_halving(X_train, y_train, X_val, y_val, **search_kwargs)
+        self.model_trained = True
+        
+        winner = report['winner']
+        print(f"🏆 Vencedor: {winner['config']} com {winner['n_estimators']} árvores")
+        print(f"🎯 Acurácia (validação): {winner['accuracy']:.3f} | AUC: {winner['roc_auc']}")
+        print(f"📦 Tamanho: {winner['model_size_bytes'] / 1024:.1f} KB | "
+              f"latência 1 linha: {winner['single_row_latency_ms']:.2f} ms")
+        print(f"⏱️  Busca: {report['wall_seconds']:.1f}s (parada: {report['stop_reason']})")
+        
+        if select:
+            X_sel, y_sel = (X_hold, y_hold) if holdout else (X_val, y_val)
+            self.pipeline, selection = selecionar(
+                self.pipeline, X_train, y_train, X_sel, y_sel,
+                latency_budget_ms=latency_budget_ms, metric=search_kwargs.get('metric', 'accuracy'),
+            )
+            # Medida na validação que escolheu o vencedor, a tabela favorece o original
+            selection['evaluation'] = 'holdout' if holdout else 'validation_optimistic'
+            if not holdout:
+                print("⚠️ Seleção medida na validação da busca (otimista); só relatório")
+            report['model_selection'] = selection
+        return report
+    
+    def save_model(self, file_path, metadata=None):
         """Salva modelo treinado"""
         if not self.model_trained:
             raise ValueError("❌ Modelo não treinado!")
@@ -375,7 +507,8 @@ class CowPregnancyClassifierPadrao:
             'metadata': {
                 'model_type': 'RandomForest',
                 'n_features': len(self.features),
-                'training_date': pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+                'training_date': pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+                **(metadata or {})
             }
         }
         
@@ -383,22 +516,136 @@ class CowPregnancyClassifierPadrao:
         joblib.dump(model_bundle, file_path)
         print(f"✅ Modelo salvo em: {file_path}")
 
-def main():
+def benchmark_compare_models(data_path, upsample=100, n_jobs=-1, output=None):
+    """Mede o speedup do compare_models paralelo vs sequencial (dataset original e replicado)"""
+    print("⏱️  BENCHMARK DA COMPARAÇÃO DE MODELOS")
+    print("="*60)
+    
+    classifier = CowPregnancyClassifierPadrao(n_jobs=n_jobs, show_plots=False)
+    df = classifier.load_data(data_path)
+    X, y = classifier.preprocess_data(df)
+    
+    report = {'cpu_count': os.cpu_count(), 'n_jobs': n_jobs, 'runs': {}}
+    for factor in sorted({1, upsample}):
+        X_run = pd.concat([X] * factor, ignore_index=True)
+        y_run = np.tile(np.asarray(y), factor)
+        timings = {}
+        for jobs in (1, n_jobs):
+            start = time.perf_counter()
+            classifier.compare_models(X_run, y_run, n_jobs=jobs)
+            timings[jobs] = time.perf_counter() - start
+        report['runs'][f'x{factor}'] = {
+            'rows': len(X_run),
+            'sequential_seconds': timings[1],
+            'parallel_seconds': timings[n_jobs],
+            'speedup': timings[1] / timings[n_jobs] if timings[n_jobs] > 0 else None,
+            'models': classifier.comparison_summary,
+        }
+    
+    print("\n📊 SPEEDUP (sequencial -> paralelo):")
+    for key, run in report['runs'].items():
+        print(f"   {key} ({run['rows']} linhas): {run['sequential_seconds']:.2f}s -> "
+              f"{run['parallel_seconds']:.2f}s | speedup {run['speedup']:.2f}x")
+    
+    if output:
+        with open(output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"✅ Relatório salvo em: {output}")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Treinamento do classificador de prenhez")
+    parser.add_argument('--data', default='cow_monitoring_data.csv', help="CSV de monitoramento")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Processos do pool (-1 = todos os núcleos)")
+    parser.add_argument('--no-plots', action='store_true', help="Não abre janelas do matplotlib")
+    parser.add_argument('--chunked', action='store_true',
+                        help="Pré-processa em chunks e usa o cache colunar de features")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="Linhas por chunk (--chunked)")
+    parser.add_argument('--cache-dir', help="Diretório do cache de features (--chunked)")
+    parser.add_argument('--no-cache', action='store_true', help="Reconstrói o cache mesmo se existir")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('train', help="Fluxo completo de treinamento (padrão)")
+    search = subparsers.add_parser('search', help="Busca de hiperparâmetros por successive halving")
+    search.add_argument('--candidates', type=int, default=24, help="Configurações iniciais")
+    search.add_argument('--min-trees', type=int, default=25)
+    search.add_argument('--max-trees', type=int, default=200)
+    search.add_argument('--eta', type=int, default=2, help="Fator de corte/crescimento por rodada")
+    search.add_argument('--budget-seconds', type=float, help="Orçamento de wall-clock")
+    search.add_argument('--budget-cpu-seconds', type=float, help="Orçamento de CPU (soma dos workers)")
+    search.add_argument('--metric', choices=['accuracy', 'roc_auc'], default='accuracy')
+    search.add_argument('--latency-budget-ms', type=float,
+                        help="Latência máxima de uma linha; escolhe entre o vencedor e suas compressões")
+    search.add_argument('--no-selection', action='store_true', help="Salva o vencedor sem comparar compressões")
+    search.add_argument('--output', default=os.path.join(BACKEND_DIR, 'models', 'pregnancy_pipeline.joblib'),
+                        help="Destino do bundle vencedor")
+    bench = subparsers.add_parser('benchmark-compare', help="Speedup do compare_models paralelo")
+    bench.add_argument('--upsample', type=int, default=100, help="Fator de replicação do dataset")
+    bench.add_argument('--output', help="Arquivo JSON com o relatório")
+    return parser.parse_args(argv)
+
+
+def run_search(args):
+    """Subcomando `search`: busca com orçamento e salva o vencedor no formato do save_model"""
+    classifier = CowPregnancyClassifierPadrao(n_jobs=args.n_jobs, show_plots=False)
+    if args.chunked:
+        X, y = classifier.preprocess_file(
+            args.data, chunksize=args.chunksize, cache_dir=args.cache_dir, use_cache=not args.no_cache
+        )
+    else:
+        X, y = classifier.preprocess_data(classifier.load_data(args.data))
+    report = classifier.search_hyperparameters(
+        X[classifier.features], y,
+        n_candidates=args.candidates,
+        min_trees=args.min_trees,
+        max_trees=args.max_trees,
+        eta=args.eta,
+        budget_seconds=args.budget_seconds,
+        budget_cpu_seconds=args.budget_cpu_seconds,
+        metric=args.metric,
+        latency_budget_ms=args.latency_budget_ms,
+        select=not args.no_selection,
+    )
+    classifier.save_model(args.output, metadata={'search': report})
+    return report
+
+
+def main(argv=None):
     """Executa fluxo completo seguindo padrão dos notebooks"""
+    args = parse_args(argv)
+    if args.command == 'benchmark-compare':
+        benchmark_compare_models(args.data, upsample=args.upsample, n_jobs=args.n_jobs, output=args.output)
+        return
+    if args.command == 'search':
+        run_search(args)
+        return
+    
     print("🚀 INICIANDO TREINAMENTO - PADRÃO NOTEBOOKS")
     print("="*60)
     
-    classifier = CowPregnancyClassifierPadrao()
+    classifier = CowPregnancyClassifierPadrao(
+        n_jobs=args.n_jobs,
+        show_plots=False if args.no_plots else None,
+    )
     
     try:
-        # 1. Carregar dados
-        df = classifier.load_data('cow_monitoring_data.csv')
-        
-        # 2. Análise exploratória
-        df = classifier.explore_data(df)
-        
-        # 3. Pré-processamento completo (AGORA RETORNA X E y)
-        df_processed, y = classifier.preprocess_data(df)
+        if args.chunked:
+            # 1-3. Leitura em chunks + pré-processamento com cache em disco
+            df_processed, y = classifier.preprocess_file(
+                args.data,
+                chunksize=args.chunksize,
+                cache_dir=args.cache_dir,
+                use_cache=not args.no_cache,
+            )
+        else:
+            # 1. Carregar dados
+            df = classifier.load_data(args.data)
+            
+            # 2. Análise exploratória
+            df = classifier.explore_data(df)
+            
+            # 3. Pré-processamento completo (AGORA RETORNA X E y)
+            df_processed, y = classifier.preprocess_data(df)
         
         # 4. Separar features
         X = df_processed[classifier.features]
@@ -413,7 +660,7 @@ def main():
         accuracy = classifier.train_best_model(X, y)
         
         # 8. Salvar modelo
-        model_path = os.path.join('..', 'models', 'pregnancy_pipeline.joblib')
+        model_path = os.path.join(BACKEND_DIR, 'models', 'pregnancy_pipeline.joblib')
         classifier.save_model(model_path)
         
         print(f"\n✅ TREINAMENTO CONCLUÍDO! Acurácia: {accuracy:.3f}")
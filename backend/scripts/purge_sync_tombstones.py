@@ -0,0 +1,36 @@
+# backend/scripts/purge_sync_tombstones.py
+"""
+Limpeza periódica dos tombstones usados pelo delta sync (/sync).
+
+Tombstones mais antigos que a retenção são removidos; um app com token
+anterior a esse limite recebe 410 e refaz a sincronização completa.
+
+Uso (a partir de backend/, ex.: cron diário):
+    python scripts/purge_sync_tombstones.py --days 90
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from db import get_session
+from sync import SYNC_TOMBSTONE_RETENTION_DAYS, purge_tombstones
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Remove tombstones de sincronização expirados")
+    parser.add_argument('--days', type=int, default=SYNC_TOMBSTONE_RETENTION_DAYS, help="Retenção em dias")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    session = get_session()
+    try:
+        deleted = purge_tombstones(session, days=args.days)
+        print(f"🧹 {deleted} tombstones com mais de {args.days} dias removidos")
+    finally:
+        session.close()
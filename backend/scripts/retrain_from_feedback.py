@@ -0,0 +1,240 @@
+# backend/scripts/retrain_from_feedback.py
+"""
+Retreino incremental a partir dos resultados confirmados em `cow_analyses`.
+
+Os veterinários marcam as análises pelo PUT /analises/<id>:
+- status `confirmed`/`confirmado`: o rótulo previsto estava certo;
+- status `corrected`/`corrigido`: o rótulo certo é o oposto do previsto.
+
+O job lê só as análises alteradas desde o último retreino (marca d'água em
+`metadata['feedback_watermark']`, com os ids já lidos naquele mesmo segundo
+em `feedback_watermark_ids`: updated_at só tem precisão de segundos, e uma
+confirmação gravada no segundo da marca depois da leitura não pode ficar
+para trás), em chunks paginados por id, separa um
+holdout, adiciona árvores à floresta atual com `warm_start` (as árvores
+antigas não são refeitas) e só publica o novo bundle se a qualidade no
+holdout se mantiver.
+
+Uso (a partir de backend/):
+    python scripts/retrain_from_feedback.py --add-trees 20
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sqlalchemy import func
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from db import FEATURE_COLUMNS, AnalysisRecord, get_session
+
+MODEL_PATH = os.path.join(BACKEND_DIR, 'models', 'pregnancy_pipeline.joblib')
+CONFIRMED_STATUSES = ('confirmed', 'confirmado')
+CORRECTED_STATUSES = ('corrected', 'corrigido')
+
+
+def _rotulo(prediction, status):
+    return int(prediction) if status in CONFIRMED_STATUSES else 1 - int(prediction)
+
+
+def carregar_feedback(features, since=None, seen_ids=(), chunk_size=1000):
+    """
+    Lê as features (colunas tipadas) das análises confirmadas/corrigidas em chunks (keyset por id).
+    Filtra por `changed_at >= since`, descartando `seen_ids` (já lidos no segundo da marca), e
+    devolve a nova marca com os ids alterados naquele segundo.
+    """
+    unknown = [feature for feature in features if feature not in FEATURE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Features do modelo sem coluna em cow_analyses: {unknown}")
+    feature_columns = [getattr(AnalysisRecord, feature) for feature in features]
+    changed_at = func.coalesce(AnalysisRecord.updated_at, AnalysisRecord.created_at)
+    rows_X, rows_y = [], []
+    skipped = 0
+    last_id = 0
+    watermark = since
+    seen_ids = set(seen_ids)
+    watermark_ids = set(seen_ids)
+    session = get_session()
+    try:
+        while True:
+            query = (
+                session.query(
+                    AnalysisRecord.id,
+                    AnalysisRecord.prediction,
+                    AnalysisRecord.status,
+                    changed_at,
+                    *feature_columns,
+                )
+                .filter(AnalysisRecord.status.in_(CONFIRMED_STATUSES + CORRECTED_STATUSES))
+                .filter(AnalysisRecord.id > last_id)
+            )
+            if since is not None:
+                query = query.filter(changed_at >= since)
+            chunk = query.order_by(AnalysisRecord.id).limit(chunk_size).all()
+            if not chunk:
+                break
+            for analysis_id, prediction, status, changed, *values in chunk:
+                if since is not None and changed == since and analysis_id in seen_ids:
+                    continue
+                if any(value is None for value in values):
+                    skipped += 1
+                    continue
+                rows_X.append(values)
+                rows_y.append(_rotulo(prediction, status))
+                if changed is not None and (watermark is None or changed > watermark):
+                    watermark, watermark_ids = changed, {analysis_id}
+                elif changed is not None and changed == watermark:
+                    watermark_ids.add(analysis_id)
+            last_id = chunk[-1][0]
+            print(f"   📥 {len(rows_y)} análises rotuladas lidas (até id {last_id})")
+    finally:
+        session.close()
+
+    X = pd.DataFrame(rows_X, columns=features)
+    y = np.asarray(rows_y, dtype=int)
+    return X, y, watermark, sorted(watermark_ids), skipped
+
+
+def avaliar(pipeline, X, y):
+    proba = pipeline.predict_proba(X)[:, 1]
+    return {
+        'accuracy': float(accuracy_score(y, (proba >= 0.5).astype(int))),
+        'roc_auc': float(roc_auc_score(y, proba)) if len(np.unique(y)) > 1 else None,
+    }
+
+
+def adicionar_arvores(pipeline, X, y, add_trees, max_trees=None):
+    """Cresce a floresta com warm_start sobre os novos rótulos, sem reajustar o pré-processamento"""
+    candidate = copy.deepcopy(pipeline)
+    preprocessor, forest = candidate[:-1], candidate[-1]
+    Xt = preprocessor.transform(X)
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + add_trees)
+    with warnings.catch_warnings():
+        # class_weight='balanced' avisa quando o warm_start usa dados diferentes do fit original
+        warnings.simplefilter('ignore', UserWarning)
+        forest.fit(Xt, y)
+    forest.set_params(warm_start=False)
+    if max_trees and len(forest.estimators_) > max_trees:
+        # Descarta as árvores mais antigas para o custo de inferência não crescer sem limite
+        forest.estimators_ = forest.estimators_[-max_trees:]
+        forest.n_estimators = len(forest.estimators_)
+    return candidate
+
+
+def publicar(bundle, model_path):
+    """Grava o bundle de forma atômica (o arquivo antigo só é trocado no final)"""
+    tmp_path = f"{model_path}.tmp"
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, model_path)
+
+
+def retrain(model_path=MODEL_PATH, add_trees=20, max_trees=400, chunk_size=1000, holdout=0.2,
+            min_rows=20, tolerance=0.0, full_history=False, dry_run=False):
+    print("🔁 RETREINO INCREMENTAL A PARTIR DO FEEDBACK")
+    print("="*60)
+
+    bundle = joblib.load(model_path)
+    pipeline, features = bundle['pipeline'], bundle['features']
+    metadata = bundle.setdefault('metadata', {})
+    since = None if full_history else metadata.get('feedback_watermark')
+    seen_ids = [] if full_history else metadata.get('feedback_watermark_ids', [])
+    if isinstance(since, str):
+        since = datetime.fromisoformat(since)
+    print(f"📅 Feedback desde: {since or 'início do histórico'}")
+
+    X, y, watermark, watermark_ids, skipped = carregar_feedback(
+        features, since=since, seen_ids=seen_ids, chunk_size=chunk_size,
+    )
+    print(f"📊 Rotuladas: {len(y)} | ignoradas (sem features): {skipped}")
+    if len(y) < min_rows or len(np.unique(y)) < 2:
+        print(f"⚠️ Feedback insuficiente (mínimo {min_rows} linhas com as duas classes); nada a fazer")
+        return None
+
+    stratify = y if np.bincount(y).min() >= 2 else None
+    X_train, X_hold, y_train, y_hold = train_test_split(
+        X, y, test_size=holdout, random_state=42, stratify=stratify
+    )
+    if len(np.unique(y_train)) < 2:
+        print("⚠️ O conjunto de treino ficou com uma só classe; nada a fazer")
+        return None
+
+    before = avaliar(pipeline, X_hold, y_hold)
+    start = time.perf_counter()
+    candidate = adicionar_arvores(pipeline, X_train, y_train, add_trees, max_trees)
+    fit_seconds = time.perf_counter() - start
+    after = avaliar(candidate, X_hold, y_hold)
+
+    published = after['accuracy'] >= before['accuracy'] - tolerance
+    run = {
+        'date': pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'labelled_rows': int(len(y)),
+        'train_rows': int(len(y_train)),
+        'holdout_rows': int(len(y_hold)),
+        'trees_added': add_trees,
+        'n_estimators': len(candidate[-1].estimators_),
+        'fit_seconds': fit_seconds,
+        'seconds_per_row': fit_seconds / len(y_train),
+        'holdout_before': before,
+        'holdout_after': after,
+        'published': published,
+    }
+    print(f"🎯 Holdout antes: {before['accuracy']:.3f} | depois: {after['accuracy']:.3f}")
+    print(f"⏱️  Treino: {fit_seconds:.3f}s ({run['seconds_per_row'] * 1000:.3f} ms por linha nova)")
+
+    if not published:
+        print("❌ Qualidade caiu no holdout; bundle atual mantido")
+    elif dry_run:
+        print("🧪 Dry-run: bundle não publicado")
+    else:
+        new_bundle = dict(bundle)
+        new_bundle['pipeline'] = candidate
+        new_bundle['metadata'] = {
+            **metadata,
+            'training_date': run['date'],
+            'feedback_watermark': watermark.isoformat() if watermark else None,
+            'feedback_watermark_ids': watermark_ids if watermark else [],
+            'retraining': metadata.get('retraining', []) + [run],
+        }
+        publicar(new_bundle, model_path)
+        print(f"✅ Novo bundle publicado em: {model_path}")
+    return run
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Retreino incremental com os rótulos dos veterinários")
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--add-trees', type=int, default=20, help="Árvores novas por retreino")
+    parser.add_argument('--max-trees', type=int, default=400, help="Limite de árvores (descarta as mais antigas)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Linhas lidas por consulta")
+    parser.add_argument('--holdout', type=float, default=0.2, help="Fração do feedback reservada para avaliação")
+    parser.add_argument('--min-rows', type=int, default=20)
+    parser.add_argument('--tolerance', type=float, default=0.0, help="Queda de acurácia aceita no holdout")
+    parser.add_argument('--full-history', action='store_true', help="Ignora a marca d'água e lê todo o histórico")
+    parser.add_argument('--dry-run', action='store_true')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    retrain(
+        model_path=args.model_path,
+        add_trees=args.add_trees,
+        max_trees=args.max_trees,
+        chunk_size=args.chunk_size,
+        holdout=args.holdout,
+        min_rows=args.min_rows,
+        tolerance=args.tolerance,
+        full_history=args.full_history,
+        dry_run=args.dry_run,
+    )
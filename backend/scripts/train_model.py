@@ -1,4 +1,6 @@
+import argparse
 import os
+import sys
 import joblib
 import pandas as pd
 import numpy as np
@@ -14,9 +16,24 @@ from sklearn.metrics import classification_report, accuracy_score, confusion_mat
 # CONFIGURAÇÕES
 # ======================================================
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-MODEL_DIR = os.path.join(BASE_DIR, "backend", "models")
-os.makedirs(MODEL_DIR, exist_ok=True)
-MODEL_PATH = os.path.join(MODEL_DIR, "pregnancy_pipeline.joblib")
+BACKEND_DIR = os.path.join(BASE_DIR, "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from scripts.model_selection import selecionar
+
+MODEL_DIR = os.path.join(BACKEND_DIR, "models")
+
+parser = argparse.ArgumentParser(description="Treina o pipeline servido pela API")
+parser.add_argument('--latency-budget-ms', type=float,
+                    default=float(os.environ['MODEL_LATENCY_BUDGET_MS']) if os.getenv('MODEL_LATENCY_BUDGET_MS') else None,
+                    help="Latência máxima do predict_proba de uma linha para o modelo enviado")
+parser.add_argument('--no-selection', action='store_true', help="Envia a floresta completa sem comparar compressões")
+parser.add_argument('--output', default=os.path.join(MODEL_DIR, "pregnancy_pipeline.joblib"))
+args = parser.parse_args()
+
+MODEL_PATH = args.output
+os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
 
 print(f"📁 Diretório do modelo: {MODEL_PATH}")
 
@@ -151,6 +168,18 @@ print(f"   TN: {cm[0,0]} | FP: {cm[0,1]}")
 print(f"   FN: {cm[1,0]} | TP: {cm[1,1]}")
 print(f"🎯 Acurácia: {accuracy:.3f}")
 
+# ======================================================
+# SELECIONAR O MODELO SERVIDO (ACURÁCIA X LATÊNCIA)
+# ======================================================
+selection_report = None
+if not args.no_selection:
+    # Candidatos medidos em metade do teste; a acurácia final vem da outra metade
+    X_sel, X_eval, y_sel, y_eval = train_test_split(X_test, y_test, test_size=0.5, random_state=42, stratify=y_test)
+    pipeline, selection_report = selecionar(
+        pipeline, X_train, y_train, X_sel, y_sel, latency_budget_ms=args.latency_budget_ms,
+    )
+    accuracy = accuracy_score(y_eval, pipeline.predict(X_eval))
+
 # ======================================================
 # TESTAR DIVERSOS CASOS
 # ======================================================
@@ -208,13 +237,14 @@ model_bundle = {
     "features": interface_features,
     "feature_mapping": feature_mapping,
     "metadata": {
-        "accuracy": accuracy,
+        "accuracy": float(accuracy),
         "n_samples": len(X),
         "class_distribution": {
-            "nao_prenhes": (y == 0).sum(),
-            "prenhes": (y == 1).sum()
+            "nao_prenhes": int((y == 0).sum()),
+            "prenhes": int((y == 1).sum())
         },
-        "training_date": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+        "training_date": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "model_selection": selection_report,
     }
 }
 
@@ -0,0 +1,159 @@
+# backend/search.py
+"""
+Busca de análises por texto nas notas e por faixas de valores das features.
+
+As features ficam em colunas próprias de `cow_analyses` (preenchidas a
+partir do payload, ver db.py), com índices (farm_id, feature). As notas são
+copiadas para `analysis_notes`, mantida pelos eventos de flush da sessão:
+no MySQL ela tem índice FULLTEXT (MATCH ... AGAINST em modo booleano); no
+SQLite, um índice FTS5 de conteúdo externo atualizado por triggers. Sem
+FTS5 disponível a busca cai para LIKE.
+"""
+import math
+import re
+
+from sqlalchemy import Integer, column, delete, event, insert, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from db import FEATURE_COLUMNS, AnalysisNote, AnalysisRecord, SessionLocal, engine
+
+SEARCH_MAX_LIMIT = 500
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS analysis_notes_fts USING fts5(
+        notes, content='analysis_notes', content_rowid='analysis_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS analysis_notes_ai AFTER INSERT ON analysis_notes BEGIN
+        INSERT INTO analysis_notes_fts(rowid, notes) VALUES (new.analysis_id, new.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS analysis_notes_ad AFTER DELETE ON analysis_notes BEGIN
+        INSERT INTO analysis_notes_fts(analysis_notes_fts, rowid, notes) VALUES ('delete', old.analysis_id, old.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS analysis_notes_au AFTER UPDATE ON analysis_notes BEGIN
+        INSERT INTO analysis_notes_fts(analysis_notes_fts, rowid, notes) VALUES ('delete', old.analysis_id, old.notes);
+        INSERT INTO analysis_notes_fts(rowid, notes) VALUES (new.analysis_id, new.notes);
+    END""",
+]
+
+_sqlite_fts = False
+
+
+def init_index() -> None:
+    """
+    Cria o índice FTS5 no SQLite (o FULLTEXT do MySQL vem do create_all/create_tables.sql).
+    """
+
+    global _sqlite_fts
+    if engine.dialect.name != 'sqlite':
+        return
+    try:
+        with engine.begin() as connection:
+            for statement in _SQLITE_FTS:
+                connection.exec_driver_sql(statement)
+        _sqlite_fts = True
+    except OperationalError as exc:
+        print(f"⚠️ FTS5 indisponível no SQLite, busca textual usará LIKE: {exc}")
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _sincronizar_notas(session, flush_context):
+    removed, added = [], []
+    for obj in session.deleted:
+        if isinstance(obj, AnalysisRecord):
+            removed.append(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, AnalysisRecord) and inspect(obj).attrs.notes.history.has_changes():
+            removed.append(obj.id)
+            added.append(obj)
+    added += [obj for obj in session.new if isinstance(obj, AnalysisRecord)]
+    added = [obj for obj in added if obj.notes]
+    if not removed and not added:
+        return
+
+    table = AnalysisNote.__table__
+    connection = session.connection()
+    if removed:
+        connection.execute(delete(table).where(table.c.analysis_id.in_(removed)))
+    if added:
+        connection.execute(insert(table), [
+            {'analysis_id': obj.id, 'farm_id': obj.farm_id, 'notes': obj.notes} for obj in added
+        ])
+
+
+def limpar_fazenda(session, farm_id: str) -> None:
+    session.query(AnalysisNote).filter(AnalysisNote.farm_id == farm_id).delete(synchronize_session=False)
+
+
+def _filtro_texto(query_text: str, farm_id):
+    tokens = _TOKEN_RE.findall(query_text)
+    if not tokens:
+        raise ValueError("Consulta de texto vazia")
+
+    dialect = engine.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import match
+
+        against = " ".join(f"+{token}*" for token in tokens)
+        subquery = AnalysisNote.__table__.select().with_only_columns(AnalysisNote.analysis_id).where(
+            match(AnalysisNote.notes, against=against).in_boolean_mode()
+        )
+        if farm_id is not None:
+            subquery = subquery.where(AnalysisNote.farm_id == farm_id)
+        return AnalysisRecord.id.in_(subquery)
+    if dialect == 'sqlite' and _sqlite_fts:
+        against = " ".join(f'"{token}"*' for token in tokens)
+        subquery = text(
+            "SELECT rowid FROM analysis_notes_fts WHERE analysis_notes_fts MATCH :fts_query"
+        ).bindparams(fts_query=against).columns(column('rowid', Integer))
+        return AnalysisRecord.id.in_(subquery)
+
+    condition = None
+    for token in tokens:
+        escaped = token.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        clause = AnalysisRecord.notes.ilike(f"%{escaped}%", escape='\\')
+        condition = clause if condition is None else condition & clause
+    return condition
+
+
+def _numero(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{name} deve ser numérico") from None
+    if not math.isfinite(number):
+        raise ValueError(f"{name} deve ser finito")
+    return number
+
+
+def buscar(session, args, farm_id=None):
+    """
+    Executa a busca a partir dos parâmetros da URL: q, <feature>_min, <feature>_max,
+    cow_id, status, limit e offset. Devolve (análises, has_more).
+    """
+
+    query = session.query(AnalysisRecord)
+    if args.get('q'):
+        query = query.filter(_filtro_texto(args['q'], farm_id))
+    for feature in FEATURE_COLUMNS:
+        column_attr = getattr(AnalysisRecord, feature)
+        low, high = _numero(args, f"{feature}_min"), _numero(args, f"{feature}_max")
+        if low is not None:
+            query = query.filter(column_attr >= low)
+        if high is not None:
+            query = query.filter(column_attr <= high)
+    if args.get('cow_id'):
+        query = query.filter(AnalysisRecord.cow_id == str(args['cow_id']))
+    if args.get('status'):
+        query = query.filter(AnalysisRecord.status == args['status'])
+
+    limit = max(1, min(int(_numero(args, 'limit') or 50), SEARCH_MAX_LIMIT))
+    offset = int(_numero(args, 'offset') or 0)
+    if offset < 0:
+        raise ValueError("offset não pode ser negativo")
+    records = query.order_by(AnalysisRecord.id.desc()).limit(limit + 1).offset(offset).all()
+    return records[:limit], len(records) > limit
@@ -0,0 +1,132 @@
+# backend/sweep.py
+"""
+Varredura de sensibilidade ("e se?") do modelo de prenhez.
+
+A partir de um vetor base com as 7 features, varia uma ou duas delas em
+faixas de valores e devolve a curva (1 feature) ou a superfície (2
+features) da probabilidade de SIM. A grade inteira vira uma única matriz
+(linhas = combinações, colunas = features do modelo) pontuada em uma só
+passada vetorizada; nada é gravado no banco.
+
+Cada eixo aceita uma lista explícita (`values`) ou uma faixa
+`start`/`stop`/`steps` (extremos incluídos):
+
+    {"base": {...}, "sweep": {"days_since_insemination": {"start": 30, "stop": 90, "steps": 61}}}
+"""
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+SWEEP_MAX_FEATURES = 2
+SWEEP_MAX_STEPS = int(os.getenv("SWEEP_MAX_STEPS", "1000"))
+SWEEP_MAX_POINTS = int(os.getenv("SWEEP_MAX_POINTS", "40000"))
+
+
+def _numero(value, name: str) -> float:
+    if isinstance(value, bool):
+        raise ValueError(f"{name} deve ser numérico")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} deve ser numérico") from None
+    if not math.isfinite(number):
+        raise ValueError(f"{name} deve ser finito")
+    return number
+
+
+def _eixo(feature: str, spec) -> np.ndarray:
+    if isinstance(spec, list):
+        spec = {'values': spec}
+    if not isinstance(spec, dict):
+        raise ValueError(f"Faixa de '{feature}' deve ter 'values' ou 'start'/'stop'/'steps'")
+
+    if 'values' in spec:
+        values = spec['values']
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"'values' de '{feature}' deve ser uma lista não vazia")
+        axis = np.array([_numero(value, f"{feature}.values") for value in values])
+    else:
+        missing = [key for key in ('start', 'stop', 'steps') if key not in spec]
+        if missing:
+            raise ValueError(f"Faixa de '{feature}' sem {missing}")
+        steps = spec['steps']
+        if isinstance(steps, bool) or not isinstance(steps, int) or steps < 2:
+            raise ValueError(f"'steps' de '{feature}' deve ser um inteiro ≥ 2")
+        if steps > SWEEP_MAX_STEPS:
+            raise ValueError(f"'steps' de '{feature}' acima do limite ({SWEEP_MAX_STEPS})")
+        axis = np.linspace(
+            _numero(spec['start'], f"{feature}.start"), _numero(spec['stop'], f"{feature}.stop"), steps,
+        )
+
+    if len(axis) > SWEEP_MAX_STEPS:
+        raise ValueError(f"'{feature}' tem mais de {SWEEP_MAX_STEPS} valores")
+    return axis
+
+
+def montar_grade(features, base, spec):
+    """
+    Matriz (pontos x features) com todas as combinações dos eixos sobre o
+    vetor base, na ordem de `np.meshgrid(..., indexing='ij')`, os eixos e
+    os valores numéricos do base (as features varridas podem faltar nele).
+    """
+
+    if not isinstance(base, dict):
+        raise ValueError("Informe 'base' com as features do modelo")
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("Informe 'sweep' com 1 ou 2 features e suas faixas")
+    if len(spec) > SWEEP_MAX_FEATURES:
+        raise ValueError(f"No máximo {SWEEP_MAX_FEATURES} features por varredura")
+    unknown = [feature for feature in spec if feature not in features]
+    if unknown:
+        raise ValueError(f"Features desconhecidas na varredura: {unknown}")
+    missing = [feature for feature in features if feature not in base and feature not in spec]
+    if missing:
+        raise ValueError(f"Features faltando em 'base': {missing}")
+
+    axes = [(feature, _eixo(feature, axis_spec)) for feature, axis_spec in spec.items()]
+    points = math.prod(len(values) for _, values in axes)
+    if points > SWEEP_MAX_POINTS:
+        raise ValueError(f"Grade com {points} pontos acima do limite ({SWEEP_MAX_POINTS})")
+
+    base_values = {
+        feature: _numero(base[feature], f"base.{feature}") for feature in features if feature in base
+    }
+    grid = np.tile([base_values.get(feature, np.nan) for feature in features], (points, 1))
+    mesh = np.meshgrid(*(values for _, values in axes), indexing='ij')
+    for (feature, _), values in zip(axes, mesh):
+        grid[:, features.index(feature)] = values.ravel()
+    return grid, axes, base_values
+
+
+def varrer(pipeline, scorer, features, body) -> dict:
+    """
+    Pontua a grade do corpo de POST /predict/sweep. `scorer` é o
+    EarlyExitForest do modelo carregado (uma passada por árvore sobre a
+    matriz); sem ele, o `predict_proba` do pipeline.
+    """
+
+    start = time.perf_counter()
+    grid, axes, base_values = montar_grade(features, body.get('base'), body.get('sweep'))
+    # Base completo: o próprio ponto base vai junto, na mesma passada
+    has_base = len(base_values) == len(features)
+    matrix = np.vstack([grid, [base_values[feature] for feature in features]]) if has_base else grid
+    X = pd.DataFrame(matrix, columns=features)
+
+    if scorer is not None:
+        proba = scorer.probabilities(X)
+    else:
+        classes = list(pipeline.classes_)
+        proba = pipeline.predict_proba(X)[:, classes.index(1) if 1 in classes else -1]
+
+    surface = proba[:len(grid)].reshape([len(values) for _, values in axes])
+    return {
+        'base': base_values,
+        'base_probability': float(proba[-1]) if has_base else None,
+        'axes': [{'feature': feature, 'values': values.tolist()} for feature, values in axes],
+        'probabilities': np.round(surface, 4).tolist(),
+        'points': len(grid),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
@@ -0,0 +1,194 @@
+# backend/sync.py
+"""
+Delta sync para o app Flutter offline-first.
+
+Pull: o cliente envia o token da última sincronização e recebe só as
+análises criadas/alteradas e os tombstones das removidas depois dele. O
+token é opaco para o cliente e guarda duas marcas d'água (updated_at, id):
+uma para `cow_analyses` e outra para `cow_analysis_tombstones`.
+
+Só são entregues linhas com mais de SYNC_SETTLE_SECONDS de idade, para que
+transações ainda em andamento no mesmo segundo não fiquem para trás da
+marca d'água.
+
+Push: lote de análises criadas offline, cada uma com `client_key`; uma
+chave já vista devolve a análise existente em vez de criar uma duplicata.
+"""
+import base64
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+
+from db import AnalysisRecord, AnalysisTombstone, SyncClientKey
+
+SYNC_SETTLE_SECONDS = int(os.getenv("SYNC_SETTLE_SECONDS", "2"))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90"))
+SYNC_PAGE_LIMIT = 1000
+SYNC_PUSH_LIMIT = 500
+CLIENT_KEY_MAX_LENGTH = 64
+
+
+class ResyncRequired(Exception):
+    """
+    O token é mais antigo que a retenção dos tombstones; o cliente precisa baixar tudo de novo.
+    """
+
+
+def encode_token(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_token(token):
+    """
+    Converte o token do cliente em marcas d'água; token vazio = primeira sincronização.
+    """
+
+    if not token:
+        return {'u': None, 'i': 0, 'd': None, 'di': 0}
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {
+            'u': state.get('u'),
+            'i': int(state.get('i', 0)),
+            'd': state.get('d'),
+            'di': int(state.get('di', 0)),
+        }
+    except (ValueError, TypeError, AttributeError) as exc:
+        raise ValueError("Token de sincronização inválido") from exc
+
+
+def _depois_de(ts_column, id_column, ts, last_id):
+    # (ts_column, id_column) > (ts, last_id), escrito para usar o índice (ts, id)
+    return and_(ts_column >= ts, or_(ts_column > ts, id_column > last_id))
+
+
+def db_now(session) -> datetime:
+    return session.query(func.now()).scalar()
+
+
+def pull_changes(session, state: dict, limit: int = SYNC_PAGE_LIMIT):
+    """
+    Devolve (análises alteradas, tombstones, novo estado, has_more, horário do servidor).
+    """
+
+    now = db_now(session)
+    settled = now - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+    since_deleted = datetime.fromisoformat(state['d']) if state['d'] else None
+    if since_deleted and since_deleted < now - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS):
+        raise ResyncRequired()
+
+    query = session.query(AnalysisRecord).filter(AnalysisRecord.updated_at <= settled)
+    if state['u']:
+        query = query.filter(_depois_de(
+            AnalysisRecord.updated_at, AnalysisRecord.id, datetime.fromisoformat(state['u']), state['i'],
+        ))
+    changes = query.order_by(AnalysisRecord.updated_at, AnalysisRecord.id).limit(limit + 1).all()
+
+    new_state = dict(state)
+    if since_deleted is None:
+        # Primeira sincronização: o download completo já não inclui o que foi removido antes
+        tombstones = []
+        new_state['d'], new_state['di'] = settled.isoformat(), 0
+    else:
+        tombstones = (
+            session.query(AnalysisTombstone)
+            .filter(AnalysisTombstone.deleted_at <= settled)
+            .filter(_depois_de(
+                AnalysisTombstone.deleted_at, AnalysisTombstone.analysis_id, since_deleted, state['di'],
+            ))
+            .order_by(AnalysisTombstone.deleted_at, AnalysisTombstone.analysis_id)
+            .limit(limit + 1)
+            .all()
+        )
+
+    tombstones_more = len(tombstones) > limit
+    has_more = len(changes) > limit or tombstones_more
+    changes, tombstones = changes[:limit], tombstones[:limit]
+    if changes:
+        new_state['u'], new_state['i'] = changes[-1].updated_at.isoformat(), changes[-1].id
+    if tombstones_more:
+        new_state['d'], new_state['di'] = tombstones[-1].deleted_at.isoformat(), tombstones[-1].analysis_id
+    elif since_deleted is not None:
+        # Todos os tombstones até `settled` já foram entregues: a marca avança mesmo sem
+        # remoções, senão um cliente em dia estouraria a retenção e cairia no resync
+        new_state['d'], new_state['di'] = settled.isoformat(), 0
+    return changes, tombstones, new_state, has_more, now
+
+
+def push_analyses(session, items, build_record):
+    """
+    Cria as análises enfileiradas no app; `build_record(item)` monta o AnalysisRecord
+    ou levanta ValueError. Chaves repetidas devolvem a análise já existente.
+    """
+
+    outcomes = [None] * len(items)
+    keys = {}
+    for index, item in enumerate(items):
+        key = item.get('client_key') if isinstance(item, dict) else None
+        if not isinstance(key, str) or not 0 < len(key) <= CLIENT_KEY_MAX_LENGTH:
+            outcomes[index] = {'client_key': key, 'status': 'error', 'error': 'client_key inválida'}
+        elif key in keys:
+            outcomes[index] = {'client_key': key, 'status': 'duplicate', 'ref': keys[key]}
+        else:
+            keys[key] = index
+
+    for attempt in range(2):
+        existing = {
+            row.client_key: row.analysis_id
+            for row in session.query(SyncClientKey).filter(SyncClientKey.client_key.in_(list(keys)))
+        } if keys else {}
+
+        created = []
+        for key, index in keys.items():
+            if key in existing:
+                outcomes[index] = {'client_key': key, 'status': 'duplicate', 'analysis_id': existing[key]}
+                continue
+            try:
+                record = build_record(items[index])
+            except (ValueError, TypeError, KeyError) as exc:
+                outcomes[index] = {'client_key': key, 'status': 'error', 'error': str(exc)}
+                continue
+            session.add(record)
+            created.append((key, index, record))
+
+        try:
+            session.flush()
+            for key, index, record in created:
+                session.add(SyncClientKey(client_key=key, analysis_id=record.id))
+            session.commit()
+        except IntegrityError:
+            # Outro retry do mesmo lote chegou antes: a segunda tentativa vê as chaves como duplicadas
+            session.rollback()
+            if attempt == 1:
+                raise
+            continue
+
+        for key, index, record in created:
+            outcomes[index] = {'client_key': key, 'status': 'created', 'analysis_id': record.id}
+        break
+
+    for outcome in outcomes:
+        if outcome and 'ref' in outcome:
+            outcome['analysis_id'] = outcomes[outcome.pop('ref')].get('analysis_id')
+    return outcomes
+
+
+def purge_tombstones(session, days: int = SYNC_TOMBSTONE_RETENTION_DAYS) -> int:
+    """
+    Remove tombstones mais antigos que a retenção (tokens mais velhos recebem 410).
+    """
+
+    cutoff = db_now(session) - timedelta(days=days)
+    deleted = (
+        session.query(AnalysisTombstone)
+        .filter(AnalysisTombstone.deleted_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    session.commit()
+    return deleted
@@ -0,0 +1,399 @@
+# backend/training_jobs.py
+"""
+Treino do modelo em segundo plano, disparado pela API.
+
+POST /models/train coloca um job na fila; uma thread despachante roda um
+job por vez em um processo separado (`python -m training_jobs <job>`, sem
+herdar o estado da API) com recursos limitados:
+
+- afinidade de CPU nos primeiros TRAINING_CORES núcleos e o mesmo número
+  de workers no pool da validação cruzada e nas threads do BLAS/OpenMP;
+- prioridade reduzida por `os.nice(TRAINING_NICE)`, para o escalonador dar
+  preferência às threads da API;
+- limite de memória opcional (TRAINING_MEMORY_MB, RLIMIT_AS).
+
+O processo passa pelas fases load, preprocess, cv, fit e export, gravando
+o estado em `models/jobs/<job>.json` (substituição atômica) a cada troca
+de fase; o GET /models/train/<job> só lê esse arquivo. A saída do treino
+vai para `models/jobs/<job>.log` e o matplotlib roda sem display.
+
+Um job concluído gera um bundle versionado em `models/versions/` (mais um
+resumo .json ao lado, para listar as versões sem carregar os modelos), com
+o id do job e as métricas no metadata; ele só passa a ser servido depois de
+POST /models/<versão>/activate. A fila e o despachante são por processo:
+com vários workers da API, cada um roda os próprios jobs.
+"""
+import json
+import math
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BACKEND_DIR, 'models')
+# Estado dos jobs e bundles versionados (TRAINING_DIR separa os de benchmarks e testes)
+TRAINING_DIR = os.getenv('TRAINING_DIR', MODELS_DIR)
+JOBS_DIR = os.path.join(TRAINING_DIR, 'jobs')
+VERSIONS_DIR = os.path.join(TRAINING_DIR, 'versions')
+TRAINING_DATA_DIR = os.getenv('TRAINING_DATA_DIR', BACKEND_DIR)
+
+TRAINING_CORES = int(os.getenv('TRAINING_CORES', '1'))
+TRAINING_NICE = int(os.getenv('TRAINING_NICE', '19'))
+TRAINING_MEMORY_MB = int(os.getenv('TRAINING_MEMORY_MB', '0'))
+TRAINING_MAX_QUEUED = int(os.getenv('TRAINING_MAX_QUEUED', '3'))
+DEFAULT_DATA = 'cow_monitoring_data.csv'
+
+# Peso de cada fase no progresso total
+PHASES = (('load', 0.1), ('preprocess', 0.15), ('cv', 0.4), ('fit', 0.25), ('export', 0.1))
+FINAL_STATES = ('succeeded', 'failed')
+JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+VERSION_RE = re.compile(r"[0-9]{8}-[0-9]{6}-[0-9a-f]{8}")
+SEARCH_OPTIONS = (
+    'n_candidates', 'min_trees', 'max_trees', 'eta', 'budget_seconds', 'budget_cpu_seconds', 'metric',
+    'latency_budget_ms',
+)
+# Mínimo das opções inteiras da busca; as de orçamento são números > 0
+SEARCH_INT_MINIMUMS = {'n_candidates': 1, 'min_trees': 1, 'max_trees': 1, 'eta': 2}
+SEARCH_BUDGETS = ('budget_seconds', 'budget_cpu_seconds', 'latency_budget_ms')
+SEARCH_METRICS = ('accuracy', 'roc_auc')
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'LOKY_MAX_CPU_COUNT')
+
+_queue = queue.Queue()
+_lock = threading.Lock()
+_dispatcher = None
+_pending = 0
+
+
+def _agora() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _caminho_job(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+
+def caminho_versao(version: str) -> str:
+    return os.path.join(VERSIONS_DIR, f"{version}.joblib")
+
+
+def _gravar(job: dict) -> None:
+    """Grava o estado do job de forma atômica (o leitor nunca vê um JSON pela metade)."""
+    path = _caminho_job(job['id'])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        json.dump(job, handle, indent=2)
+    os.replace(tmp_path, path)
+
+
+def ler(job_id: str):
+    if not JOB_ID_RE.fullmatch(job_id or ''):
+        return None
+    try:
+        with open(_caminho_job(job_id), encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def _validar_busca(search: dict) -> None:
+    # Erro aqui vira 400; no processo filho só apareceria depois da validação cruzada
+    for key, minimum in SEARCH_INT_MINIMUMS.items():
+        value = search.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < minimum):
+            raise ValueError(f"search.{key} deve ser um inteiro ≥ {minimum}")
+    for key in SEARCH_BUDGETS:
+        value = search.get(key)
+        if value is not None and (
+            isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value <= 0
+        ):
+            raise ValueError(f"search.{key} deve ser um número positivo")
+    if search.get('metric', 'accuracy') not in SEARCH_METRICS:
+        raise ValueError(f"search.metric deve ser um de {list(SEARCH_METRICS)}")
+    if search.get('max_trees', 200) < search.get('min_trees', 25):
+        raise ValueError("search.max_trees deve ser ≥ search.min_trees")
+
+
+def validar_opcoes(options) -> dict:
+    if options is None:
+        options = {}
+    if not isinstance(options, dict):
+        raise ValueError("Corpo deve ser um objeto JSON")
+    unknown = set(options) - {'data', 'mode', 'cv', 'cores', 'nice', 'search'}
+    if unknown:
+        raise ValueError(f"Opções não suportadas: {sorted(unknown)}")
+
+    data = options.get('data', DEFAULT_DATA)
+    # Só arquivos do diretório de dados: o nome vem do cliente
+    if not isinstance(data, str) or os.path.basename(data) != data or not data.endswith('.csv'):
+        raise ValueError("data deve ser o nome de um CSV do diretório de dados")
+    if not os.path.isfile(os.path.join(TRAINING_DATA_DIR, data)):
+        raise ValueError(f"Arquivo de dados não encontrado: {data}")
+
+    mode = options.get('mode', 'train')
+    if mode not in ('train', 'search'):
+        raise ValueError("mode deve ser 'train' ou 'search'")
+    cores = options.get('cores', TRAINING_CORES)
+    if not isinstance(cores, int) or not 1 <= cores <= (os.cpu_count() or 1):
+        raise ValueError(f"cores deve estar entre 1 e {os.cpu_count() or 1}")
+    nice = options.get('nice', TRAINING_NICE)
+    # Só aumenta a gentileza: o processo filho não pode ter prioridade maior que a API
+    if not isinstance(nice, int) or not 0 <= nice <= 19:
+        raise ValueError("nice deve estar entre 0 e 19")
+    search = options.get('search') or {}
+    if not isinstance(search, dict) or set(search) - set(SEARCH_OPTIONS):
+        raise ValueError(f"search deve ser um objeto com as chaves {list(SEARCH_OPTIONS)}")
+    if search and mode != 'search':
+        raise ValueError("search só vale com mode 'search'")
+    _validar_busca(search)
+    cv = options.get('cv', True)
+    if not isinstance(cv, bool):
+        raise ValueError("cv deve ser true ou false")
+
+    return {
+        'data': data,
+        'mode': mode,
+        'cv': cv,
+        'cores': cores,
+        'nice': nice,
+        'search': search,
+    }
+
+
+def enfileirar(options: dict) -> dict:
+    """Registra o job e o coloca na fila; levanta OverflowError com a fila cheia."""
+
+    global _dispatcher, _pending
+    with _lock:
+        if _pending >= TRAINING_MAX_QUEUED:
+            raise OverflowError(f"Fila de treino cheia ({TRAINING_MAX_QUEUED} jobs)")
+        _pending += 1
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        job = {
+            'id': uuid.uuid4().hex,
+            'state': 'queued',
+            'phase': None,
+            'progress': 0.0,
+            'options': options,
+            'created_at': _agora(),
+            'started_at': None,
+            'finished_at': None,
+            'timings': {},
+            'version': None,
+            'metrics': None,
+            'error': None,
+        }
+        _gravar(job)
+        _queue.put(job['id'])
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _dispatcher = threading.Thread(target=_despachar, name='training-dispatcher', daemon=True)
+            _dispatcher.start()
+    return job
+
+
+def _marcar_falha(job_id: str, error: str) -> None:
+    try:
+        job = ler(job_id)
+    except (OSError, ValueError):
+        job = None
+    if job is None:
+        # JSON removido ou ilegível: regrava o mínimo para o GET do job mostrar a falha
+        job = {'id': job_id, 'state': 'queued', 'phase': None, 'progress': 0.0, 'options': None,
+               'created_at': None, 'started_at': None, 'timings': {}, 'version': None, 'metrics': None}
+    if job['state'] in FINAL_STATES:
+        return
+    job.update(state='failed', finished_at=_agora(), error=error)
+    try:
+        _gravar(job)
+    except OSError as exc:
+        print(f"❌ Não foi possível registrar a falha do job {job_id}: {exc}")
+
+
+def _despachar():
+    global _pending
+    while True:
+        job_id = _queue.get()
+        returncode = None
+        try:
+            job = ler(job_id)
+            if job is None:
+                raise FileNotFoundError("estado do job não encontrado")
+            cores = job['options']['cores']
+            # As threads do BLAS/OpenMP são lidas na importação do numpy: o ambiente vem pronto
+            env = {**os.environ, **{name: str(cores) for name in THREAD_ENV_VARS}, 'MPLBACKEND': 'Agg'}
+            with open(os.path.join(JOBS_DIR, f"{job_id}.log"), 'w', encoding='utf-8') as log:
+                returncode = subprocess.call(
+                    [sys.executable, '-m', 'training_jobs', job_id],
+                    cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+                )
+        except Exception as exc:
+            # Uma falha aqui não pode matar o despachante: a fila pararia de andar
+            print(f"❌ Falha ao despachar o job {job_id}: {exc}")
+            _marcar_falha(job_id, f"Falha ao iniciar o treino: {exc}")
+        finally:
+            with _lock:
+                _pending -= 1
+        if returncode is not None:
+            # Morto antes de registrar o fim (OOM, sinal, limite de memória)
+            _marcar_falha(job_id, f"Processo de treino terminou com código {returncode}")
+
+
+def marcar_interrompidos() -> int:
+    """Na subida da API, jobs que ficaram na fila ou rodando não têm mais processo."""
+    if not os.path.isdir(JOBS_DIR):
+        return 0
+    count = 0
+    for name in os.listdir(JOBS_DIR):
+        job = ler(name[:-len('.json')]) if name.endswith('.json') else None
+        if job and job['state'] not in FINAL_STATES:
+            job.update(state='failed', finished_at=_agora(), error="Interrompido pelo reinício da API")
+            _gravar(job)
+            count += 1
+    return count
+
+
+def listar_versoes(active_version=None) -> list:
+    versions = []
+    if not os.path.isdir(VERSIONS_DIR):
+        return versions
+    for name in sorted(os.listdir(VERSIONS_DIR), reverse=True):
+        version = name[:-len('.json')]
+        if not name.endswith('.json') or not VERSION_RE.fullmatch(version):
+            continue
+        if not os.path.isfile(caminho_versao(version)):
+            continue
+        with open(os.path.join(VERSIONS_DIR, name), encoding='utf-8') as handle:
+            summary = json.load(handle)
+        versions.append({**summary, 'active': version == active_version})
+    return versions
+
+
+# ======================================================
+# PROCESSO DE TREINO
+# ======================================================
+
+def _limitar_recursos(cores: int, nice: int) -> None:
+    if hasattr(os, 'sched_setaffinity'):
+        allowed = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, allowed[:cores])
+    if nice:
+        os.nice(nice)
+    if TRAINING_MEMORY_MB:
+        import resource
+
+        limit = TRAINING_MEMORY_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class _Fases:
+    """Marca início e fim de cada fase no arquivo do job."""
+
+    def __init__(self, job: dict):
+        self.job = job
+        self.done = 0.0
+
+    def iniciar(self, phase: str) -> float:
+        self.job.update(phase=phase, progress=round(self.done, 3))
+        _gravar(self.job)
+        return time.perf_counter()
+
+    def concluir(self, phase: str, start: float, skipped: bool = False) -> None:
+        self.done += dict(PHASES)[phase]
+        self.job['timings'][phase] = None if skipped else round(time.perf_counter() - start, 3)
+        self.job['progress'] = round(self.done, 3)
+        _gravar(self.job)
+
+
+def executar(job_id: str) -> int:
+    """Corpo do processo de treino: roda as fases e grava o bundle versionado."""
+
+    job = ler(job_id)
+    options = job['options']
+    _limitar_recursos(options['cores'], options['nice'])
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    job.update(state='running', started_at=_agora(), pid=os.getpid())
+    phases = _Fases(job)
+    # Gráficos e arquivos relativos do treino ficam na pasta de jobs, não no cwd da API
+    os.chdir(JOBS_DIR)
+    try:
+        _treinar(job, options, phases)
+    except Exception as exc:
+        traceback.print_exc()
+        job.update(state='failed', finished_at=_agora(), error=f"{type(exc).__name__}: {exc}")
+        _gravar(job)
+        return 1
+    job.update(state='succeeded', phase=None, progress=1.0, finished_at=_agora())
+    _gravar(job)
+    print(f"✅ Job {job_id} concluído: versão {job['version']}")
+    return 0
+
+
+def _treinar(job: dict, options: dict, phases: _Fases) -> None:
+    from scripts.pregnancy_classifier import CowPregnancyClassifierPadrao
+
+    classifier = CowPregnancyClassifierPadrao(n_jobs=options['cores'], show_plots=False)
+
+    start = phases.iniciar('load')
+    df = classifier.load_data(os.path.join(TRAINING_DATA_DIR, options['data']))
+    phases.concluir('load', start)
+
+    start = phases.iniciar('preprocess')
+    df_processed, y = classifier.preprocess_data(df)
+    X = df_processed[classifier.features]
+    phases.concluir('preprocess', start)
+
+    start = phases.iniciar('cv')
+    if options['cv']:
+        classifier.compare_models(X, y, n_jobs=options['cores'])
+    phases.concluir('cv', start, skipped=not options['cv'])
+
+    start = phases.iniciar('fit')
+    metrics = {'rows': int(len(y)), 'cv': classifier.comparison_summary or None}
+    if options['mode'] == 'search':
+        report = classifier.search_hyperparameters(X, y, **{'n_jobs': options['cores'], **options['search']})
+        selection = report.get('model_selection')
+        if selection:
+            # Com orçamento de latência o bundle pode ser uma compressão do vencedor
+            chosen = next(row for row in selection['candidates'] if row['name'] == selection['selected'])
+            metrics['accuracy'] = chosen['accuracy']
+        else:
+            metrics['accuracy'] = report['winner']['accuracy']
+        metrics['search'] = report
+    else:
+        metrics['accuracy'] = float(classifier.train_best_model(X, y))
+    phases.concluir('fit', start)
+
+    start = phases.iniciar('export')
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{job['id'][:8]}"
+    path = caminho_versao(version)
+    classifier.save_model(f"{path}.tmp", metadata={
+        'version': version,
+        'job_id': job['id'],
+        'accuracy': metrics['accuracy'],
+        'training_options': options,
+        'training_metrics': metrics,
+        'training_timings': job['timings'],
+    })
+    os.replace(f"{path}.tmp", path)
+    summary = {
+        'version': version,
+        'job_id': job['id'],
+        'training_date': datetime.now().isoformat(timespec='seconds'),
+        'accuracy': metrics['accuracy'],
+        'mode': options['mode'],
+        'data': options['data'],
+    }
+    with open(os.path.join(VERSIONS_DIR, f"{version}.json"), 'w', encoding='utf-8') as handle:
+        json.dump(summary, handle, indent=2)
+    job.update(version=version, metrics={key: value for key, value in metrics.items() if key != 'search'})
+    phases.concluir('export', start)
+
+
+if __name__ == '__main__':
+    sys.exit(executar(sys.argv[1]))